@@ -1,29 +1,316 @@
-
 import requests
 from bs4 import BeautifulSoup
 import os
+import threading
+import time
+from collections import deque, namedtuple
+from contextlib import contextmanager
+from urllib.parse import urlparse
+from urllib.robotparser import RobotFileParser
 
-def fetch_website_content(url):
-    """Fetches content from a given URL."""
+# Crawler identity, sent with every request and matched against robots.txt rules
+USER_AGENT = os.getenv("CRAWLER_USER_AGENT", "AI_NewsBot_Aladdin/1.0")
+
+# Most requests in flight to one host at a time, however many sources are checked concurrently
+MAX_REQUESTS_PER_HOST = int(os.getenv("MAX_REQUESTS_PER_HOST", 2))
+
+# Seconds between the starts of requests to one host, unless its robots.txt sets a Crawl-delay
+DEFAULT_CRAWL_DELAY_SECONDS = float(os.getenv("CRAWL_DELAY_SECONDS", 1.0))
+
+# Seconds a host's robots.txt is trusted before it is fetched again
+ROBOTS_TTL_SECONDS = int(os.getenv("ROBOTS_TTL_SECONDS", 3600))
+
+# Seconds before retrying a robots.txt that could not be fetched; the host is
+# treated as disallowed meanwhile (RFC 9309)
+ROBOTS_ERROR_TTL_SECONDS = 300
+
+# Bytes of robots.txt parsed; the rest is ignored (the RFC 9309 minimum)
+MAX_ROBOTS_BYTES = 500 * 1024
+
+# Largest page downloaded; bigger pages are skipped without being held in memory
+MAX_BODY_BYTES = int(os.getenv("MAX_BODY_BYTES", 5 * 1024 * 1024))
+
+# Bytes read from the network at a time
+READ_CHUNK_BYTES = 64 * 1024
+
+# Hosts whose keep-alive connections stay pooled (least recently used are closed first)
+POOLED_HOSTS = 100
+
+def host_of(url):
+    """The host a URL's requests count against."""
+    return urlparse(url).netloc.lower()
+
+class HostLimiter:
+    """Caps the number of concurrent requests to each host, and spaces out their starts."""
+
+    def __init__(self, max_per_host):
+        self.max_per_host = max_per_host
+        self._active = {}      # host -> requests holding a slot
+        self._next_start = {}  # host -> earliest time.monotonic() the next request may start
+        self._changed = threading.Condition()
+
+    @contextmanager
+    def limit(self, url, delay=0.0):
+        """Waits until a request to the URL's host may start, and holds the slot until the block ends.
+
+        Requests to the host start at least `delay` seconds apart: a caller
+        reserves the next free start time only once it has a slot, so requests
+        that queued for one still start spaced out.
+        """
+        host = host_of(url)
+        with self._changed:
+            while self._active.get(host, 0) >= self.max_per_host:
+                self._changed.wait()
+            self._active[host] = self._active.get(host, 0) + 1
+            start = max(time.monotonic(), self._next_start.get(host, 0.0))
+            self._next_start[host] = start + delay
+        try:
+            wait = start - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            yield
+        finally:
+            with self._changed:
+                self._active[host] -= 1
+                self._changed.notify_all()
+
+    def active(self, url):
+        """Requests to the URL's host holding a slot."""
+        with self._changed:
+            return self._active.get(host_of(url), 0)
+
+    def ready_in(self, url):
+        """Seconds until a request to the URL's host could start without waiting
+        (0 if it could now), or None while all the host's slots are taken."""
+        host = host_of(url)
+        with self._changed:
+            if self._active.get(host, 0) >= self.max_per_host:
+                return None
+            return max(0.0, self._next_start.get(host, 0.0) - time.monotonic())
+
+host_limiter = HostLimiter(MAX_REQUESTS_PER_HOST)
+
+_session = None
+_session_lock = threading.Lock()
+
+def get_session():
+    """Crawler-wide HTTP session, created on first use.
+
+    Keeps up to MAX_REQUESTS_PER_HOST keep-alive connections per host, so
+    repeated checks of a host skip the DNS lookup, TCP connect and TLS handshake.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(pool_connections=POOLED_HOSTS, pool_maxsize=MAX_REQUESTS_PER_HOST)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            session.headers["User-Agent"] = USER_AGENT
+            _session = session
+        return _session
+
+def read_body(response, max_bytes, truncate=False):
+    """Reads a streamed response body, never holding more than max_bytes of it.
+
+    Returns the body, or None if it is larger than max_bytes (unless truncate,
+    which returns the first max_bytes instead).
+    """
+    declared = response.headers.get("Content-Length")
+    if not truncate and declared and declared.isdigit() and int(declared) > max_bytes:
+        return None
+    body = bytearray()
+    for chunk in response.iter_content(READ_CHUNK_BYTES):
+        body += chunk
+        if len(body) > max_bytes:
+            if not truncate:
+                return None
+            return bytes(body[:max_bytes])
+    return bytes(body)
+
+class RobotsCache:
+    """robots.txt policies per site, each fetched at most once per TTL."""
+
+    def __init__(self, ttl=ROBOTS_TTL_SECONDS, error_ttl=ROBOTS_ERROR_TTL_SECONDS):
+        self.ttl = ttl
+        self.error_ttl = error_ttl
+        self._policies = {}  # site -> (parser, expires at)
+        self._site_locks = {}
+        self._lock = threading.Lock()
+
+    def policy(self, url):
+        """The RobotFileParser for the URL's site, fetched if missing or expired."""
+        parsed = urlparse(url)
+        site = f"{parsed.scheme}://{parsed.netloc.lower()}"
+        with self._lock:
+            cached = self._policies.get(site)
+            if cached and cached[1] > time.monotonic():
+                return cached[0]
+            site_lock = self._site_locks.setdefault(site, threading.Lock())
+        # One fetch per site: concurrent checks of the same site wait for it
+        with site_lock:
+            cached = self._policies.get(site)
+            if cached and cached[1] > time.monotonic():
+                return cached[0]
+            parser, ttl = self._fetch(site)
+            with self._lock:
+                self._policies[site] = (parser, time.monotonic() + ttl)
+            return parser
+
+    def _fetch(self, site):
+        parser = RobotFileParser(f"{site}/robots.txt")
+        try:
+            with host_limiter.limit(site):
+                with get_session().get(parser.url, timeout=10, stream=True) as response:
+                    if response.status_code in (401, 403):
+                        parser.disallow_all = True
+                    elif 400 <= response.status_code < 500:
+                        parser.allow_all = True  # No robots.txt: everything is allowed
+                    elif response.status_code >= 500:
+                        raise requests.exceptions.HTTPError(f"{response.status_code} for {parser.url}")
+                    else:
+                        body = read_body(response, MAX_ROBOTS_BYTES, truncate=True)
+                        parser.parse(body.decode("utf-8", errors="replace").splitlines())
+        except requests.exceptions.RequestException as e:
+            print(f"Error fetching {parser.url}: {e}; treating {site} as disallowed for now")
+            parser.disallow_all = True
+            return parser, self.error_ttl
+        parser.modified()
+        return parser, self.ttl
+
+    def rules(self, url):
+        """Whether we may fetch the URL, and the seconds between requests its site asks for
+        (DEFAULT_CRAWL_DELAY_SECONDS if it sets no Crawl-delay)."""
+        policy = self.policy(url)
+        delay = policy.crawl_delay(USER_AGENT)
+        return policy.can_fetch(USER_AGENT, url), float(delay) if delay is not None else DEFAULT_CRAWL_DELAY_SECONDS
+
+robots_cache = RobotsCache()
+
+# Seconds between checks of a host whose queued request is waiting for an
+# earlier one to take or give up its slot
+HOST_QUEUE_RECHECK_SECONDS = 0.05
+
+class HostQueue:
+    """Work waiting for a request to its URL's host, handed out host by host
+    only once the host can take the request without waiting.
+
+    Threads given work from the queue start its request at once instead of
+    sleeping out the host's crawl delay or waiting for its slots. Each host
+    gets at most MAX_REQUESTS_PER_HOST items in flight, and a new one only
+    after those handed out earlier have started their request; call done()
+    when an item's request has finished.
+    """
+
+    def __init__(self, limiter=None):
+        self.limiter = limiter or host_limiter
+        self._waiting = {}    # host -> deque of (url, item), in the order they were put
+        self._in_flight = {}  # host -> items handed out and not yet done
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return sum(len(queue) for queue in self._waiting.values())
+
+    def put(self, url, item):
+        with self._lock:
+            self._waiting.setdefault(host_of(url), deque()).append((url, item))
+
+    def done(self, url):
+        with self._lock:
+            self._in_flight[host_of(url)] -= 1
+
+    def pop_ready(self):
+        """Takes the items whose host can take a request now.
+
+        Returns the items, in order per host, and the seconds until another
+        may be ready (None if none are left waiting).
+        """
+        ready, wake_in = [], None
+        with self._lock:
+            for host, queue in list(self._waiting.items()):
+                while queue:
+                    url, item = queue[0]
+                    in_flight = self._in_flight.get(host, 0)
+                    ready_in = None
+                    # Until every item handed out has its slot, the host's next start time is not known yet
+                    if in_flight < self.limiter.max_per_host and self.limiter.active(url) >= in_flight:
+                        ready_in = self.limiter.ready_in(url)
+                    if ready_in != 0:
+                        ready_in = HOST_QUEUE_RECHECK_SECONDS if ready_in is None else ready_in
+                        wake_in = ready_in if wake_in is None else min(wake_in, ready_in)
+                        break
+                    queue.popleft()
+                    self._in_flight[host] = in_flight + 1
+                    ready.append(item)
+                if not queue:
+                    del self._waiting[host]
+        return ready, wake_in
+
+# Outcome of fetching a source. not_modified means the server answered 304 to
+# our validators (content is None, nothing was downloaded or parsed); etag,
+# last_modified and content_length describe the page for the next conditional request.
+FetchResult = namedtuple("FetchResult", ["content", "not_modified", "etag", "last_modified", "content_length"])
+
+def extract_text(html, encoding=None):
+    """Extracts readable text from an HTML page (text, or bytes in the given or detected encoding)."""
+    soup = BeautifulSoup(html, 'html.parser', from_encoding=encoding if isinstance(html, bytes) else None)
+    # Extract text from common content areas, ignoring scripts and styles
+    for script in soup(["script", "style"]):
+        script.extract()
+    text = soup.get_text()
+    # Break into lines and remove leading/trailing space on each
+    lines = (line.strip() for line in text.splitlines())
+    # Break multi-headlines into a line each
+    chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
+    # Drop blank lines
+    return '\n'.join(chunk for chunk in chunks if chunk)
+
+def fetch_website(url, etag=None, last_modified=None):
+    """Fetches a page, conditionally if validators from the previous fetch are given.
+
+    Sends If-None-Match / If-Modified-Since, so an unchanged page costs a 304
+    with no body instead of a download, parse and hash. Requests go through
+    the pooled session, only to URLs the site's robots.txt allows, spaced by
+    its Crawl-delay; the body is streamed and pages over MAX_BODY_BYTES skipped.
+
+    Returns a FetchResult, or None if the request failed or was not allowed.
+    """
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
     try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()  # Raise an HTTPError for bad responses (4xx or 5xx)
-        soup = BeautifulSoup(response.text, 'html.parser')
-        # Extract text from common content areas, ignoring scripts and styles
-        for script in soup(["script", "style"]):
-            script.extract()
-        text = soup.get_text()
-        # Break into lines and remove leading/trailing space on each
-        lines = (line.strip() for line in text.splitlines())
-        # Break multi-headlines into a line each
-        chunks = (phrase.strip() for line in lines for phrase in line.split("  "))
-        # Drop blank lines
-        text = '\n'.join(chunk for chunk in chunks if chunk)
-        return text
+        allowed, crawl_delay = robots_cache.rules(url)
+        if not allowed:
+            print(f"Skipping {url}: disallowed by robots.txt")
+            return None
+        # Only the download holds the host's slot; parsing happens after it is released
+        with host_limiter.limit(url, crawl_delay):
+            with get_session().get(url, headers=headers, timeout=10, stream=True) as response:
+                if response.status_code == 304:
+                    # Servers may omit the validators on a 304; the stored ones still apply
+                    return FetchResult(None, True, response.headers.get("ETag", etag),
+                                       response.headers.get("Last-Modified", last_modified), None)
+                response.raise_for_status()  # Raise an HTTPError for bad responses (4xx or 5xx)
+                body = read_body(response, MAX_BODY_BYTES)
+                if body is None:
+                    print(f"Skipping {url}: page is larger than {MAX_BODY_BYTES} bytes")
+                    return None
+        # Without a declared charset, let the parser detect it (e.g. from a <meta> tag)
+        charset = response.encoding if "charset" in response.headers.get("Content-Type", "").lower() else None
+        return FetchResult(extract_text(body, charset), False, response.headers.get("ETag"),
+                           response.headers.get("Last-Modified"), len(body))
     except requests.exceptions.RequestException as e:
         print(f"Error fetching {url}: {e}")
         return None
 
+def fetch_website_content(url):
+    """Fetches content from a given URL."""
+    result = fetch_website(url)
+    return result.content if result else None
+
 def fetch_document_content(file_path):
     """Fetches content from a local document (e.g., .txt, .md)."""
     if not os.path.exists(file_path):
@@ -37,12 +324,17 @@ def fetch_document_content(file_path):
         print(f"Error reading document {file_path}: {e}")
         return None
 
-def fetch_content(source_url, source_type):
-    """Fetches content based on source type."""
+def fetch_content(source_url, source_type, etag=None, last_modified=None):
+    """Fetches content based on source type.
+
+    Websites are fetched conditionally on the etag / last_modified validators
+    of the previous fetch. Returns a FetchResult, or None on error.
+    """
     if source_type == 'website':
-        return fetch_website_content(source_url)
+        return fetch_website(source_url, etag, last_modified)
     elif source_type == 'document':
-        return fetch_document_content(source_url)
+        content = fetch_document_content(source_url)
+        return FetchResult(content, False, None, None, len(content.encode('utf-8'))) if content is not None else None
     else:
         print(f"Unsupported source type: {source_type}")
         return None
@@ -50,7 +342,7 @@ def fetch_content(source_url, source_type):
 if __name__ == '__main__':
     # Example usage
     print("Fetching website content...")
-    website_content = fetch_content("https://www.google.com", "website")
+    website_content = fetch_website_content("https://www.google.com")
     if website_content:
         print(f"Content length: {len(website_content)} characters")
         print(website_content[:500]) # Print first 500 characters
@@ -62,7 +354,7 @@ if __name__ == '__main__':
     with open(dummy_doc_path, "w", encoding="utf-8") as f:
         f.write("This is a test document for the AI NewsBot. It contains some sample text to be read.")
 
-    document_content = fetch_content(dummy_doc_path, "document")
+    document_content = fetch_document_content(dummy_doc_path)
     if document_content:
         print(f"Content length: {len(document_content)} characters")
         print(document_content)
@@ -1,6 +1,6 @@
 
 import os
-from sqlalchemy import create_engine, Column, String, Text, DateTime, Boolean
+from sqlalchemy import create_engine, inspect, text, Column, String, Text, DateTime, Boolean, Integer
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from datetime import datetime
@@ -18,6 +18,12 @@ class Source(Base):
     last_checked = Column(DateTime, default=datetime.now)
     last_hash = Column(String)
     is_active = Column(Boolean, default=True)
+    # Validators of the last fetched page, sent back as If-None-Match / If-Modified-Since
+    etag = Column(String)
+    last_modified = Column(String)
+    content_length = Column(Integer) # Bytes of the last downloaded page
+    fetch_count = Column(Integer, default=0) # Successful fetches
+    not_modified_count = Column(Integer, default=0) # Fetches answered 304 Not Modified
 
     def __repr__(self):
         return f"<Source(url='{self.url}', type='{self.source_type}')>"
@@ -36,11 +42,35 @@ class GeneratedPost(Base):
     def __repr__(self):
         return f"<GeneratedPost(platform='{self.platform}', status='{self.status}')>"
 
+# Columns added to existing tables since they were first created, with their
+# SQL types; create_all() only creates missing tables, not missing columns
+ADDED_COLUMNS = {
+    'sources': {
+        'etag': 'VARCHAR',
+        'last_modified': 'VARCHAR',
+        'content_length': 'INTEGER',
+        'fetch_count': 'INTEGER DEFAULT 0',
+        'not_modified_count': 'INTEGER DEFAULT 0',
+    },
+}
+
+def migrate_db(engine):
+    """Adds columns missing from tables created by an older version."""
+    inspector = inspect(engine)
+    with engine.begin() as connection:
+        for table, columns in ADDED_COLUMNS.items():
+            existing = {column['name'] for column in inspector.get_columns(table)}
+            for name, sql_type in columns.items():
+                if name not in existing:
+                    connection.execute(text(f'ALTER TABLE {table} ADD COLUMN {name} {sql_type}'))
+                    print(f"Added column {table}.{name}")
+
 def init_db(db_path='aladdin-sandbox/apps/ai_newsbot/data/newsbot.db'):
     # Ensure the directory exists
     os.makedirs(os.path.dirname(db_path), exist_ok=True)
     engine = create_engine(f'sqlite:///{db_path}')
     Base.metadata.create_all(engine)
+    migrate_db(engine)
     Session = sessionmaker(bind=engine)
     return Session
 
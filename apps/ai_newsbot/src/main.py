@@ -1,12 +1,14 @@
 
 import time
 import os
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from datetime import datetime
 from dotenv import load_dotenv
 import json
 
 from database import init_db, Source, GeneratedPost
-from crawler import fetch_content
+from crawler import HostQueue, fetch_content
 from change_detector import detect_change, calculate_sha256
 from summarizer_generator import SummarizerGenerator
 from publisher import save_post_locally
@@ -20,71 +22,147 @@ load_dotenv()
 DB_PATH = os.getenv("DB_PATH", "aladdin-sandbox/apps/ai_newsbot/data/newsbot.db")
 MONITORING_INTERVAL_SECONDS = int(os.getenv("MONITORING_INTERVAL_SECONDS", 3600)) # Default to 1 hour
 USE_MOCK_AI = os.getenv("USE_MOCK_AI", "True").lower() == "true"
+# Sources checked at the same time (each mostly waits on its fetch and LLM call);
+# requests to any one host are further capped by MAX_REQUESTS_PER_HOST in crawler.py.
+# Set to 1 to check sources one after another.
+MAX_CONCURRENT_SOURCES = int(os.getenv("MAX_CONCURRENT_SOURCES", 8))
 
-# Initialize DB Session
-Session = init_db(DB_PATH)
+# DB session factory, created on first use so that importing this module
+# does not create or migrate the database
+Session = None
 
-def process_source(source_id, source_url, source_type, last_hash):
-    """Fetches content, detects changes, generates posts, and saves them locally."""
+# What a check of a source needs to know about it, as plain values read on the
+# job thread: worker threads must not share database sessions or their objects
+DueSource = namedtuple("DueSource", ["id", "url", "source_type", "last_hash", "etag", "last_modified",
+                                     "content_length"])
+
+def open_session():
+    """Opens a database session, initializing the database at DB_PATH on first use."""
+    global Session
+    if Session is None:
+        Session = init_db(DB_PATH)
+    return Session()
+
+def fetch_source(source_url, source_type, etag=None, last_modified=None):
+    """Fetches a source's content.
+
+    Websites are fetched conditionally on the validators (etag, last_modified)
+    of the previous fetch. Returns a FetchResult, or None on error.
+    """
     print(f"🔍 Checking {source_url} ...")
-    current_content = fetch_content(source_url, source_type)
-
-    if current_content:
-        changed, new_hash = detect_change(current_content, last_hash)
-
-        if changed:
-            print(f"🆕 Change detected for {source_url} → Generating posts...")
-            generator = SummarizerGenerator(use_mock=USE_MOCK_AI)
-            generated_posts = generator.generate_posts(current_content, source_url)
-
-            if generated_posts:
-                session = Session()
-                try:
-                    for platform, post_content in generated_posts.items():
-                        generated_at = datetime.now()
-                        metadata = {"source_id": source_id, "source_url": source_url, "ai_model": generator.model}
-                        file_path = save_post_locally(
-                            platform=platform,
-                            post_content=post_content,
-                            source_id=source_id,
-                            generated_at=generated_at,
-                            metadata_json=json.dumps(metadata)
-                        )
-                        if file_path:
-                            new_post = GeneratedPost(
-                                id=f"{source_id}_{platform}_{generated_at.strftime("%Y%m%d%H%M%S")}",
-                                source_id=source_id,
-                                platform=platform,
-                                content=post_content,
-                                metadata_json=json.dumps(metadata),
-                                generated_at=generated_at,
-                                status=\'pending_review\'
-                            )
-                            session.add(new_post)
-                    
-                    # Update source with new hash and last checked time
-                    source = session.query(Source).filter_by(id=source_id).first()
-                    if source:
-                        source.last_hash = new_hash
-                        source.last_checked = datetime.now()
-                    session.commit()
-                    print(f"✅ Posts saved and source updated for {source_url}")
-                except Exception as e:
-                    session.rollback()
-                    print(f"Error during post generation/saving for {source_url}: {e}")
-                finally:
-                    session.close()
-            else:
-                print(f"❌ No posts generated for {source_url}")
-        else:
-            print(f"No significant change detected for {source_url}.")
-    else:
-        print(f"Skipping {source_url} due to content fetching error.")
+    return fetch_content(source_url, source_type, etag, last_modified)
+
+def process_fetched(fetched, source):
+    """Detects changes in what fetch_source() returned for a DueSource and generates posts, saving them locally.
+
+    A 304 Not Modified ends the check before any parsing, hashing or generation.
+
+    Runs on a worker thread, so it never touches the database: it returns what
+    save_result() should commit (the fetch outcome, new hash and saved posts),
+    or None if there is nothing to record.
+    """
+    result = {"source_id": source.id, "source_url": source.url, "new_hash": None, "posts": []}
+
+    if fetched and fetched.not_modified:
+        print(f"No change for {source.url} (304 Not Modified).")
+        # content_length is the size of the page we did not download again
+        return dict(result, not_modified=True, etag=fetched.etag, last_modified=fetched.last_modified,
+                    content_length=source.content_length)
+
+    current_content = fetched.content if fetched else None
+    if not current_content:
+        print(f"Skipping {source.url} due to content fetching error.")
+        return None
+
+    result.update(not_modified=False, etag=fetched.etag, last_modified=fetched.last_modified,
+                  content_length=fetched.content_length)
+    changed, new_hash = detect_change(current_content, source.last_hash)
+    if not changed:
+        print(f"No significant change detected for {source.url}.")
+        return result
+
+    print(f"🆕 Change detected for {source.url} → Generating posts...")
+    generator = SummarizerGenerator(use_mock=USE_MOCK_AI)
+    generated_posts = generator.generate_posts(current_content, source.url)
+    if not generated_posts:
+        # Record nothing, not even the validators, so the next check fetches and retries this content
+        print(f"❌ No posts generated for {source.url}")
+        return None
+
+    posts = []
+    for platform, post_content in generated_posts.items():
+        generated_at = datetime.now()
+        metadata = {"source_id": source.id, "source_url": source.url, "ai_model": generator.model}
+        file_path = save_post_locally(
+            platform=platform,
+            post_content=post_content,
+            source_id=source.id,
+            generated_at=generated_at,
+            metadata_json=json.dumps(metadata)
+        )
+        if file_path:
+            posts.append(GeneratedPost(
+                id=f"{source.id}_{platform}_{generated_at.strftime('%Y%m%d%H%M%S')}",
+                source_id=source.id,
+                platform=platform,
+                content=post_content,
+                metadata_json=json.dumps(metadata),
+                generated_at=generated_at,
+                status='pending_review'
+            ))
+    return dict(result, new_hash=new_hash, posts=posts)
+
+def save_result(result):
+    """Commits one source's check: generated posts, new hash and fetch validators.
+
+    Called only from the job thread, so SQLite sees one writer at a time.
+    """
+    session = open_session()
+    try:
+        session.add_all(result["posts"])
+
+        # Update source with new hash, validators, fetch counts and last checked time
+        source = session.query(Source).filter_by(id=result["source_id"]).first()
+        if source:
+            if result["new_hash"]:
+                source.last_hash = result["new_hash"]
+            source.etag = result["etag"]
+            source.last_modified = result["last_modified"]
+            source.content_length = result["content_length"]
+            source.fetch_count = (source.fetch_count or 0) + 1
+            if result["not_modified"]:
+                source.not_modified_count = (source.not_modified_count or 0) + 1
+            source.last_checked = datetime.now()
+        session.commit()
+        if result["posts"]:
+            print(f"✅ Posts saved and source updated for {result['source_url']}")
+    except Exception as e:
+        session.rollback()
+        print(f"Error during post generation/saving for {result['source_url']}: {e}")
+    finally:
+        session.close()
+
+def _timed(source, step):
+    """Runs a step of checking a source (a callable taking no arguments), returning its result and how long it took."""
+    started = time.perf_counter()
+    try:
+        return step(), time.perf_counter() - started
+    except Exception as e:
+        print(f"Error processing {source.url}: {e}")
+        return None, time.perf_counter() - started
+
+def _fetch(source):
+    """The fetch step of checking a source, for _timed()."""
+    return lambda: fetch_source(source.url, source.source_type, source.etag, source.last_modified)
+
+def _process(source, fetched):
+    """The processing step of checking a source, for _timed()."""
+    return lambda: process_fetched(fetched, source)
 
 def main_job():
     """The main job executed by the scheduler."""
     print(f"\n--- Running AI_NewsBot_Aladdin job at {datetime.now()} ---")
-    session = Session()
+    session = open_session()
     try:
         sources = session.query(Source).filter_by(is_active=True).all()
         if not sources:
@@ -105,17 +183,69 @@ def main_job():
             else:
                 print("Default sample source already exists.")
 
+        due = []
         for source in sources:
             # Check if enough time has passed since last check
-            if (datetime.now() - source.last_checked).total_seconds() >= source.monitoring_frequency_seconds:
-                process_source(source.id, source.url, source.source_type, source.last_hash)
+            since_checked = (datetime.now() - source.last_checked).total_seconds()
+            frequency = float(source.monitoring_frequency_seconds)
+            if since_checked >= frequency:
+                due.append(DueSource(source.id, source.url, source.source_type, source.last_hash,
+                                     source.etag, source.last_modified, source.content_length))
             else:
-                print(f"Skipping {source.url}. Next check in {int(source.monitoring_frequency_seconds - (datetime.now() - source.last_checked).total_seconds())} seconds.")
+                print(f"Skipping {source.url}. Next check in {int(frequency - since_checked)} seconds.")
     except Exception as e:
         print(f"Error in main_job: {e}")
+        return
     finally:
         session.close()
 
+    if not due:
+        return
+    started = time.perf_counter()
+    busy = 0.0
+    fetched = not_modified = bytes_saved = 0
+    workers = max(1, min(MAX_CONCURRENT_SOURCES, len(due)))
+    # Website fetches wait in a queue per host and reach the pool only once
+    # their host can take the request, so no worker sleeps out a crawl delay
+    waiting = HostQueue()
+    running = {}  # future -> (step, source): fetches, then the processing of what they fetched
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="newsbot-source") as pool:
+        for source in due:
+            if source.source_type == 'website':
+                waiting.put(source.url, source)
+            else:
+                running[pool.submit(_timed, source, _fetch(source))] = (_fetch, source)
+        while waiting or running:
+            ready, wake_in = waiting.pop_ready()
+            for source in ready:
+                running[pool.submit(_timed, source, _fetch(source))] = (_fetch, source)
+            done, _ = wait(running, timeout=wake_in, return_when=FIRST_COMPLETED)
+            # Commit each source as soon as it finishes, on this thread
+            for future in done:
+                step, source = running.pop(future)
+                result, seconds = future.result()
+                busy += seconds
+                if step is _fetch:
+                    if source.source_type == 'website':
+                        waiting.done(source.url)
+                    running[pool.submit(_timed, source, _process(source, result))] = (_process, source)
+                    continue
+                if not result:
+                    continue
+                save_result(result)
+                fetched += 1
+                if result["not_modified"]:
+                    not_modified += 1
+                    bytes_saved += result["content_length"] or 0
+    elapsed = time.perf_counter() - started
+    # Checked one after another, the run would have taken about as long as all checks together
+    print(f"⏱️  Checked {len(due)} sources in {elapsed:.1f}s with {workers} workers "
+          f"(sequential: ~{busy:.1f}s, {busy / max(elapsed, 1e-9):.1f}x faster)")
+    if fetched:
+        # Each 304 saved a download, a parse and a hash of the page
+        print(f"📉 {not_modified}/{fetched} pages not modified ({not_modified / fetched:.0%}), "
+              f"~{bytes_saved / 1024:.0f} KB not downloaded or parsed")
+
 if __name__ == '__main__':
     print("Starting AI_NewsBot_Aladdin MVP...")
     
@@ -123,7 +253,7 @@ if __name__ == '__main__':
     os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
 
     # Initialize the database and create tables if they don't exist
-    init_db(DB_PATH)
+    Session = init_db(DB_PATH)
 
     scheduler = NewsBotScheduler()
     scheduler.add_job(main_job, 'interval', seconds=MONITORING_INTERVAL_SECONDS, id='newsbot_main_job')
@@ -9,7 +9,8 @@ def save_post_locally(platform, post_content, source_id, generated_at, metadata_
     os.makedirs(output_dir, exist_ok=True)
 
     timestamp_str = generated_at.strftime("%Y%m%d_%H%M%S")
-    filename = f"{timestamp_str}.md" # Using .md for markdown content
+    # Sources are processed concurrently, so posts from the same second must not share a name
+    filename = f"{timestamp_str}_{source_id}.md" # Using .md for markdown content
     file_path = os.path.join(output_dir, filename)
 
     try:
@@ -0,0 +1,160 @@
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+import crawler
+from crawler import HostLimiter, HostQueue, RobotsCache, fetch_website
+
+def test_host_limiter_caps_concurrent_requests_per_host():
+    limiter = HostLimiter(max_per_host=2)
+    active, peak = {}, {}
+    lock = threading.Lock()
+
+    def fetch(url):
+        host = url.split('/')[2]
+        with limiter.limit(url):
+            with lock:
+                active[host] = active.get(host, 0) + 1
+                peak[host] = max(peak.get(host, 0), active[host])
+            time.sleep(0.05)
+            with lock:
+                active[host] -= 1
+
+    urls = [f'https://{host}/page{i}' for i in range(6) for host in ('a.example', 'b.example')]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=12) as pool:
+        list(pool.map(fetch, urls))
+
+    assert peak == {'a.example': 2, 'b.example': 2}
+    # Hosts do not wait on each other: 6 requests per host, 2 at a time
+    assert time.perf_counter() - started < 0.3
+
+def test_requests_queued_for_a_slot_still_start_spaced_out():
+    limiter = HostLimiter(max_per_host=2)
+    starts = []
+
+    def fetch(hold):
+        with limiter.limit('https://a.example/page', delay=0.1):
+            starts.append(time.monotonic())
+            time.sleep(hold)
+
+    # Both slots free up at once; the two requests queued for them must not start together
+    threads = [threading.Thread(target=fetch, args=(hold,)) for hold in (0.3, 0.2, 0, 0)]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.01)
+    for thread in threads:
+        thread.join()
+
+    starts.sort()
+    assert all(later - earlier >= 0.09 for earlier, later in zip(starts, starts[1:]))
+
+def test_host_queue_hands_out_work_only_once_its_host_is_ready():
+    limiter = HostLimiter(max_per_host=2)
+    queue = HostQueue(limiter)
+    for i in range(2):
+        queue.put(f'https://slow.example/{i}', ('slow', i))
+    queue.put('https://fast.example/0', ('fast', 0))
+
+    # The first slow request has not started, so the host's next start time is not known yet
+    assert queue.pop_ready() == ([('slow', 0), ('fast', 0)], crawler.HOST_QUEUE_RECHECK_SECONDS)
+    assert queue.pop_ready() == ([], crawler.HOST_QUEUE_RECHECK_SECONDS)
+    with limiter.limit('https://slow.example/0', delay=0.2):
+        ready, wake_in = queue.pop_ready()
+        assert ready == [] and 0.15 < wake_in <= 0.2
+    queue.done('https://slow.example/0')
+
+    time.sleep(wake_in)
+    assert queue.pop_ready() == ([('slow', 1)], None)
+    assert not queue
+
+class _SiteHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'   # keep-alive
+    robots = b'User-agent: *\nDisallow: /private\nCrawl-delay: 1\n'
+    etag = '"v1"'
+    requests = []
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.requests.append((self.path, dict(self.headers), time.monotonic(), self.client_address[1]))
+        if self.path == '/robots.txt':
+            body = self.robots
+        elif self.path == '/huge':
+            body = b'<p>' + b'x' * 100_000 + b'</p>'
+        elif self.headers.get('If-None-Match') == self.etag:
+            self.send_response(304)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        else:
+            body = b'<html><script>x()</script><body><p>Hello  world</p></body></html>'
+        self.send_response(200)
+        self.send_header('ETag', self.etag)
+        self.send_header('Last-Modified', 'Wed, 14 Oct 2025 10:00:00 GMT')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+@pytest.fixture
+def site():
+    _SiteHandler.requests = []
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _SiteHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f'http://127.0.0.1:{server.server_address[1]}'
+    server.shutdown()
+    server.server_close()
+
+def _requests_to(path):
+    return [request for request in _SiteHandler.requests if request[0] == path]
+
+@pytest.fixture
+def no_crawl_delay(monkeypatch):
+    monkeypatch.setattr(_SiteHandler, 'robots', b'User-agent: *\nDisallow: /private\n')
+    monkeypatch.setattr(crawler, 'DEFAULT_CRAWL_DELAY_SECONDS', 0.0)
+
+def test_unchanged_pages_are_not_downloaded_again(site, no_crawl_delay):
+    first = fetch_website(f'{site}/news')
+    assert first.content == 'Hello\nworld' and not first.not_modified
+    assert (first.etag, first.content_length) == ('"v1"', 65)
+
+    again = fetch_website(f'{site}/news', first.etag, first.last_modified)
+    assert again.not_modified and again.content is None
+    # The server sent no validators with the 304: the ones we had still apply
+    assert (again.etag, again.last_modified) == (first.etag, first.last_modified)
+    assert _requests_to('/news')[1][1]['If-Modified-Since'] == 'Wed, 14 Oct 2025 10:00:00 GMT'
+    # robots.txt and both page requests went over one pooled connection
+    assert len({request[3] for request in _SiteHandler.requests}) == 1
+
+def test_robots_txt_is_cached_and_obeyed(site, monkeypatch):
+    monkeypatch.setattr(crawler, 'robots_cache', RobotsCache(ttl=60))
+    assert fetch_website(f'{site}/private/page') is None
+    pages = [fetch_website(f'{site}/news?page={i}') for i in range(2)]
+    assert all(page.content == 'Hello\nworld' for page in pages)
+    assert len(_requests_to('/robots.txt')) == 1
+    assert not any(path.startswith('/private') for path, *_ in _SiteHandler.requests)
+    assert all(headers['User-Agent'] == crawler.USER_AGENT for _, headers, *_ in _SiteHandler.requests)
+
+    # Requests to the site start at least its Crawl-delay apart
+    starts = [started for path, _, started, _ in _SiteHandler.requests if path.startswith('/news')]
+    assert starts[1] - starts[0] >= 0.99
+
+    # Expired policies are fetched again
+    robots = RobotsCache(ttl=0)
+    robots.rules(f'{site}/news')
+    assert robots.rules(f'{site}/news') == (True, 1.0)
+    assert len(_requests_to('/robots.txt')) == 3
+
+def test_oversized_pages_are_skipped(site, no_crawl_delay, monkeypatch):
+    monkeypatch.setattr(crawler, 'MAX_BODY_BYTES', 50_000)
+    assert fetch_website(f'{site}/huge') is None
+    monkeypatch.setattr(crawler, 'MAX_BODY_BYTES', 200_000)
+    assert len(fetch_website(f'{site}/huge').content) == 100_000
@@ -0,0 +1,27 @@
+import os
+import sqlite3
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from database import init_db, Source
+
+def test_init_db_adds_new_columns_to_an_existing_database(tmp_path):
+    db_path = str(tmp_path / 'newsbot.db')
+    connection = sqlite3.connect(db_path)
+    # The sources table as the first release created it
+    connection.execute('CREATE TABLE sources (id VARCHAR NOT NULL, url VARCHAR NOT NULL, source_type VARCHAR NOT NULL, '
+                       'monitoring_frequency_seconds VARCHAR, last_checked DATETIME, last_hash VARCHAR, '
+                       'is_active BOOLEAN, PRIMARY KEY (id), UNIQUE (url))')
+    connection.execute("INSERT INTO sources VALUES ('s1', 'https://example.com', 'website', '3600', NULL, 'abc', 1)")
+    connection.commit()
+    connection.close()
+
+    Session = init_db(db_path)
+    init_db(db_path)   # Already migrated: nothing to add
+    session = Session()
+    source = session.query(Source).one()
+    assert (source.last_hash, source.etag, source.not_modified_count) == ('abc', None, 0)
+    source.etag = '"v1"'
+    session.commit()
+    session.close()
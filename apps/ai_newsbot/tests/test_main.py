@@ -0,0 +1,169 @@
+import os
+import re
+import sys
+import threading
+import time
+import types
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+try:
+    import openai  # noqa: F401
+except ImportError:
+    # Only the real generator talks to OpenAI; these tests use its mock mode
+    sys.modules['openai'] = types.SimpleNamespace(OpenAI=None)
+
+import crawler
+import main
+from crawler import HostLimiter, RobotsCache
+from database import GeneratedPost, Source
+
+class _NewsHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'   # keep-alive
+    robots = b'User-agent: *\n'
+    latency = 0.05
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        if self.path == '/robots.txt':
+            body = self.robots
+        else:
+            started = time.monotonic()
+            time.sleep(self.latency)
+            self.requests.append((self.path, started, time.monotonic()))
+            etag = f'"{self.path}-v1"'
+            if self.headers.get('If-None-Match') == etag:
+                self.send_response(304)
+                self.send_header('ETag', etag)
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+            body = f'<html><body><p>News on {self.path}</p></body></html>'.encode()
+        self.send_response(200)
+        if self.path != '/robots.txt':
+            self.send_header('ETag', f'"{self.path}-v1"')
+            self.send_header('Last-Modified', 'Wed, 14 Oct 2025 10:00:00 GMT')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+@pytest.fixture
+def sites():
+    """Starts local news sites; each call takes its robots.txt and returns (base URL, requests served)."""
+    servers = []
+
+    def start(robots=_NewsHandler.robots):
+        handler = type('Handler', (_NewsHandler,), {'robots': robots, 'requests': []})
+        server = ThreadingHTTPServer(('127.0.0.1', 0), handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f'http://127.0.0.1:{server.server_address[1]}', handler.requests
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+@pytest.fixture
+def newsbot(monkeypatch, tmp_path):
+    """Points main at a fresh database and records where posts are saved and results committed."""
+    monkeypatch.setattr(main, 'DB_PATH', str(tmp_path / 'data' / 'newsbot.db'))
+    monkeypatch.setattr(main, 'Session', None)
+    monkeypatch.setattr(main, 'USE_MOCK_AI', True)
+    monkeypatch.setattr(crawler, 'DEFAULT_CRAWL_DELAY_SECONDS', 0.0)
+    monkeypatch.setattr(crawler, 'host_limiter', HostLimiter(2))
+    monkeypatch.setattr(crawler, 'robots_cache', RobotsCache(ttl=60))
+
+    calls = types.SimpleNamespace(saved_posts=[], committed=[])
+
+    def save_post_locally(platform, post_content, source_id, generated_at, metadata_json=None):
+        calls.saved_posts.append((source_id, platform, threading.current_thread().name))
+        return str(tmp_path / f'{source_id}_{platform}.md')
+
+    save_result = main.save_result
+
+    def recording_save_result(result):
+        calls.committed.append((result['source_id'], threading.current_thread().name))
+        save_result(result)
+
+    monkeypatch.setattr(main, 'save_post_locally', save_post_locally)
+    monkeypatch.setattr(main, 'save_result', recording_save_result)
+    return calls
+
+def _add_sources(urls):
+    session = main.open_session()
+    session.add_all(Source(id=f'source{i}', url=url, source_type='website', monitoring_frequency_seconds='0',
+                           last_checked=datetime(2000, 1, 1))
+                    for i, url in enumerate(urls))
+    session.commit()
+    session.close()
+
+def test_main_job_processes_on_workers_and_commits_on_the_job_thread(newsbot, sites, monkeypatch, capsys):
+    # Requests to the slow site must start 0.3s apart (robots.txt only takes whole seconds)
+    monkeypatch.setattr(crawler, 'DEFAULT_CRAWL_DELAY_SECONDS', 0.3)
+    slow, slow_requests = sites()
+    fast, fast_requests = sites(robots=b'User-agent: *\nCrawl-delay: 0\n')
+    assert not os.path.exists(main.DB_PATH)   # Importing main created no database
+    _add_sources([f'{slow}/a', f'{slow}/b', f'{slow}/c', f'{fast}/a', f'{fast}/b'])
+
+    main.main_job()
+
+    # Every source was fetched once, processed on a worker and committed on the job thread
+    assert len(slow_requests) == 3 and len(fast_requests) == 2
+    assert {source_id for source_id, _, _ in newsbot.saved_posts} == {f'source{i}' for i in range(5)}
+    assert all(thread.startswith('newsbot-source') for _, _, thread in newsbot.saved_posts)
+    assert sorted(source_id for source_id, _ in newsbot.committed) == [f'source{i}' for i in range(5)]
+    assert {thread for _, thread in newsbot.committed} == {threading.current_thread().name}
+    session = main.open_session()
+    assert session.query(GeneratedPost).count() == 15
+    assert {source.fetch_count for source in session.query(Source)} == {1}
+    session.close()
+
+    # The slow site's requests start spaced out, while the fast site is not held up behind them
+    starts = sorted(started for _, started, _ in slow_requests)
+    assert all(later - earlier >= 0.29 for earlier, later in zip(starts, starts[1:]))
+    assert max(finished for _, _, finished in fast_requests) < starts[1]
+
+    # Queued fetches wait for their host outside the pool, so the checks
+    # themselves take less time than the run: no worker slept out the delay
+    report = re.search(r'Checked 5 sources in ([\d.]+)s with 5 workers \(sequential: ~([\d.]+)s',
+                       capsys.readouterr().out)
+    assert report
+    elapsed, busy = map(float, report.groups())
+    assert elapsed >= 0.6 and busy < elapsed
+
+def test_unchanged_pages_are_neither_processed_nor_published_again(newsbot, sites, monkeypatch, capsys):
+    site, requests = sites()
+    _add_sources([f'{site}/news'])
+    detected = []
+    detect_change = main.detect_change
+    monkeypatch.setattr(main, 'detect_change', lambda *args: detected.append(args) or detect_change(*args))
+
+    def source_state():
+        session = main.open_session()
+        source = session.query(Source).one()
+        state = (source.fetch_count, source.not_modified_count, source.etag, source.last_modified,
+                 source.content_length, source.last_hash)
+        posts = session.query(GeneratedPost).count()
+        session.close()
+        return state, posts
+
+    main.main_job()
+    (fetches, not_modified, etag, last_modified, content_length, last_hash), posts = source_state()
+    assert (fetches, not_modified, etag, last_modified) == (1, 0, '"/news-v1"', 'Wed, 14 Oct 2025 10:00:00 GMT')
+    assert content_length > 0 and last_hash and posts == 3
+    assert len(detected) == 1 and len(newsbot.saved_posts) == 3
+    capsys.readouterr()
+
+    # The second run sends the stored validators and gets a 304
+    main.main_job()
+    assert len(requests) == 2
+    assert source_state() == ((2, 1, etag, last_modified, content_length, last_hash), 3)
+    assert len(detected) == 1 and len(newsbot.saved_posts) == 3
+    assert '1/1 pages not modified (100%)' in capsys.readouterr().out
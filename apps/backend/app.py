@@ -6,17 +6,57 @@ This is the main application file for the RenovAI Canada backend API.
 It provides endpoints for renovation cost estimation and lead collection.
 """
 
-from fastapi import FastAPI, Request
+import time
+
+_IMPORT_START = time.perf_counter()
+
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
+from starlette.concurrency import run_in_threadpool
 import os
 import sys
 from datetime import datetime
 
-# Add routes to path
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+# Make the backend modules and the shared integrations package importable;
+# this is the only place the import path is adjusted
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+for _path in (BACKEND_DIR, os.path.dirname(BACKEND_DIR)):
+    if _path not in sys.path:
+        sys.path.append(_path)
+
 from routes.estimate import router as estimate_router
-from routes.collect_lead import router as lead_router
+from routes.collect_lead import router as lead_router, get_airtable_client, close_airtable_client
+from integrations.airtable_client import AirtableClient
+from routes.quote import router as quote_router
+from routes.catalog import catalog
+from data.db_helper import ping_database
+from data import async_db
+from metrics import REGISTRY, Counter, Gauge, MetricsMiddleware, dependency_report, start_sharing, stop_sharing
+from routes.estimate import estimate_cache
+import startup
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Warm the pricing data and initialize integrations before serving traffic.
+
+    Workers forked by serve.py inherit the snapshot preloaded by the master
+    process and keep sharing it as long as the database file is unchanged.
+    """
+    await startup.warm_up({"airtable": get_airtable_client})
+    # Deliver leads still queued from before a restart without waiting for a new one
+    get_airtable_client().start_sync()
+    # Under serve.py, let whichever worker is scraped report this one's metrics too
+    start_sharing()
+    try:
+        yield
+    finally:
+        startup.state.mark_stopping()
+        stop_sharing()
+        async_db.shutdown()
+        close_airtable_client()
 
 # Initialize FastAPI application
 app = FastAPI(
@@ -24,7 +64,8 @@ app = FastAPI(
     description="Smart Renovation Cost & Timeline Estimator for Greater Vancouver Area",
     version="1.0.0 (MVP)",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    lifespan=lifespan
 )
 
 # Configure CORS for Custom GPT integration
@@ -36,13 +77,16 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Record per-route latency, status codes and in-flight requests
+app.add_middleware(MetricsMiddleware)
+
 # Include routers
 app.include_router(estimate_router, prefix="/api", tags=["Estimation"])
 app.include_router(lead_router, prefix="/api", tags=["Lead Collection"])
+app.include_router(quote_router, prefix="/api", tags=["Quotes"])
 
-@app.get("/")
-async def root():
-    """Root endpoint with API information."""
+def _root_document(snapshot, pricing_updated_at):
+    """Catalog payload for the root endpoint."""
     return {
         "service": "RenovAI Canada API",
         "version": "1.0.0 (MVP)",
@@ -51,31 +95,92 @@ async def root():
         "status": "operational",
         "endpoints": {
             "estimation": "/api/estimate",
+            "quote": "/api/quote",
             "lead_collection": "/api/collect-lead",
+            "leads": "/api/leads",
+            "lead_status": "/api/leads/{record_id}/status",
+            "leads_export": "/api/leads/export",
             "health_check": "/health",
             "documentation": "/docs"
         },
         "target_area": "Greater Vancouver Area",
-        "timestamp": datetime.now().isoformat()
+        "pricing_updated_at": pricing_updated_at
     }
 
+@app.get("/")
+async def root(request: Request):
+    """Root endpoint with API information."""
+    return await catalog.response(request, "root")
+
 @app.get("/health")
-async def health_check():
-    """Health check endpoint for monitoring."""
+async def health_check(airtable_client: AirtableClient = Depends(get_airtable_client)):
+    """
+    Health check endpoint for monitoring, with measured dependency latency
+    and the Airtable integration's mode, outbox backlog and replica freshness.
+
+    Responds 503 until start-up warm-up has finished (and again while
+    shutting down) so load balancers only route traffic to warm processes.
+    """
+    if not startup.state.ready:
+        return JSONResponse(
+            status_code=503,
+            content={
+                "status": startup.state.status,
+                "service": "RenovAI Canada API",
+                "timestamp": datetime.now().isoformat(),
+                "startup": startup.state.report()
+            }
+        )
+
+    try:
+        latency_ms = await async_db.run_db(ping_database)
+        database = {"status": "connected", "latency_ms": latency_ms}
+    except Exception as e:
+        database = {"status": "error", "error": str(e)}
+    database["operations"] = dependency_report("sqlite")
+
+    try:
+        # Reads the outbox and replica state files; keep them off the event loop
+        airtable = await run_in_threadpool(airtable_client.status)
+    except Exception as e:
+        airtable = {"status": "error", "error": str(e)}
+    airtable["operations"] = dependency_report("airtable")
+    
     return {
-        "status": "healthy",
+        "status": "healthy" if database["status"] == "connected" else "degraded",
         "service": "RenovAI Canada API",
         "timestamp": datetime.now().isoformat(),
-        "database": "connected",
+        "startup": startup.state.report(),
+        "database": database,
         "integrations": {
-            "airtable": "mock mode (MVP)",
+            "airtable": airtable,
             "calendly": "configured"
         }
     }
 
-@app.get("/api/info")
-async def api_info():
-    """Detailed API information for Custom GPT integration."""
+ESTIMATE_CACHE_EVENTS = {
+    name: REGISTRY.register(Counter(f'renovai_estimate_cache_{name}_total', f'Estimate response cache {name}.'))
+    for name in ('hits', 'misses', 'evictions')
+}
+ESTIMATE_CACHE_ENTRIES = REGISTRY.register(Gauge(
+    'renovai_estimate_cache_entries', 'Estimate responses currently cached.'))
+
+def _estimate_cache_metrics():
+    """Copy the estimate response cache counters into the Prometheus metrics."""
+    stats = estimate_cache.stats()
+    for name, counter in ESTIMATE_CACHE_EVENTS.items():
+        counter.set_total(stats[name])
+    ESTIMATE_CACHE_ENTRIES.set(stats['size'])
+
+REGISTRY.register_collector(_estimate_cache_metrics)
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics for requests, dependencies and caches."""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+def _info_document(snapshot, pricing_updated_at):
+    """Catalog payload for /api/info."""
     return {
         "api_name": "RenovAI Canada",
         "purpose": "Renovation cost and timeline estimation",
@@ -94,13 +199,23 @@ async def api_info():
         "features": [
             "Cost estimation based on project type, size, and finish level",
             "Timeline estimation in weeks",
+            "Multi-room project quotes with a combined trade timeline",
             "Material and finish recommendations",
             "Lead collection and storage",
             "Consultation booking integration"
         ],
-        "location": "Greater Vancouver Area, BC, Canada"
+        "location": "Greater Vancouver Area, BC, Canada",
+        "pricing_version": snapshot.version
     }
 
+@app.get("/api/info")
+async def api_info(request: Request):
+    """Detailed API information for Custom GPT integration."""
+    return await catalog.response(request, "info")
+
+catalog.register("root", _root_document)
+catalog.register("info", _info_document)
+
 @app.exception_handler(Exception)
 async def global_exception_handler(request: Request, exc: Exception):
     """Global exception handler for better error responses."""
@@ -113,6 +228,9 @@ async def global_exception_handler(request: Request, exc: Exception):
         }
     )
 
+# Time spent importing the application; warm-up time is added by the lifespan
+startup.state.record("import", time.perf_counter() - _IMPORT_START)
+
 if __name__ == "__main__":
     import uvicorn
     
@@ -137,11 +255,16 @@ if __name__ == "__main__":
     🏥 Health Check: http://0.0.0.0:{port}/health
     """)
     
-    uvicorn.run(
-        "app:app",
-        host="0.0.0.0",
-        port=port,
-        reload=True,
-        log_level="info"
-    )
+    if os.getenv("APP_ENV", "development") == "production":
+        # Pre-forked workers sharing preloaded pricing data (see serve.py)
+        import serve
+        serve.main(["--port", str(port)], application=app)
+    else:
+        uvicorn.run(
+            "app:app",
+            host="0.0.0.0",
+            port=port,
+            reload=True,
+            log_level="info"
+        )
 
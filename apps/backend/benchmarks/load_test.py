@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+RenovAI Canada - API Load Test and Latency Benchmark
+Copyright (c) 2025 Saeed Alaediny. All rights reserved.
+
+Drives the backend API with a fixed number of concurrent clients and reports
+throughput and p50/p95/p99 latency per endpoint. By default the ASGI app is
+exercised in-process (no network, no server); --uvicorn starts a real server
+subprocess (--production uses the pre-forking serve.py launcher instead of
+plain uvicorn) and --url targets one that is already running.
+
+Results can be saved as a baseline and later runs compared against it; the
+run fails (exit code 1) when any scenario regresses past the threshold.
+
+Usage:
+    python benchmarks/load_test.py --concurrency 32 --requests 2000
+    python benchmarks/load_test.py --save-baseline benchmarks/baseline.json
+    python benchmarks/load_test.py --baseline benchmarks/baseline.json --max-regression 0.25
+    python benchmarks/load_test.py --uvicorn --scenarios estimate,project_types
+    python benchmarks/load_test.py --uvicorn --production --workers 4
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROJECT_TYPES = ['kitchen', 'bathroom', 'basement', 'full_home', 'addition']
+FINISH_LEVELS = ['basic', 'standard', 'premium']
+
+class Scenario:
+    """A single endpoint to benchmark and how to build each request."""
+
+    def __init__(self, name: str, method: str, path: str,
+                 payload: Optional[Callable[[int], Dict]] = None,
+                 expected_status: int = 200):
+        self.name = name
+        self.method = method
+        self.path = path
+        self.payload = payload
+        self.expected_status = expected_status
+
+def _estimate_payload(i: int) -> Dict:
+    # Cycle through a small set of combinations, like real GPT agent traffic
+    return {
+        'project_type': PROJECT_TYPES[i % len(PROJECT_TYPES)],
+        'finish_level': FINISH_LEVELS[i % len(FINISH_LEVELS)],
+        'size_sqft': 100 + (i % 20) * 50,
+        'postal_code': 'V6B 1A1'
+    }
+
+def _lead_payload(i: int) -> Dict:
+    return {
+        'name': f'Load Test {i}',
+        'email': f'load.test.{i}@example.com',
+        'phone': '604-555-0123',
+        'project_type': PROJECT_TYPES[i % len(PROJECT_TYPES)],
+        'size_sqft': 250,
+        'finish_level': 'standard',
+        'postal_code': 'V6B 1A1'
+    }
+
+def _quote_payload(i: int) -> Dict:
+    # 1 to 12 line items, so latency can be compared across quote sizes
+    return {
+        'postal_code': 'V6B 1A1',
+        'items': [_estimate_payload(i + n) for n in range(1 + i % 12)]
+    }
+
+SCENARIOS = {
+    scenario.name: scenario for scenario in [
+        Scenario('estimate', 'POST', '/api/estimate', _estimate_payload),
+        Scenario('quote', 'POST', '/api/quote', _quote_payload),
+        Scenario('collect_lead', 'POST', '/api/collect-lead', _lead_payload),
+        Scenario('leads_count', 'GET', '/api/leads/count'),
+        Scenario('project_types', 'GET', '/api/project-types'),
+        Scenario('finish_levels', 'GET', '/api/finish-levels'),
+        Scenario('info', 'GET', '/api/info'),
+        Scenario('root', 'GET', '/'),
+    ]
+}
+
+def percentile(values: List[float], percent: float) -> float:
+    """Return the nearest-rank percentile of a list of values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, math.ceil(percent / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+async def run_scenario(client: httpx.AsyncClient, scenario: Scenario,
+                       concurrency: int, total_requests: int) -> Dict:
+    """
+    Run one scenario with `concurrency` closed-loop clients.
+
+    Args:
+        client: HTTP client bound to the app or server under test
+        scenario: Scenario to run
+        concurrency: Number of concurrent clients
+        total_requests: Total requests across all clients
+
+    Returns:
+        Dictionary with request count, errors, throughput and latency percentiles
+    """
+    counter = itertools.count()
+    latencies: List[float] = []
+    errors = 0
+
+    async def worker():
+        nonlocal errors
+        while True:
+            i = next(counter)
+            if i >= total_requests:
+                return
+            kwargs = {'json': scenario.payload(i)} if scenario.payload else {}
+            start = time.perf_counter()
+            try:
+                response = await client.request(scenario.method, scenario.path, **kwargs)
+                if response.status_code != scenario.expected_status:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'concurrency': concurrency,
+        'throughput_rps': round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3)
+    }
+
+async def run_benchmark(client: httpx.AsyncClient, scenario_names: List[str],
+                        concurrency: int, total_requests: int, warmup: int = 20) -> Dict[str, Dict]:
+    """Warm up and run each named scenario in turn."""
+    results = {}
+    for name in scenario_names:
+        scenario = SCENARIOS[name]
+        if warmup:
+            await run_scenario(client, scenario, min(concurrency, warmup), warmup)
+        results[name] = await run_scenario(client, scenario, concurrency, total_requests)
+    return results
+
+async def benchmark_in_process(scenario_names: List[str], concurrency: int,
+                               total_requests: int, warmup: int = 20) -> Dict[str, Dict]:
+    """
+    Benchmark the ASGI app in-process through httpx's ASGI transport.
+
+    Leads are written to a throwaway mock file rather than the real one.
+    """
+    if BACKEND_DIR not in sys.path:
+        sys.path.insert(0, BACKEND_DIR)
+    from app import app
+    from integrations.airtable_client import AirtableClient
+    from routes import collect_lead
+
+    with tempfile.TemporaryDirectory() as tmp:
+        lead_client = AirtableClient(mock_file=os.path.join(tmp, 'bench_leads.jsonl'))
+        # The lifespan and the routes use this client; it is closed on shutdown
+        collect_lead._airtable_client = lead_client
+        try:
+            async with app.router.lifespan_context(app):
+                transport = httpx.ASGITransport(app=app)
+                async with httpx.AsyncClient(transport=transport, base_url='http://benchmark') as client:
+                    return await run_benchmark(client, scenario_names, concurrency, total_requests, warmup)
+        finally:
+            collect_lead.close_airtable_client()
+
+async def benchmark_server(base_url: str, scenario_names: List[str], concurrency: int,
+                           total_requests: int, warmup: int = 20) -> Dict[str, Dict]:
+    """Benchmark a running HTTP server."""
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        return await run_benchmark(client, scenario_names, concurrency, total_requests, warmup)
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+def start_uvicorn(workers: int = 1, startup_timeout: float = 30.0, production: bool = False):
+    """
+    Start the app under a real uvicorn server and wait until /health responds.
+
+    With production=True the server is launched through serve.py, which
+    preloads shared state before forking the workers.
+
+    Returns:
+        (process, base_url, leads_dir) tuple; the caller must terminate the process
+    """
+    port = _free_port()
+    leads_dir = tempfile.TemporaryDirectory()
+    env = dict(os.environ, AIRTABLE_MOCK_FILE=os.path.join(leads_dir.name, 'bench_leads.jsonl'))
+    launcher = ['serve.py'] if production else ['-m', 'uvicorn', 'app:app']
+    process = subprocess.Popen(
+        [sys.executable, *launcher, '--host', '127.0.0.1', '--port', str(port),
+         '--workers', str(workers), '--log-level', 'warning'],
+        cwd=BACKEND_DIR, env=env
+    )
+    base_url = f'http://127.0.0.1:{port}'
+    deadline = time.monotonic() + startup_timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f'uvicorn exited with code {process.returncode}')
+        try:
+            if httpx.get(f'{base_url}/health', timeout=1).status_code == 200:
+                return process, base_url, leads_dir
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError('uvicorn did not become healthy in time')
+
+def compare_to_baseline(results: Dict[str, Dict], baseline: Dict[str, Dict],
+                        max_regression: float) -> List[str]:
+    """
+    Compare results against a baseline.
+
+    A scenario regresses when its p95 or p99 latency grows, or its throughput
+    drops, by more than `max_regression` (a fraction, e.g. 0.2 for 20%).
+
+    Returns:
+        Human-readable descriptions of every regression found
+    """
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        for metric in ('p95_ms', 'p99_ms'):
+            if base[metric] and result[metric] > base[metric] * (1 + max_regression):
+                regressions.append(f'{name}: {metric} {result[metric]:.3f} > baseline {base[metric]:.3f} '
+                                   f'(+{(result[metric] / base[metric] - 1) * 100:.1f}%)')
+        if base['throughput_rps'] and result['throughput_rps'] < base['throughput_rps'] * (1 - max_regression):
+            regressions.append(f"{name}: throughput {result['throughput_rps']:.1f} rps < baseline "
+                               f"{base['throughput_rps']:.1f} rps "
+                               f"({(result['throughput_rps'] / base['throughput_rps'] - 1) * 100:.1f}%)")
+        if result['errors']:
+            regressions.append(f"{name}: {result['errors']} failed requests")
+    return regressions
+
+def save_baseline(path: str, results: Dict[str, Dict], mode: str):
+    """Write results and run metadata to a baseline file."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump({
+            'created_at': datetime.now().isoformat(),
+            'mode': mode,
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'scenarios': results
+        }, f, indent=2)
+
+def load_baseline(path: str) -> Dict[str, Dict]:
+    """Read the per-scenario results from a baseline file."""
+    with open(path) as f:
+        return json.load(f)['scenarios']
+
+def print_report(results: Dict[str, Dict]):
+    """Print a results table."""
+    print(f"\n{'scenario':15} | {'reqs':>6} | {'errors':>6} | {'rps':>9} | {'p50 ms':>8} | {'p95 ms':>8} | {'p99 ms':>8}")
+    print('-' * 80)
+    for name, r in results.items():
+        print(f"{name:15} | {r['requests']:6} | {r['errors']:6} | {r['throughput_rps']:9.1f} | "
+              f"{r['p50_ms']:8.3f} | {r['p95_ms']:8.3f} | {r['p99_ms']:8.3f}")
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='RenovAI backend load test and latency benchmark')
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS),
+                        help=f"Comma-separated scenarios (default: all of {', '.join(SCENARIOS)})")
+    parser.add_argument('--concurrency', type=int, default=16, help='Concurrent clients per scenario')
+    parser.add_argument('--requests', type=int, default=1000, help='Requests per scenario')
+    parser.add_argument('--warmup', type=int, default=20, help='Warm-up requests per scenario')
+    parser.add_argument('--uvicorn', action='store_true', help='Start a real uvicorn server instead of running in-process')
+    parser.add_argument('--workers', type=int, default=1, help='uvicorn worker processes (with --uvicorn)')
+    parser.add_argument('--production', action='store_true',
+                        help='Launch the server through serve.py (with --uvicorn)')
+    parser.add_argument('--url', help='Benchmark an already running server at this base URL')
+    parser.add_argument('--save-baseline', metavar='PATH', help='Save results as a baseline')
+    parser.add_argument('--baseline', metavar='PATH', help='Compare results against a saved baseline')
+    parser.add_argument('--max-regression', type=float, default=0.2,
+                        help='Allowed regression vs baseline as a fraction (default: 0.2)')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args(argv)
+
+    scenario_names = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = [name for name in scenario_names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"Unknown scenario(s): {', '.join(unknown)}")
+
+    if args.url:
+        mode = 'server'
+        results = asyncio.run(benchmark_server(args.url, scenario_names, args.concurrency, args.requests, args.warmup))
+    elif args.uvicorn:
+        mode = f"{'serve.py' if args.production else 'uvicorn'} x{args.workers}"
+        process, base_url, leads_dir = start_uvicorn(args.workers, production=args.production)
+        try:
+            results = asyncio.run(benchmark_server(base_url, scenario_names, args.concurrency, args.requests, args.warmup))
+        finally:
+            process.terminate()
+            process.wait(timeout=10)
+            leads_dir.cleanup()
+    else:
+        mode = 'in-process'
+        results = asyncio.run(benchmark_in_process(scenario_names, args.concurrency, args.requests, args.warmup))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f'Mode: {mode}, concurrency: {args.concurrency}, requests per scenario: {args.requests}')
+        print_report(results)
+
+    if args.save_baseline:
+        save_baseline(args.save_baseline, results, mode)
+        print(f'\nBaseline saved to {args.save_baseline}')
+
+    if args.baseline:
+        regressions = compare_to_baseline(results, load_baseline(args.baseline), args.max_regression)
+        if regressions:
+            print(f'\n❌ {len(regressions)} regression(s) beyond {args.max_regression:.0%}:')
+            for regression in regressions:
+                print(f'  - {regression}')
+            return 1
+        print(f'\n✅ No regressions beyond {args.max_regression:.0%} against {args.baseline}')
+
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
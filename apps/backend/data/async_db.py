@@ -0,0 +1,113 @@
+"""
+RenovAI Canada - Async Database Access
+Copyright (c) 2025 Saeed Alaediny. All rights reserved.
+
+Async wrappers around db_helper for use in FastAPI route handlers.
+
+Pricing lookups are answered straight from the in-memory snapshot whenever it
+is fresh. Anything that has to touch SQLite (freshness checks and reloads) is
+offloaded to a small dedicated thread pool, sized to match the read
+connection pool, so a slow disk never stalls the event loop.
+"""
+
+import asyncio
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Dict, List, Optional, Sequence, TypeVar
+
+from data import db_helper, quote
+
+T = TypeVar('T')
+
+# Threads dedicated to blocking database work; sized to the read pool so
+# each thread can always get a connection without waiting. Created lazily so
+# the pool can be restarted after shutdown().
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    executor = _executor
+    if executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=db_helper.READ_POOL_SIZE,
+                                               thread_name_prefix='pricing-db')
+            executor = _executor
+    return executor
+
+async def run_db(func: Callable[..., T], *args, **kwargs) -> T:
+    """
+    Run a blocking database function on the database thread pool.
+
+    Args:
+        func: Blocking callable to run
+        *args: Positional arguments for func
+        **kwargs: Keyword arguments for func
+
+    Returns:
+        Whatever func returns
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), partial(func, *args, **kwargs))
+
+async def get_pricing_snapshot_async() -> db_helper.PricingSnapshot:
+    """
+    Return the current pricing snapshot without blocking the event loop.
+
+    Returns:
+        The current PricingSnapshot
+    """
+    snapshot = db_helper.peek_pricing_snapshot()
+    if snapshot is not None:
+        return snapshot
+    return await run_db(db_helper.get_pricing_snapshot)
+
+async def calculate_estimate_async(project_type: str, finish_level: str, size_sqft: float,
+                                   postal_code: Optional[str] = None) -> Optional[Dict]:
+    """Async version of db_helper.calculate_estimate."""
+    snapshot = await get_pricing_snapshot_async()
+    return db_helper.calculate_estimate(project_type, finish_level, size_sqft, postal_code, snapshot=snapshot)
+
+async def calculate_estimates_async(project_types: Sequence[str], finish_levels: Sequence[str],
+                                    sizes_sqft: Sequence[float],
+                                    postal_codes: Optional[Sequence[Optional[str]]] = None) -> List[Optional[Dict]]:
+    """Async version of db_helper.calculate_estimates."""
+    snapshot = await get_pricing_snapshot_async()
+    return db_helper.calculate_estimates(project_types, finish_levels, sizes_sqft, postal_codes, snapshot=snapshot)
+
+async def calculate_quote_async(project_types: Sequence[str], finish_levels: Sequence[str],
+                               sizes_sqft: Sequence[float], quantities: Sequence[int],
+                               postal_codes: Optional[Sequence[Optional[str]]] = None) -> Dict:
+    """Async version of quote.calculate_quote."""
+    snapshot = await get_pricing_snapshot_async()
+    return quote.calculate_quote(project_types, finish_levels, sizes_sqft, quantities, postal_codes,
+                                 snapshot=snapshot)
+
+async def get_all_project_types_async() -> List[str]:
+    """Async version of db_helper.get_all_project_types."""
+    return list((await get_pricing_snapshot_async()).project_types)
+
+async def get_all_finish_levels_async() -> List[str]:
+    """Async version of db_helper.get_all_finish_levels."""
+    return list((await get_pricing_snapshot_async()).finish_levels)
+
+def _reset_after_fork():
+    """Drop the parent's executor in a forked child; its threads do not survive fork()."""
+    global _executor, _executor_lock
+    _executor = None
+    _executor_lock = threading.Lock()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+def shutdown():
+    """Stop the database thread pool and close pooled connections."""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=True)
+    db_helper.read_pool.close()
@@ -0,0 +1,92 @@
+"""
+RenovAI Canada - Cost and Timeline Uncertainty Model
+Copyright (c) 2025 Saeed Alaediny. All rights reserved.
+
+Monte Carlo model of how far a real project's per-sqft cost and duration
+land from the pricing table's figures.
+
+Each (project_type, finish_level) cell is simulated once when the pricing
+snapshot loads, giving P10/P50/P90 factors relative to the table's base
+figures. Because cost scales linearly with size and the regional multiplier,
+a request only multiplies its base cost by the stored factors.
+
+The model combines a lognormal spread (wider for premium finishes and
+larger projects) with a chance of hidden conditions such as rot, asbestos or
+required code upgrades, which raise cost and duration together.
+"""
+
+import os
+import zlib
+from typing import Dict, Sequence, Tuple
+
+import numpy as np
+
+# Simulated projects per pricing cell; more samples give steadier quantiles
+SIMULATION_SAMPLES = int(os.getenv('PRICING_SIMULATION_SAMPLES', '20000'))
+
+# Base seed, so the same pricing data always yields the same ranges
+SIMULATION_SEED = int(os.getenv('PRICING_SIMULATION_SEED', '2025'))
+
+PERCENTILES = (10, 50, 90)
+
+# Log-scale standard deviation of per-sqft cost by finish level
+FINISH_COST_SIGMA = {'basic': 0.08, 'standard': 0.10, 'premium': 0.14}
+
+# Log-scale standard deviation of duration, before project risk scaling
+DURATION_SIGMA = 0.12
+
+# Relative uncertainty of each project type (scales both spreads)
+PROJECT_RISK = {'kitchen': 1.0, 'bathroom': 1.0, 'basement': 1.15, 'full_home': 1.3, 'addition': 1.4}
+
+# Probability of hidden conditions by project type, and the overrun they add
+HIDDEN_CONDITION_PROBABILITY = {'kitchen': 0.15, 'bathroom': 0.20, 'basement': 0.20,
+                                'full_home': 0.30, 'addition': 0.25}
+HIDDEN_CONDITION_OVERRUN = (0.05, 0.25)
+
+Quantiles = Tuple[float, float, float]
+
+def _cell_seed(project_type: str, finish_level: str, seed: int) -> Tuple[int, int]:
+    """Stable per-cell seed, so adding a cell never changes another cell's ranges."""
+    return seed, zlib.crc32(f'{project_type}|{finish_level}'.encode('utf-8'))
+
+def simulate_quantiles(cells: Sequence[Tuple[str, str]], samples: int = SIMULATION_SAMPLES,
+                       seed: int = SIMULATION_SEED) -> Dict[Tuple[str, str], Tuple[Quantiles, Quantiles]]:
+    """
+    Simulate cost and duration factors for every pricing cell at once.
+
+    Args:
+        cells: (project_type, finish_level) pairs, lowercase
+        samples: Simulated projects per cell
+        seed: Base random seed
+
+    Returns:
+        Mapping of cell to (cost factors, duration factors), each a
+        (P10, P50, P90) tuple relative to the cell's base figures
+    """
+    if not cells:
+        return {}
+    samples = max(1, samples)
+
+    # Draws are seeded per cell; the model itself runs on (cells x samples) arrays
+    draws = np.empty((4, len(cells), samples))
+    for i, (project_type, finish_level) in enumerate(cells):
+        rng = np.random.default_rng(_cell_seed(project_type, finish_level, seed))
+        draws[0:2, i] = rng.standard_normal((2, samples))
+        draws[2:4, i] = rng.random((2, samples))
+    cost_noise, duration_noise, hidden_draw, overrun_draw = draws
+
+    risk = np.array([PROJECT_RISK.get(pt, 1.2) for pt, _ in cells])[:, None]
+    cost_sigma = np.array([FINISH_COST_SIGMA.get(fl, 0.12) for _, fl in cells])[:, None] * risk
+    hidden_probability = np.array([HIDDEN_CONDITION_PROBABILITY.get(pt, 0.2) for pt, _ in cells])[:, None]
+
+    low, high = HIDDEN_CONDITION_OVERRUN
+    overrun = np.where(hidden_draw < hidden_probability, low + (high - low) * overrun_draw, 0.0)
+    cost = np.exp(cost_sigma * cost_noise) * (1 + overrun)
+    duration = np.exp(DURATION_SIGMA * risk * duration_noise) * (1 + overrun)
+
+    cost_q = np.percentile(cost, PERCENTILES, axis=1).T
+    duration_q = np.percentile(duration, PERCENTILES, axis=1).T
+    return {
+        cell: (tuple(cost_q[i].tolist()), tuple(duration_q[i].tolist()))
+        for i, cell in enumerate(cells)
+    }
@@ -3,44 +3,389 @@ RenovAI Canada - Database Helper Module
 Copyright (c) 2025 Saeed Alaediny. All rights reserved.
 
 This module provides helper functions for accessing the pricing and timeline database.
+
+Pricing rows are served from an immutable in-process snapshot of the
+pricing_timeline table. The snapshot is loaded once at startup and swapped
+atomically whenever the database file changes on disk, so pricing updates go
+live without a restart and the estimate path never opens a connection.
 """
 
 import sqlite3
 import os
-from typing import Optional, Dict, List
+import hashlib
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from types import MappingProxyType
+from typing import Optional, Dict, Iterator, List, Mapping, Sequence, Tuple
+
+import numpy as np
+
+from data.cost_model import simulate_quantiles
+from metrics import time_dependency
 
 # Database file path
 DB_PATH = os.path.join(os.path.dirname(__file__), 'pricing_timeline.db')
 
+# Minimum number of seconds between two checks of the database file for changes
+SNAPSHOT_CHECK_INTERVAL = float(os.getenv('PRICING_SNAPSHOT_CHECK_INTERVAL', '1.0'))
+
+# Maximum number of persistent read connections kept open to the pricing database
+READ_POOL_SIZE = int(os.getenv('PRICING_DB_POOL_SIZE', '4'))
+
 def get_db_connection():
     """Create and return a database connection."""
     conn = sqlite3.connect(DB_PATH)
     conn.row_factory = sqlite3.Row  # Enable column access by name
     return conn
 
-def get_estimate_data(project_type: str, finish_level: str) -> Optional[Dict]:
+class ReadConnectionPool:
+    """
+    Bounded pool of reusable read-only connections to the pricing database.
+
+    Connections are opened lazily up to `size` and handed out one caller at a
+    time, so they can safely move between threads. When the database file is
+    replaced (as init_db.py does), connections to the old file are discarded
+    instead of being returned to the pool.
+    """
+
+    def __init__(self, db_path: str, size: int = READ_POOL_SIZE):
+        self.db_path = db_path
+        self.size = max(1, size)
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._inode = None
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(f'file:{self.db_path}?mode=ro', uri=True, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def _discard_stale(self):
+        """Drop idle connections if the database file has been replaced."""
+        try:
+            inode = os.stat(self.db_path).st_ino
+        except FileNotFoundError:
+            return
+        with self._lock:
+            if self._inode == inode:
+                return
+            self._inode = inode
+            while True:
+                try:
+                    conn = self._idle.get_nowait()
+                except queue.Empty:
+                    break
+                conn.close()
+                self._created -= 1
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a connection, blocking while all `size` connections are in use."""
+        self._discard_stale()
+        inode = self._inode
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                can_open = self._created < self.size
+                if can_open:
+                    self._created += 1
+            if can_open:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+            else:
+                conn = self._idle.get()
+
+        try:
+            yield conn
+        finally:
+            if inode == self._inode:
+                self._idle.put(conn)
+            else:
+                conn.close()
+                with self._lock:
+                    self._created -= 1
+
+    def close(self):
+        """Close every idle connection in the pool."""
+        with self._lock:
+            while True:
+                try:
+                    self._idle.get_nowait().close()
+                except queue.Empty:
+                    break
+                self._created -= 1
+
+    def _reset_after_fork(self):
+        """Forget connections inherited from the parent process without closing them."""
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._created = 0
+        self._inode = None
+
+read_pool = ReadConnectionPool(DB_PATH)
+
+# SQLite connections must not be shared across fork(); workers forked by the
+# production server open their own on first use
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=read_pool._reset_after_fork)
+
+def normalize_postal_code(postal_code: Optional[str]) -> str:
+    """Uppercase a postal code and strip spaces and hyphens ('v6b 1a1' -> 'V6B1A1')."""
+    if not postal_code:
+        return ''
+    return postal_code.upper().replace(' ', '').replace('-', '')
+
+class RegionIndex:
+    """
+    Precomputed prefix index over the regional_pricing table.
+
+    Each table row is keyed by a postal code prefix: a full FSA ('V6B'), a
+    district ('V6') or a province letter ('V'). Lookups walk from the most to
+    the least specific prefix, so an unknown FSA falls back to its district,
+    then its province, then to no adjustment at all.
+    """
+
+    __slots__ = ('prefixes', '_resolved')
+
+    # Prefix lengths tried in order: FSA, district, province
+    LEVELS = (3, 2, 1)
+
+    def __init__(self, regions: Dict[str, Tuple[str, float]]):
+        self.prefixes = MappingProxyType(dict(regions))
+        # Resolve every FSA and district that appears in the table up front so
+        # the common lookups are a single dictionary access.
+        resolved = {}
+        for prefix in regions:
+            for length in range(len(prefix), 0, -1):
+                candidate = prefix[:length]
+                if candidate not in resolved:
+                    resolved[candidate] = self._walk(candidate)
+        self._resolved = resolved
+
+    def _walk(self, postal_code: str) -> Optional[Tuple[str, float]]:
+        for length in self.LEVELS:
+            region = self.prefixes.get(postal_code[:length])
+            if region is not None:
+                return region
+        return None
+
+    def resolve(self, postal_code: Optional[str]) -> Optional[Tuple[str, float]]:
+        """
+        Find the region name and price multiplier for a postal code.
+
+        Args:
+            postal_code: Postal code in any common format
+
+        Returns:
+            (region_name, multiplier) tuple, or None if no prefix matches
+        """
+        fsa = normalize_postal_code(postal_code)[:3]
+        if not fsa:
+            return None
+        if fsa in self._resolved:
+            return self._resolved[fsa]
+        return self._walk(fsa)
+
+class PricingSnapshot:
+    """
+    Immutable view of the pricing_timeline table.
+
+    Rows are keyed by normalized (project_type, finish_level) so lookups are a
+    single dictionary access. Instances are never mutated after construction;
+    a data change produces a new snapshot that replaces the old one.
+    """
+
+    __slots__ = ('rows', 'regions', 'project_types', 'finish_levels', 'version', 'file_signature', 'loaded_at')
+
+    def __init__(self, rows: Dict[Tuple[str, str], Mapping], regions: Dict[str, Tuple[str, float]],
+                 file_signature: Tuple, loaded_at: str):
+        self.rows = MappingProxyType(rows)
+        self.regions = RegionIndex(regions)
+        self.project_types = tuple(sorted({row['project_type'] for row in rows.values()}))
+        self.finish_levels = tuple(sorted({row['finish_level'] for row in rows.values()}))
+        self.version = _compute_data_version(rows, regions)
+        self.file_signature = file_signature
+        self.loaded_at = loaded_at
+
+    def get(self, project_type: str, finish_level: str) -> Optional[Mapping]:
+        """Return the pricing row for a project type and finish level, if any."""
+        return self.rows.get((project_type.lower(), finish_level.lower()))
+
+    @property
+    def modified_at(self) -> str:
+        """When the database files this snapshot was read from were last written ('' if unknown)."""
+        mtimes = [entry[0] for entry in self.file_signature if entry is not None]
+        return datetime.fromtimestamp(max(mtimes) / 1e9).isoformat(timespec='seconds') if mtimes else ''
+
+_snapshot: Optional[PricingSnapshot] = None
+_snapshot_lock = threading.Lock()
+_last_check = 0.0
+
+def _file_signature() -> Tuple:
+    """
+    Return a cheap fingerprint of the database files on disk.
+
+    The WAL file is included because writes in WAL mode do not touch the main
+    database file until a checkpoint.
+    """
+    signature = []
+    for path in (DB_PATH, DB_PATH + '-wal'):
+        try:
+            stat = os.stat(path)
+            signature.append((stat.st_mtime_ns, stat.st_size))
+        except FileNotFoundError:
+            signature.append(None)
+    return tuple(signature)
+
+def _compute_data_version(rows: Dict[Tuple[str, str], Mapping], regions: Dict[str, Tuple[str, float]]) -> str:
+    """Hash the snapshot contents so the version only changes when the data does."""
+    digest = hashlib.sha256()
+    for key in sorted(rows):
+        row = rows[key]
+        digest.update(repr((
+            key,
+            row['cost_per_sqft'],
+            row['avg_duration_weeks'],
+            row['suggested_materials'],
+            row['description']
+        )).encode('utf-8'))
+    for prefix in sorted(regions):
+        digest.update(repr((prefix, regions[prefix])).encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+def _load_snapshot() -> PricingSnapshot:
+    """Read the whole pricing_timeline table into a new snapshot."""
+    signature = _file_signature()
+    with time_dependency('sqlite', 'load_pricing_snapshot'), read_pool.connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute('''
+            SELECT project_type, finish_level, cost_per_sqft, avg_duration_weeks,
+                   suggested_materials, description
+            FROM pricing_timeline
+        ''')
+        records = cursor.fetchall()
+        # Cost and duration percentiles are simulated once per cell here, never per request
+        quantiles = simulate_quantiles([(row['project_type'].lower(), row['finish_level'].lower())
+                                        for row in records])
+        rows = {}
+        for row in records:
+            key = (row['project_type'].lower(), row['finish_level'].lower())
+            cost_quantiles, duration_quantiles = quantiles[key]
+            rows[key] = MappingProxyType({
+                'project_type': row['project_type'],
+                'finish_level': row['finish_level'],
+                'cost_per_sqft': row['cost_per_sqft'],
+                'avg_duration_weeks': row['avg_duration_weeks'],
+                'suggested_materials': tuple(row['suggested_materials'].split(', ')) if row['suggested_materials'] else (),
+                'description': row['description'],
+                'cost_quantiles': cost_quantiles,
+                'duration_quantiles': duration_quantiles
+            })
+
+        regions = {}
+        try:
+            cursor.execute('SELECT postal_prefix, region_name, multiplier FROM regional_pricing')
+        except sqlite3.OperationalError:
+            # Databases created before regional pricing have no region table
+            pass
+        else:
+            for row in cursor.fetchall():
+                regions[normalize_postal_code(row['postal_prefix'])] = (row['region_name'], row['multiplier'])
+
+    return PricingSnapshot(rows, regions, signature, datetime.now().isoformat())
+
+def ping_database() -> float:
+    """
+    Run a trivial query through the read pool.
+
+    Returns:
+        Round-trip latency in milliseconds
+    """
+    start = time.perf_counter()
+    with time_dependency('sqlite', 'ping'), read_pool.connection() as conn:
+        conn.execute('SELECT 1').fetchone()
+    return round((time.perf_counter() - start) * 1000, 3)
+
+def reload_pricing_snapshot() -> PricingSnapshot:
+    """
+    Force a reload of the pricing snapshot from the database.
+
+    Returns:
+        The newly installed snapshot
+    """
+    global _snapshot, _last_check
+
+    with _snapshot_lock:
+        snapshot = _load_snapshot()
+        _snapshot = snapshot
+        _last_check = time.monotonic()
+    return snapshot
+
+def get_pricing_snapshot() -> PricingSnapshot:
+    """
+    Return the current pricing snapshot, reloading it if the database changed.
+
+    The database file is checked at most once every SNAPSHOT_CHECK_INTERVAL
+    seconds; between checks this is a plain attribute read.
+
+    Returns:
+        The current PricingSnapshot
+    """
+    global _snapshot, _last_check
+
+    snapshot = peek_pricing_snapshot()
+    if snapshot is not None:
+        return snapshot
+
+    signature = _file_signature()
+    snapshot = _snapshot
+    if snapshot is not None and signature == snapshot.file_signature:
+        _last_check = time.monotonic()
+        return snapshot
+
+    with _snapshot_lock:
+        snapshot = _snapshot
+        if snapshot is None or _file_signature() != snapshot.file_signature:
+            snapshot = _load_snapshot()
+            _snapshot = snapshot
+        _last_check = time.monotonic()
+    return snapshot
+
+def peek_pricing_snapshot() -> Optional[PricingSnapshot]:
+    """
+    Return the current snapshot only if it can be used without touching the disk.
+
+    Returns:
+        The current PricingSnapshot, or None if it is missing or due for a freshness check
+    """
+    snapshot = _snapshot
+    if snapshot is not None and time.monotonic() - _last_check < SNAPSHOT_CHECK_INTERVAL:
+        return snapshot
+    return None
+
+def get_estimate_data(project_type: str, finish_level: str,
+                      snapshot: Optional[PricingSnapshot] = None) -> Optional[Dict]:
     """
     Retrieve estimation data for a specific project type and finish level.
     
     Args:
         project_type: Type of renovation project (kitchen, bathroom, basement, full_home, addition)
         finish_level: Quality level (basic, standard, premium)
+        snapshot: Pricing snapshot to read from (defaults to the current one)
     
     Returns:
         Dictionary containing estimation data or None if not found
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute('''
-        SELECT project_type, finish_level, cost_per_sqft, avg_duration_weeks, 
-               suggested_materials, description
-        FROM pricing_timeline
-        WHERE LOWER(project_type) = LOWER(?) AND LOWER(finish_level) = LOWER(?)
-    ''', (project_type, finish_level))
-    
-    row = cursor.fetchone()
-    conn.close()
+    row = (snapshot or get_pricing_snapshot()).get(project_type, finish_level)
     
     if row:
         return {
@@ -48,8 +393,10 @@ def get_estimate_data(project_type: str, finish_level: str) -> Optional[Dict]:
             'finish_level': row['finish_level'],
             'cost_per_sqft': row['cost_per_sqft'],
             'avg_duration_weeks': row['avg_duration_weeks'],
-            'suggested_materials': row['suggested_materials'].split(', ') if row['suggested_materials'] else [],
-            'description': row['description']
+            'suggested_materials': list(row['suggested_materials']),
+            'description': row['description'],
+            'cost_quantiles': row['cost_quantiles'],
+            'duration_quantiles': row['duration_quantiles']
         }
     
     return None
@@ -61,15 +408,7 @@ def get_all_project_types() -> List[str]:
     Returns:
         List of unique project types
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute('SELECT DISTINCT project_type FROM pricing_timeline ORDER BY project_type')
-    
-    project_types = [row['project_type'] for row in cursor.fetchall()]
-    conn.close()
-    
-    return project_types
+    return list(get_pricing_snapshot().project_types)
 
 def get_all_finish_levels() -> List[str]:
     """
@@ -78,17 +417,11 @@ def get_all_finish_levels() -> List[str]:
     Returns:
         List of unique finish levels
     """
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    
-    cursor.execute('SELECT DISTINCT finish_level FROM pricing_timeline ORDER BY finish_level')
-    
-    finish_levels = [row['finish_level'] for row in cursor.fetchall()]
-    conn.close()
-    
-    return finish_levels
+    return list(get_pricing_snapshot().finish_levels)
 
-def calculate_estimate(project_type: str, finish_level: str, size_sqft: float) -> Optional[Dict]:
+def calculate_estimate(project_type: str, finish_level: str, size_sqft: float,
+                       postal_code: Optional[str] = None,
+                       snapshot: Optional[PricingSnapshot] = None) -> Optional[Dict]:
     """
     Calculate cost and timeline estimate for a renovation project.
     
@@ -96,17 +429,25 @@ def calculate_estimate(project_type: str, finish_level: str, size_sqft: float) -
         project_type: Type of renovation project
         finish_level: Quality level
         size_sqft: Size of the project in square feet
+        postal_code: Project postal code, used for regional price adjustment
+        snapshot: Pricing snapshot to read from (defaults to the current one)
     
     Returns:
         Dictionary containing the complete estimate or None if data not found
     """
-    data = get_estimate_data(project_type, finish_level)
+    snapshot = snapshot or get_pricing_snapshot()
+    data = get_estimate_data(project_type, finish_level, snapshot)
     
     if not data:
         return None
     
+    # Apply the regional multiplier for the project's postal code area
+    region = snapshot.regions.resolve(postal_code)
+    region_name, multiplier = region if region else (None, 1.0)
+    cost_per_sqft = round(data['cost_per_sqft'] * multiplier, 2)
+    
     # Calculate total cost
-    total_cost = data['cost_per_sqft'] * size_sqft
+    total_cost = cost_per_sqft * size_sqft
     
     # Adjust timeline based on project size (larger projects may take proportionally longer)
     base_weeks = data['avg_duration_weeks']
@@ -116,20 +457,121 @@ def calculate_estimate(project_type: str, finish_level: str, size_sqft: float) -
         size_factor = 1 + ((size_sqft - 1000) / 5000)  # Add time for large projects
         adjusted_weeks = int(base_weeks * size_factor)
     else:
+        size_factor = 1.0
         adjusted_weeks = base_weeks
     
+    # Scale the cell's precomputed P10/P50/P90 factors to this project
+    cost_p10, cost_p50, cost_p90 = (total_cost * factor for factor in data['cost_quantiles'])
+    weeks_p10, weeks_p50, weeks_p90 = (base_weeks * size_factor * factor for factor in data['duration_quantiles'])
+    
     return {
         'project_type': data['project_type'],
         'size_sqft': size_sqft,
         'finish_level': data['finish_level'],
         'estimated_cost': round(total_cost, 2),
         'estimated_cost_range': {
-            'min': round(total_cost * 0.9, 2),  # -10%
-            'max': round(total_cost * 1.15, 2)  # +15%
+            'min': round(cost_p10, 2),  # P10
+            'max': round(cost_p90, 2)  # P90
+        },
+        'estimated_cost_percentiles': {
+            'p10': round(cost_p10, 2),
+            'p50': round(cost_p50, 2),
+            'p90': round(cost_p90, 2)
         },
         'estimated_timeline_weeks': adjusted_weeks,
-        'cost_per_sqft': data['cost_per_sqft'],
+        'estimated_timeline_percentiles': {
+            'p10': round(weeks_p10, 1),
+            'p50': round(weeks_p50, 1),
+            'p90': round(weeks_p90, 1)
+        },
+        'cost_per_sqft': cost_per_sqft,
+        'region': region_name,
+        'regional_multiplier': multiplier,
         'suggested_materials': data['suggested_materials'],
         'description': data['description']
     }
 
+def calculate_estimates(project_types: Sequence[str], finish_levels: Sequence[str],
+                        sizes_sqft: Sequence[float],
+                        postal_codes: Optional[Sequence[Optional[str]]] = None,
+                        snapshot: Optional[PricingSnapshot] = None) -> List[Optional[Dict]]:
+    """
+    Calculate estimates for many projects against one pricing snapshot.
+
+    Every item in the batch is priced from the same data. The cost and
+    timeline arithmetic (calculate_estimate's formula) runs on NumPy arrays;
+    pricing rows and regions are still looked up, and the result dictionaries
+    built, one item at a time.
+
+    Args:
+        project_types: Project type for each item
+        finish_levels: Finish level for each item
+        sizes_sqft: Size in square feet for each item
+        postal_codes: Postal code for each item, used for regional price adjustment
+        snapshot: Pricing snapshot to read from (defaults to the current one)
+
+    Returns:
+        List of estimate dictionaries, with None for items that have no pricing data
+    """
+    snapshot = snapshot or get_pricing_snapshot()
+    rows = [snapshot.get(project_type, finish_level)
+            for project_type, finish_level in zip(project_types, finish_levels)]
+    regions = [snapshot.regions.resolve(postal_code) for postal_code in postal_codes or [None] * len(rows)]
+
+    multipliers = np.fromiter((region[1] if region else 1.0 for region in regions),
+                              dtype=np.float64, count=len(rows))
+    cost_per_sqft = np.fromiter((row['cost_per_sqft'] if row else 0.0 for row in rows),
+                                dtype=np.float64, count=len(rows))
+    cost_per_sqft = np.array([round(rate, 2) for rate in (cost_per_sqft * multipliers).tolist()])
+    base_weeks = np.fromiter((row['avg_duration_weeks'] if row else 0 for row in rows),
+                             dtype=np.int64, count=len(rows))
+    cost_factors = np.array([row['cost_quantiles'] if row else (0.0, 0.0, 0.0) for row in rows],
+                            dtype=np.float64).reshape(len(rows), 3)
+    duration_factors = np.array([row['duration_quantiles'] if row else (0.0, 0.0, 0.0) for row in rows],
+                                dtype=np.float64).reshape(len(rows), 3)
+    sizes = np.asarray(sizes_sqft, dtype=np.float64)
+
+    # Same formula as calculate_estimate, applied element-wise
+    total_cost = cost_per_sqft * sizes
+    size_factor = np.where(sizes > 1000, 1 + ((sizes - 1000) / 5000), 1.0)
+    adjusted_weeks = np.where(sizes > 1000, np.floor(base_weeks * size_factor), base_weeks).astype(np.int64)
+    cost_percentiles = total_cost[:, None] * cost_factors
+    weeks_percentiles = (base_weeks * size_factor)[:, None] * duration_factors
+
+    # Python's round() is used on the way out so results match calculate_estimate exactly
+    estimates = []
+    for row, region, multiplier, rate, size, cost, cost_q, weeks, weeks_q in zip(
+            rows, regions, multipliers.tolist(), cost_per_sqft.tolist(), sizes.tolist(),
+            total_cost.tolist(), cost_percentiles.tolist(), adjusted_weeks.tolist(),
+            weeks_percentiles.tolist()):
+        if row is None:
+            estimates.append(None)
+            continue
+        estimates.append({
+            'project_type': row['project_type'],
+            'size_sqft': size,
+            'finish_level': row['finish_level'],
+            'estimated_cost': round(cost, 2),
+            'estimated_cost_range': {
+                'min': round(cost_q[0], 2),
+                'max': round(cost_q[2], 2)
+            },
+            'estimated_cost_percentiles': {
+                'p10': round(cost_q[0], 2),
+                'p50': round(cost_q[1], 2),
+                'p90': round(cost_q[2], 2)
+            },
+            'estimated_timeline_weeks': weeks,
+            'estimated_timeline_percentiles': {
+                'p10': round(weeks_q[0], 1),
+                'p50': round(weeks_q[1], 1),
+                'p90': round(weeks_q[2], 1)
+            },
+            'cost_per_sqft': rate,
+            'region': region[0] if region else None,
+            'regional_multiplier': multiplier,
+            'suggested_materials': list(row['suggested_materials']),
+            'description': row['description']
+        })
+
+    return estimates
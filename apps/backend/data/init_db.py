@@ -5,16 +5,151 @@ Copyright (c) 2025 Saeed Alaediny. All rights reserved.
 
 This script initializes the SQLite database with sample renovation pricing data
 for the Greater Vancouver Area.
+
+Usage:
+    python init_db.py [regions.csv]
+
+The optional CSV (columns: postal_prefix, region_name, multiplier) replaces the
+built-in regional price multipliers.
 """
 
+import csv
 import sqlite3
 import os
+import sys
 
 # Database file path
 DB_PATH = os.path.join(os.path.dirname(__file__), 'pricing_timeline.db')
 
-def init_database():
-    """Initialize the database with sample renovation data."""
+# Regional price multipliers keyed by postal code prefix. Three-character
+# prefixes are FSAs; two-character prefixes are district fallbacks and the
+# single letter is the province-wide default. Lookups use the most specific match.
+REGIONAL_PRICING = [
+    # Province-wide default
+    ('V', 'British Columbia', 1.00),
+
+    # District fallbacks
+    ('V3', 'Surrey / Coquitlam / Langley', 0.97),
+    ('V4', 'Surrey / Delta / Langley', 0.96),
+    ('V5', 'Vancouver East / Burnaby', 1.04),
+    ('V6', 'Vancouver', 1.10),
+    ('V7', 'North Shore / Richmond', 1.08),
+
+    # Downtown and West Side Vancouver
+    ('V6B', 'Downtown Vancouver', 1.15),
+    ('V6C', 'Coal Harbour', 1.18),
+    ('V6E', 'West End', 1.14),
+    ('V6G', 'West End', 1.12),
+    ('V6H', 'Fairview', 1.12),
+    ('V6J', 'Kitsilano', 1.14),
+    ('V6K', 'Kitsilano', 1.14),
+    ('V6L', 'Dunbar', 1.13),
+    ('V6M', 'Kerrisdale', 1.16),
+    ('V6N', 'Southlands', 1.18),
+    ('V6P', 'Marpole', 1.06),
+    ('V6R', 'Point Grey', 1.18),
+    ('V6S', 'Dunbar', 1.15),
+    ('V6T', 'University Endowment Lands', 1.15),
+    ('V6Z', 'Downtown Vancouver', 1.15),
+
+    # Richmond
+    ('V6V', 'Richmond', 1.03),
+    ('V6X', 'Richmond', 1.04),
+    ('V6Y', 'Richmond', 1.04),
+    ('V7A', 'Richmond', 1.04),
+    ('V7C', 'Richmond', 1.04),
+    ('V7E', 'Richmond', 1.03),
+
+    # North Shore
+    ('V7G', 'North Vancouver', 1.10),
+    ('V7J', 'North Vancouver', 1.10),
+    ('V7K', 'North Vancouver', 1.10),
+    ('V7L', 'North Vancouver', 1.09),
+    ('V7M', 'North Vancouver', 1.09),
+    ('V7N', 'North Vancouver', 1.10),
+    ('V7P', 'North Vancouver', 1.10),
+    ('V7R', 'North Vancouver', 1.12),
+    ('V7S', 'West Vancouver', 1.22),
+    ('V7T', 'West Vancouver', 1.20),
+    ('V7V', 'West Vancouver', 1.20),
+    ('V7W', 'West Vancouver', 1.20),
+
+    # Burnaby
+    ('V5A', 'Burnaby', 1.03),
+    ('V5B', 'Burnaby', 1.02),
+    ('V5C', 'Burnaby', 1.03),
+    ('V5E', 'Burnaby', 1.02),
+    ('V5G', 'Burnaby', 1.03),
+    ('V5H', 'Burnaby', 1.04),
+    ('V5J', 'Burnaby', 1.02),
+
+    # Fraser Valley and south of the Fraser
+    ('V3H', 'Port Moody', 1.02),
+    ('V3J', 'Coquitlam', 1.00),
+    ('V3K', 'Coquitlam', 1.00),
+    ('V3L', 'New Westminster', 1.01),
+    ('V3M', 'New Westminster', 1.01),
+    ('V3S', 'Surrey', 0.97),
+    ('V3T', 'Surrey', 0.96),
+    ('V3W', 'Surrey', 0.95),
+    ('V4A', 'South Surrey / White Rock', 1.02),
+    ('V4B', 'White Rock', 1.02),
+    ('V4C', 'Delta', 0.98),
+    ('V4K', 'Delta', 0.98),
+    ('V4M', 'Tsawwassen', 1.00),
+    ('V2Y', 'Langley', 0.96),
+    ('V2Z', 'Langley', 0.95),
+    ('V1M', 'Langley', 0.96),
+]
+
+def load_regional_pricing(conn, regions):
+    """
+    Bulk load regional price multipliers, replacing existing prefixes.
+
+    Args:
+        conn: Open database connection
+        regions: Iterable of (postal_prefix, region_name, multiplier) tuples
+
+    Returns:
+        Number of rows loaded
+    """
+    cursor = conn.cursor()
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS regional_pricing (
+            postal_prefix TEXT PRIMARY KEY,
+            region_name TEXT NOT NULL,
+            multiplier REAL NOT NULL CHECK (multiplier > 0)
+        )
+    ''')
+    rows = [(prefix.upper().replace(' ', ''), name, float(multiplier)) for prefix, name, multiplier in regions]
+    with conn:
+        cursor.executemany('''
+            INSERT OR REPLACE INTO regional_pricing (postal_prefix, region_name, multiplier)
+            VALUES (?, ?, ?)
+        ''', rows)
+    return len(rows)
+
+def read_regions_csv(csv_path):
+    """
+    Read regional multipliers from a CSV file with postal_prefix, region_name and multiplier columns.
+
+    Args:
+        csv_path: Path to the CSV file
+
+    Returns:
+        List of (postal_prefix, region_name, multiplier) tuples
+    """
+    with open(csv_path, newline='', encoding='utf-8') as f:
+        return [(row['postal_prefix'], row['region_name'], float(row['multiplier']))
+                for row in csv.DictReader(f)]
+
+def init_database(regions=None):
+    """
+    Initialize the database with sample renovation data.
+
+    Args:
+        regions: Optional (postal_prefix, region_name, multiplier) rows; defaults to REGIONAL_PRICING
+    """
     
     # Remove existing database if it exists
     if os.path.exists(DB_PATH):
@@ -102,9 +237,13 @@ def init_database():
     for row in cursor.fetchall():
         print(f"  {row[0]:15} | {row[1]:10} | ${row[2]:6.2f}/sqft | {row[3]:2} weeks")
     
+    # Load regional price multipliers
+    region_count = load_regional_pricing(conn, regions if regions is not None else REGIONAL_PRICING)
+    print(f"\nLoaded {region_count} regional price multipliers")
+    
     conn.close()
     print(f"\nDatabase created at: {DB_PATH}")
 
 if __name__ == '__main__':
-    init_database()
+    init_database(read_regions_csv(sys.argv[1]) if len(sys.argv) > 1 else None)
 
@@ -0,0 +1,163 @@
+"""
+RenovAI Canada - Multi-Item Project Quotes
+Copyright (c) 2025 Saeed Alaediny. All rights reserved.
+
+Prices several renovation line items together and combines their timelines.
+
+Each project type is broken into trade phases (demolition, plumbing, tiling,
+...) that run in order within one project. Different trades can work on
+different projects at the same time, but each trade has a single crew, so two
+bathrooms cannot both be tiled in the same week. Structural projects (whole
+home renovations and additions) must finish their structural phases before
+any other line item can start.
+"""
+
+import math
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from data.db_helper import PricingSnapshot, calculate_estimates, get_pricing_snapshot
+
+# Share of a project's duration spent in each trade phase, in execution order
+TRADE_PHASES: Dict[str, Tuple[Tuple[str, float], ...]] = {
+    'kitchen': (('demolition', 0.10), ('plumbing', 0.15), ('electrical', 0.15),
+                ('drywall', 0.10), ('cabinetry', 0.30), ('finishing', 0.20)),
+    'bathroom': (('demolition', 0.10), ('plumbing', 0.25), ('electrical', 0.10),
+                 ('tiling', 0.35), ('finishing', 0.20)),
+    'basement': (('framing', 0.20), ('plumbing', 0.10), ('electrical', 0.15),
+                 ('drywall', 0.25), ('flooring', 0.15), ('finishing', 0.15)),
+    'full_home': (('demolition', 0.10), ('framing', 0.20), ('plumbing', 0.15),
+                  ('electrical', 0.15), ('drywall', 0.15), ('finishing', 0.25)),
+    'addition': (('foundation', 0.20), ('framing', 0.25), ('plumbing', 0.10),
+                 ('electrical', 0.10), ('drywall', 0.15), ('finishing', 0.20)),
+}
+
+# Project types whose structural phases gate every other line item
+STRUCTURAL_PROJECT_TYPES = frozenset({'full_home', 'addition'})
+STRUCTURAL_TRADES = frozenset({'demolition', 'foundation', 'framing'})
+
+def _phases(project_type: str) -> Tuple[Tuple[str, float], ...]:
+    """Trade phases for a project type; unknown types run as a single general phase."""
+    return TRADE_PHASES.get(project_type, (('general', 1.0),))
+
+def schedule_trades(units: Sequence[Tuple[int, str, float]]) -> Dict:
+    """
+    Schedule project units across shared trade crews in a single pass.
+
+    Structural units are placed first, then the rest longest first. Each phase
+    starts as soon as both the previous phase of its project and the trade's
+    crew are free.
+
+    Args:
+        units: (item index, project type, duration in weeks) per project unit;
+            an item with quantity 2 appears twice
+
+    Returns:
+        Dictionary with per-item start/end weeks, per-trade busy windows,
+        and combined vs. sequential duration
+    """
+    order = sorted(range(len(units)),
+                   key=lambda i: (units[i][1] not in STRUCTURAL_PROJECT_TYPES, -units[i][2], i))
+    crew_free: Dict[str, float] = {}
+    trades: Dict[str, Dict[str, float]] = {}
+    items: Dict[int, List[float]] = {}
+    structural_gate = 0.0
+
+    for i in order:
+        index, project_type, weeks = units[i]
+        structural = project_type in STRUCTURAL_PROJECT_TYPES
+        # Structural units sort first, so the gate is final once the others are reached
+        ready = 0.0 if structural else structural_gate
+        start = None
+        for trade, share in _phases(project_type):
+            phase_start = max(ready, crew_free.get(trade, 0.0))
+            ready = crew_free[trade] = phase_start + weeks * share
+            start = phase_start if start is None else start
+            window = trades.setdefault(trade, {'start_week': phase_start, 'end_week': ready, 'busy_weeks': 0.0})
+            window['start_week'] = min(window['start_week'], phase_start)
+            window['end_week'] = max(window['end_week'], ready)
+            window['busy_weeks'] += weeks * share
+            if structural and trade in STRUCTURAL_TRADES:
+                structural_gate = max(structural_gate, ready)
+        span = items.setdefault(index, [start, ready])
+        span[0], span[1] = min(span[0], start), max(span[1], ready)
+
+    makespan = max((end for _, end in items.values()), default=0.0)
+    sequential = sum(weeks for _, _, weeks in units)
+    combined_weeks = math.ceil(round(makespan, 6))
+    return {
+        'items': {index: {'start_week': round(start, 1), 'end_week': round(end, 1)}
+                  for index, (start, end) in items.items()},
+        'trades': [
+            {'trade': trade, 'start_week': round(window['start_week'], 1),
+             'end_week': round(window['end_week'], 1), 'busy_weeks': round(window['busy_weeks'], 1)}
+            for trade, window in sorted(trades.items(), key=lambda kv: (kv[1]['start_week'], kv[0]))
+        ],
+        'combined_weeks': combined_weeks,
+        'sequential_weeks': sequential,
+        'weeks_saved': max(0, sequential - combined_weeks)
+    }
+
+def calculate_quote(project_types: Sequence[str], finish_levels: Sequence[str],
+                    sizes_sqft: Sequence[float], quantities: Sequence[int],
+                    postal_codes: Optional[Sequence[Optional[str]]] = None,
+                    snapshot: Optional[PricingSnapshot] = None) -> Dict:
+    """
+    Price every line item of a project and combine their timelines.
+
+    All line items are priced together by one calculate_estimates call
+    against a single pricing snapshot.
+
+    Args:
+        project_types: Project type for each line item
+        finish_levels: Finish level for each line item
+        sizes_sqft: Size in square feet of one unit of each line item
+        quantities: Number of identical units per line item (e.g. 2 bathrooms)
+        postal_codes: Postal code for each line item, used for regional price adjustment
+        snapshot: Pricing snapshot to read from (defaults to the current one)
+
+    Returns:
+        Dictionary with per-item estimates, total cost range and combined
+        timeline; if any line item has no pricing data, only a `missing`
+        list of their indexes
+    """
+    snapshot = snapshot or get_pricing_snapshot()
+    estimates = calculate_estimates(project_types, finish_levels, sizes_sqft, postal_codes, snapshot=snapshot)
+    missing = [index for index, estimate in enumerate(estimates) if estimate is None]
+    if missing:
+        return {'missing': missing}
+
+    items = []
+    units = []
+    total = 0.0
+    # Overruns on one site tend to move together, so item percentiles are
+    # summed (exact for fully correlated items, conservative otherwise)
+    total_percentiles = {'p10': 0.0, 'p50': 0.0, 'p90': 0.0}
+    for index, (estimate, quantity) in enumerate(zip(estimates, quantities)):
+        cost = estimate['estimated_cost'] * quantity
+        percentiles = {name: value * quantity for name, value in estimate['estimated_cost_percentiles'].items()}
+        total += cost
+        for name, value in percentiles.items():
+            total_percentiles[name] += value
+        items.append(dict(
+            estimate,
+            quantity=quantity,
+            unit_cost=estimate['estimated_cost'],
+            estimated_cost=round(cost, 2),
+            estimated_cost_range={'min': round(percentiles['p10'], 2), 'max': round(percentiles['p90'], 2)},
+            estimated_cost_percentiles={name: round(value, 2) for name, value in percentiles.items()}
+        ))
+        units.extend([(index, estimate['project_type'], estimate['estimated_timeline_weeks'])] * quantity)
+
+    timeline = schedule_trades(units)
+    for index, item in enumerate(items):
+        item['schedule'] = timeline['items'][index]
+    del timeline['items']
+
+    return {
+        'items': items,
+        'total_cost': round(total, 2),
+        'total_cost_range': {'min': round(total_percentiles['p10'], 2), 'max': round(total_percentiles['p90'], 2)},
+        'total_cost_percentiles': {name: round(value, 2) for name, value in total_percentiles.items()},
+        'timeline': timeline,
+        'pricing_version': snapshot.version
+    }
@@ -0,0 +1,502 @@
+"""
+RenovAI Canada - Request and Dependency Metrics
+Copyright (c) 2025 Saeed Alaediny. All rights reserved.
+
+Minimal in-process metrics registry rendered in the Prometheus text
+exposition format. Provides:
+
+- MetricsMiddleware: per-route latency histograms, status code counters and
+  an in-flight gauge for every HTTP request
+- time_dependency(): a timer for calls to backing services (SQLite, Airtable)
+  whose latest readings are also reported by the health endpoint
+- Cold-start duration per phase and a readiness gauge (see startup.py)
+
+Under the pre-fork server (serve.py) a scrape reaches one worker at random,
+so workers share their metrics like prometheus_client's multiprocess mode:
+each writes its values to RENOVAI_METRICS_DIR every METRICS_FLUSH_SECONDS,
+when it stops and when it is scraped, and the scraped worker reports every
+process's values combined. Counters and histograms are summed, including those of workers that
+have exited, so totals never go backwards; gauges combine the live workers
+only. A forked child starts from empty metrics rather than inheriting the
+readings the master took while preloading. Without RENOVAI_METRICS_DIR
+metrics are those of the current process.
+"""
+
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Latency buckets in seconds, from sub-millisecond cache hits to slow remote calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Environment variable naming the directory where worker processes share their metrics
+METRICS_DIR_ENV = 'RENOVAI_METRICS_DIR'
+
+# Seconds between writes of a worker's metrics to the shared directory; a
+# scrape may miss up to this much of the other workers' latest activity
+METRICS_FLUSH_SECONDS = float(os.getenv('METRICS_FLUSH_SECONDS', '1'))
+
+def metrics_dir() -> Optional[str]:
+    """Directory shared by the worker processes, or None for a single process."""
+    return os.getenv(METRICS_DIR_ENV) or None
+
+def _format_labels(labelnames: Sequence[str], values: Tuple, *extra: str) -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    parts.extend(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+def _is_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+class _Metric:
+    """Base class for labelled metrics."""
+
+    type_name = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def reset(self):
+        """Drop every recorded value (a fresh lock, too, as this runs after fork)."""
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def _key(self, labels: Dict) -> Tuple:
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def state(self) -> List:
+        """This process's values as JSON-serializable [label values, value] pairs."""
+        with self._lock:
+            return [[list(key), value] for key, value in self._values.items()]
+
+    def combine(self, states: Sequence[Tuple[bool, List]]) -> Dict[Tuple, float]:
+        """Values across processes, given each one's state() and whether it is alive."""
+        values: Dict[Tuple, float] = {}
+        for _, state in states:
+            for key, value in state:
+                values[tuple(key)] = values.get(tuple(key), 0) + value
+        return values
+
+    def render(self, states: Optional[Sequence[Tuple[bool, List]]] = None) -> List[str]:
+        """Exposition lines for this process's values, or those combined from `states`."""
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.type_name}']
+        lines.extend(self._samples(self.combine(states if states is not None else [(True, self.state())])))
+        return lines
+
+    def _samples(self, values: Dict) -> List[str]:
+        return [f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}'
+                for key, value in values.items()]
+
+class Counter(_Metric):
+    """Monotonically increasing counter."""
+
+    type_name = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def set_total(self, value: float, **labels):
+        """Mirror a running total kept elsewhere (e.g. a cache's hit count)."""
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+class Gauge(_Metric):
+    """
+    Value that can go up and down.
+
+    Args:
+        multiprocess_mode: How live workers' values combine: 'livesum'
+            (e.g. requests in flight), 'max' or 'min' (e.g. 1 only while every
+            worker is ready)
+    """
+
+    type_name = 'gauge'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 multiprocess_mode: str = 'livesum'):
+        super().__init__(name, documentation, labelnames)
+        if multiprocess_mode not in ('livesum', 'max', 'min'):
+            raise ValueError(f"Unknown multiprocess mode: {multiprocess_mode}")
+        self.multiprocess_mode = multiprocess_mode
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def combine(self, states: Sequence[Tuple[bool, List]]) -> Dict[Tuple, float]:
+        # A gauge describes a live process; exited workers' last values no longer apply
+        if self.multiprocess_mode == 'livesum':
+            return super().combine([(alive, state) for alive, state in states if alive])
+        pick = max if self.multiprocess_mode == 'max' else min
+        values: Dict[Tuple, float] = {}
+        for alive, state in states:
+            if alive:
+                for key, value in state:
+                    key = tuple(key)
+                    values[key] = pick(values[key], value) if key in values else value
+        return values
+
+class Histogram(_Metric):
+    """Cumulative histogram with fixed buckets."""
+
+    type_name = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [bucket counts..., +Inf count], sum
+        self._values: Dict[Tuple, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            counts, total = entry
+            # Index of the first bucket whose upper bound is >= value (+Inf when past the last)
+            counts[bisect_left(self.buckets, value)] += 1
+            total[0] += value
+
+    def snapshot(self, **labels) -> Optional[Dict]:
+        """Return count, sum and per-bucket counts for one label set, or None if unobserved."""
+        with self._lock:
+            entry = self._values.get(self._key(labels))
+            if entry is None:
+                return None
+            counts, total = list(entry[0]), entry[1][0]
+        return {'count': sum(counts), 'sum': total, 'buckets': dict(zip(self.buckets + (float('inf'),), counts))}
+
+    def quantile(self, q: float, **labels) -> Optional[float]:
+        """Estimate a quantile as the upper bound of the bucket containing it."""
+        data = self.snapshot(**labels)
+        if not data or not data['count']:
+            return None
+        target = q * data['count']
+        cumulative = 0
+        for bound, count in data['buckets'].items():
+            cumulative += count
+            if cumulative >= target:
+                return bound
+        return float('inf')
+
+    def state(self) -> List:
+        with self._lock:
+            return [[list(key), [list(counts), total[0]]] for key, (counts, total) in self._values.items()]
+
+    def combine(self, states: Sequence[Tuple[bool, List]]) -> Dict[Tuple, Tuple[List[int], float]]:
+        values: Dict[Tuple, Tuple[List[int], float]] = {}
+        for _, state in states:
+            for key, (counts, total) in state:
+                merged = values.get(tuple(key))
+                values[tuple(key)] = ((counts, total) if merged is None else
+                                      ([a + b for a, b in zip(merged[0], counts)], merged[1] + total))
+        return values
+
+    def _samples(self, values: Dict) -> List[str]:
+        lines = []
+        for key, (counts, total) in values.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}')
+            lines.append(f'{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}')
+            lines.append(f'{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}')
+        return lines
+
+class Registry:
+    """Collection of metrics, plus callbacks that refresh metrics mirrored from elsewhere."""
+
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+        self._collectors: List[Callable[[], None]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector: Callable[[], None]):
+        """Register a callable run before metrics are rendered or shared, to update mirrored values."""
+        self._collectors.append(collector)
+
+    def _collect(self):
+        for collector in self._collectors:
+            collector()
+
+    def render(self) -> str:
+        """
+        Render every metric in the Prometheus text exposition format: this
+        process's values, combined with the other workers' under serve.py.
+        """
+        directory = metrics_dir()
+        states = {}
+        if directory:
+            # Publish what this scrape reports first: whichever worker answers
+            # the next scrape then sees at least these values, so totals never
+            # go backwards between scrapes of different workers
+            try:
+                self.write(directory)
+            except OSError:
+                self._collect()
+            states = self._shared_states()
+        else:
+            self._collect()
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render([(True, metric.state())] +
+                                       [(alive, state.get(metric.name, [])) for alive, state in states.values()]))
+        return '\n'.join(lines) + '\n'
+
+    def _shared_states(self) -> Dict[int, Tuple[bool, Dict]]:
+        """Last values written by the other processes, by pid, with whether each is alive."""
+        directory, states = metrics_dir(), {}
+        try:
+            names = os.listdir(directory)
+        except OSError:
+            return states
+        for name in names:
+            pid, _, suffix = name.partition('.')
+            if suffix != 'json' or not pid.isdigit() or int(pid) == os.getpid():
+                continue
+            try:
+                with open(os.path.join(directory, name)) as f:
+                    states[int(pid)] = (_is_alive(int(pid)), json.load(f))
+            except (OSError, ValueError):
+                continue   # written by a process that has not finished its first write
+        return states
+
+    def write(self, directory: str):
+        """Share this process's values with the other workers (atomically replaced)."""
+        self._collect()
+        path = os.path.join(directory, f'{os.getpid()}.json')
+        with open(path + '.tmp', 'w') as f:
+            json.dump({metric.name: metric.state() for metric in self._metrics}, f)
+        os.replace(path + '.tmp', path)
+
+    def reset(self):
+        """Drop the values of every registered metric."""
+        for metric in self._metrics:
+            metric.reset()
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.register(Counter(
+    'renovai_http_requests_total', 'HTTP requests by route, method and status code.',
+    ('method', 'route', 'status')))
+HTTP_LATENCY = REGISTRY.register(Histogram(
+    'renovai_http_request_duration_seconds', 'HTTP request latency by route and method.',
+    ('method', 'route')))
+HTTP_IN_FLIGHT = REGISTRY.register(Gauge(
+    'renovai_http_requests_in_flight', 'HTTP requests currently being served.'))
+DEPENDENCY_LATENCY = REGISTRY.register(Histogram(
+    'renovai_dependency_duration_seconds', 'Latency of calls to backing services.',
+    ('dependency', 'operation')))
+DEPENDENCY_ERRORS = REGISTRY.register(Counter(
+    'renovai_dependency_errors_total', 'Failed calls to backing services.',
+    ('dependency', 'operation')))
+STARTUP_DURATION = REGISTRY.register(Gauge(
+    'renovai_startup_duration_seconds', 'Slowest cold-start time of the running processes by phase.',
+    ('phase',), multiprocess_mode='max'))
+READY = REGISTRY.register(Gauge(
+    'renovai_ready', 'Whether every running process has finished warming up and accepts traffic.',
+    multiprocess_mode='min'))
+
+# Most recent reading per (dependency, operation), reported by /health
+_last_readings: Dict[Tuple[str, str], Dict] = {}
+
+class _SharedMetricsWriter:
+    """Writes this worker's metrics to the shared directory until stopped."""
+
+    def __init__(self):
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+
+    def start(self):
+        directory = metrics_dir()
+        if directory is None or self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, args=(directory,), name='metrics-writer', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        self._stop.set()
+        thread.join()
+
+    def _run(self, directory: str):
+        stopping = False
+        while True:
+            try:
+                REGISTRY.write(directory)
+            except OSError:
+                pass   # the directory was removed as the server shut down
+            if stopping:
+                return
+            # One last write once stopped, so the final values are shared
+            stopping = self._stop.wait(METRICS_FLUSH_SECONDS)
+
+_writer = _SharedMetricsWriter()
+
+def start_sharing():
+    """Under serve.py, share this worker's metrics with the others until stop_sharing()."""
+    _writer.start()
+
+def stop_sharing():
+    """Write this worker's final values and stop sharing them."""
+    _writer.stop()
+
+def _reset_after_fork():
+    # A worker reports only its own work, not what the master did while preloading
+    global _writer
+    REGISTRY.reset()
+    _last_readings.clear()
+    _writer = _SharedMetricsWriter()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+@contextmanager
+def time_dependency(dependency: str, operation: str) -> Iterator[None]:
+    """
+    Time a call to a backing service.
+
+    Args:
+        dependency: Service name (e.g. 'sqlite', 'airtable')
+        operation: Operation name (e.g. 'load_pricing_snapshot', 'create_lead')
+    """
+    start = time.perf_counter()
+    error = None
+    try:
+        yield
+    except Exception as e:
+        error = e
+        DEPENDENCY_ERRORS.inc(dependency=dependency, operation=operation)
+        raise
+    finally:
+        elapsed = time.perf_counter() - start
+        DEPENDENCY_LATENCY.observe(elapsed, dependency=dependency, operation=operation)
+        _last_readings[(dependency, operation)] = {
+            'last_latency_ms': round(elapsed * 1000, 3),
+            'last_error': str(error) if error else None,
+            'at': time.time()
+        }
+
+def dependency_report(dependency: str) -> Dict[str, Dict]:
+    """
+    Summarize recorded timings for one dependency, per operation.
+
+    Returns:
+        Mapping of operation to count, error count, average/last latency and p95 bucket
+    """
+    report = {}
+    for (name, operation), last in list(_last_readings.items()):
+        if name != dependency:
+            continue
+        data = DEPENDENCY_LATENCY.snapshot(dependency=name, operation=operation) or {'count': 0, 'sum': 0.0}
+        p95 = DEPENDENCY_LATENCY.quantile(0.95, dependency=name, operation=operation)
+        report[operation] = {
+            'count': data['count'],
+            'errors': int(DEPENDENCY_ERRORS.value(dependency=name, operation=operation)),
+            'avg_latency_ms': round(data['sum'] / data['count'] * 1000, 3) if data['count'] else None,
+            'p95_latency_ms_le': None if p95 is None or p95 == float('inf') else p95 * 1000,
+            'last_latency_ms': last['last_latency_ms'],
+            'last_error': last['last_error']
+        }
+    return report
+
+def _route_template(scope) -> str:
+    """
+    Return the matched route's path template, or 'unmatched'.
+
+    Newer FastAPI releases resolve included routers lazily and leave the
+    router-relative path on scope['route']; the full prefixed template is on
+    the effective route context instead.
+    """
+    fastapi_scope = scope.get('fastapi')
+    context = fastapi_scope.get('effective_route_context') if isinstance(fastapi_scope, dict) else None
+    path = getattr(context, 'path', None) or getattr(scope.get('route'), 'path', None)
+    return path or 'unmatched'
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording latency, status and in-flight count per route.
+
+    Requests are labelled with the matched route template (e.g.
+    /api/leads/{record_id}) rather than the raw path, keeping label
+    cardinality bounded. Latency covers the full response, including
+    streamed bodies.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message['type'] == 'http.response.start':
+                status = message['status']
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            route_path = _route_template(scope)
+            method = scope['method']
+            HTTP_LATENCY.observe(time.perf_counter() - start, method=method, route=route_path)
+            HTTP_REQUESTS.inc(method=method, route=route_path, status=status)
@@ -0,0 +1,133 @@
+"""
+RenovAI Canada - Versioned API Catalog
+Copyright (c) 2025 Saeed Alaediny. All rights reserved.
+
+Static API metadata (project types, finish levels, service info) only changes
+when the pricing data does. This module renders each catalog document once
+per pricing data version and serves it with a strong ETag and Cache-Control,
+answering conditional requests with 304 Not Modified.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import Response
+
+from data.async_db import get_pricing_snapshot_async
+from data.db_helper import PricingSnapshot
+
+# How long clients may reuse a catalog document before revalidating
+CATALOG_MAX_AGE = int(os.getenv('CATALOG_MAX_AGE', '300'))
+
+class CatalogDocument:
+    """A rendered catalog payload and its validators."""
+
+    __slots__ = ('body', 'etag')
+
+    def __init__(self, payload: Dict):
+        self.body = json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        self.etag = '"' + hashlib.sha256(self.body).hexdigest()[:32] + '"'
+
+class VersionedCatalog:
+    """
+    Registry of catalog documents rendered per pricing data version.
+
+    Builders receive the pricing snapshot and the time its data was last
+    written (snapshot.modified_at), and return a JSON-serializable payload.
+    Both come from the data on disk, so every worker and every restart renders
+    the same bytes and ETag for a version. Rendering happens once per
+    (document, version); every later request reuses the bytes.
+    """
+
+    def __init__(self):
+        self._builders: Dict[str, Callable[[PricingSnapshot, str], Dict]] = {}
+        self._documents: Dict[Tuple[str, str], CatalogDocument] = {}
+        self._version: Optional[str] = None
+        self._pricing_updated_at = ''
+        self._lock = threading.Lock()
+
+    def register(self, name: str, builder: Callable[[PricingSnapshot, str], Dict]):
+        """
+        Register a catalog document builder.
+
+        Args:
+            name: Document name
+            builder: Callable taking (snapshot, pricing_updated_at) and returning the payload
+        """
+        self._builders[name] = builder
+
+    def document(self, name: str, snapshot: PricingSnapshot) -> CatalogDocument:
+        """
+        Return the rendered document for a pricing snapshot, building it on first use.
+
+        Args:
+            name: Registered document name
+            snapshot: Pricing snapshot the document describes
+
+        Returns:
+            CatalogDocument for the snapshot's data version
+        """
+        key = (name, snapshot.version)
+        document = self._documents.get(key)
+        if document is not None:
+            return document
+
+        with self._lock:
+            if snapshot.version != self._version:
+                # Pricing data changed: drop documents for older versions
+                self._version = snapshot.version
+                self._pricing_updated_at = snapshot.modified_at
+                self._documents = {}
+            document = self._documents.get(key)
+            if document is None:
+                document = CatalogDocument(self._builders[name](snapshot, self._pricing_updated_at))
+                self._documents[key] = document
+        return document
+
+    def warm(self, snapshot: PricingSnapshot):
+        """Render every registered document for a snapshot ahead of the first request."""
+        for name in list(self._builders):
+            self.document(name, snapshot)
+
+    async def response(self, request: Request, name: str) -> Response:
+        """
+        Serve a catalog document, honouring If-None-Match.
+
+        Args:
+            request: Incoming request
+            name: Registered document name
+
+        Returns:
+            200 response with the document, or 304 if the client's copy is current
+        """
+        snapshot = await get_pricing_snapshot_async()
+        document = self.document(name, snapshot)
+        headers = {
+            'ETag': document.etag,
+            'Cache-Control': f'public, max-age={CATALOG_MAX_AGE}, must-revalidate',
+            'X-Pricing-Version': snapshot.version
+        }
+
+        if _etag_matches(request.headers.get('if-none-match'), document.etag):
+            return Response(status_code=304, headers=headers)
+        return Response(content=document.body, media_type='application/json', headers=headers)
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Compare an If-None-Match header against an ETag (weak comparison, per RFC 9110)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+catalog = VersionedCatalog()
@@ -5,21 +5,67 @@ Copyright (c) 2025 Saeed Alaediny. All rights reserved.
 This module handles lead collection and storage in Airtable.
 """
 
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel, Field, EmailStr, validator
-from typing import Optional
-import sys
-import os
-from datetime import datetime
-
-# Add parent directory to path for imports
-sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from pydantic import BaseModel, Field, EmailStr, field_validator
+from typing import Dict, Iterator, Literal, Optional, List
+import csv
+import io
+import json
+import threading
+import zlib
+from datetime import date, datetime
+from itertools import islice
+
 from integrations.airtable_client import AirtableClient
+from metrics import time_dependency
 
 router = APIRouter()
 
-# Initialize Airtable client
-airtable_client = AirtableClient()
+# Most leads returned by one page of GET /leads
+MAX_LEADS_PAGE_SIZE = 200
+
+# Leads formatted and sent per chunk of GET /leads/export
+EXPORT_CHUNK_LEADS = 500
+
+# CSV export columns: record metadata, then the lead fields stored by /collect-lead
+EXPORT_CSV_COLUMNS = ['id', 'created_at', 'sync_status', 'Name', 'Email', 'Phone', 'Project Type',
+                      'Size (sq ft)', 'Finish Level', 'Postal Code', 'Estimated Cost', 'Project Notes',
+                      'Lead Source', 'Status', 'Submitted At']
+
+# Airtable client, created on first use (or during start-up warm-up) rather
+# than at import time
+_airtable_client: Optional[AirtableClient] = None
+_airtable_client_lock = threading.Lock()
+
+def get_airtable_client() -> AirtableClient:
+    """
+    Return the shared Airtable client, creating it on first call.
+
+    Route handlers receive it as a FastAPI dependency and the app's lifespan
+    warms it up; tests and benchmarks substitute their own client by setting
+    _airtable_client before the app starts.
+
+    Returns:
+        The process-wide AirtableClient
+    """
+    global _airtable_client
+    client = _airtable_client
+    if client is None:
+        with _airtable_client_lock:
+            if _airtable_client is None:
+                _airtable_client = AirtableClient()
+            client = _airtable_client
+    return client
+
+def close_airtable_client():
+    """Close the shared Airtable client, if created; the next call to get_airtable_client() makes a new one."""
+    global _airtable_client
+    with _airtable_client_lock:
+        client, _airtable_client = _airtable_client, None
+    if client is not None:
+        client.close()
 
 class LeadRequest(BaseModel):
     """Request model for lead collection."""
@@ -33,7 +79,8 @@ class LeadRequest(BaseModel):
     estimated_cost: Optional[float] = Field(None, description="Estimated cost from previous calculation")
     project_notes: Optional[str] = Field(None, max_length=1000, description="Additional notes or requirements")
     
-    @validator('phone')
+    @field_validator('phone')
+    @classmethod
     def validate_phone(cls, v):
         """Basic phone number validation."""
         # Remove common separators
@@ -42,7 +89,8 @@ class LeadRequest(BaseModel):
             raise ValueError("Phone number must contain at least 10 digits")
         return v
     
-    @validator('project_type')
+    @field_validator('project_type')
+    @classmethod
     def validate_project_type(cls, v):
         """Validate project type."""
         valid_types = ['kitchen', 'bathroom', 'basement', 'full_home', 'addition', 'other']
@@ -56,14 +104,37 @@ class LeadResponse(BaseModel):
     message: str
     record_id: str
     created_at: str
+    sync_status: Optional[str] = None
+    duplicate: bool = Field(False, description="True if this repeats an earlier submission, whose record_id is returned")
+
+class LeadStatusResponse(BaseModel):
+    """Delivery status of a collected lead."""
+    record_id: str
+    status: str = Field(..., description="'pending', 'synced' or 'failed' ('local' in mock mode)")
+    created_at: str
+    attempts: int = 0
+    airtable_id: Optional[str] = None
+    synced_at: Optional[str] = None
+    last_error: Optional[str] = None
 
 @router.post("/collect-lead", response_model=LeadResponse)
-async def collect_lead(request: LeadRequest):
+async def collect_lead(
+    request: LeadRequest,
+    idempotency_key: Optional[str] = Header(None, max_length=255,
+                                            description="Same key on a retried request returns the original lead"),
+    airtable_client: AirtableClient = Depends(get_airtable_client)
+):
     """
     Collect and store lead information.
     
+    Retries and resubmissions are not stored twice: a request with the same
+    Idempotency-Key, or the same email and phone within the dedup window,
+    returns the record ID of the original lead.
+    
     Args:
         request: LeadRequest containing customer information
+        idempotency_key: Optional Idempotency-Key header
+        airtable_client: Client used to store the lead
     
     Returns:
         LeadResponse with storage confirmation
@@ -91,15 +162,24 @@ async def collect_lead(request: LeadRequest):
         # Remove None values
         lead_data = {k: v for k, v in lead_data.items() if v is not None}
         
-        # Store lead in Airtable
-        result = airtable_client.create_lead(lead_data)
+        # Store lead locally; delivery to Airtable happens in the background.
+        # The write waits for the journal writer's fsync, so it runs on the
+        # thread pool: the event loop keeps serving, and concurrent
+        # submissions share one fsync.
+        with time_dependency('airtable', 'create_lead'):
+            result = await run_in_threadpool(airtable_client.create_lead, lead_data,
+                                             idempotency_key=idempotency_key)
         
         if result['success']:
             return LeadResponse(
                 success=True,
-                message="Thank you! Your information has been received. Our team will contact you shortly.",
+                message=("Thank you! We already have your information. Our team will contact you shortly."
+                         if result.get('duplicate') else
+                         "Thank you! Your information has been received. Our team will contact you shortly."),
                 record_id=result['record_id'],
-                created_at=result['created_at']
+                created_at=result['created_at'],
+                sync_status=result.get('sync_status'),
+                duplicate=result.get('duplicate', False)
             )
         else:
             raise HTTPException(
@@ -113,19 +193,61 @@ async def collect_lead(request: LeadRequest):
             detail=f"Error processing lead: {str(e)}"
         )
 
+class LeadPage(BaseModel):
+    """One page of stored leads."""
+    leads: List[dict]
+    next_cursor: Optional[str] = Field(None, description="Pass as `cursor` to get the next page; null on the last page")
+    total: int = Field(..., description="Number of leads matching the filters")
+
+def _lead_filters(project_type: Optional[str], status: Optional[str],
+                  date_from: Optional[date], date_to: Optional[date],
+                  since: Optional[datetime] = None, until: Optional[datetime] = None) -> dict:
+    """Validate lead query parameters and convert them for the Airtable client."""
+    if project_type is not None:
+        try:
+            project_type = LeadRequest.validate_project_type(project_type)
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+    if date_from and date_to and date_from > date_to:
+        raise HTTPException(status_code=422, detail="date_from must not be after date_to")
+    if since and until and since.timestamp() > until.timestamp():
+        raise HTTPException(status_code=422, detail="since must not be after until")
+    return {
+        'project_type': project_type,
+        'status': status,
+        'date_from': date_from.isoformat() if date_from else None,
+        'date_to': date_to.isoformat() if date_to else None,
+        'since': since,
+        'until': until,
+    }
+
 @router.get("/leads/count")
-async def get_leads_count():
+async def get_leads_count(
+    project_type: Optional[str] = Query(None, description="Only count leads of this project type"),
+    status: Optional[str] = Query(None, description="Only count leads with this status (e.g. New)"),
+    date_from: Optional[date] = Query(None, description="Only count leads submitted on or after this date"),
+    date_to: Optional[date] = Query(None, description="Only count leads submitted on or before this date"),
+    since: Optional[datetime] = Query(None, description="Only count leads created at or after this time"),
+    until: Optional[datetime] = Query(None, description="Only count leads created before this time"),
+    airtable_client: AirtableClient = Depends(get_airtable_client)
+):
     """
-    Get the total number of leads stored (for testing/monitoring).
+    Get the number of leads stored (for testing/monitoring).
+    
+    Counts come from the lead store's indexes, so no lead is read.
     
     Returns:
-        Dictionary with lead count
+        Dictionary with the lead count and counts per project type and status
     """
+    filters = _lead_filters(project_type, status, date_from, date_to, since, until)
     try:
-        all_leads = airtable_client.get_all_leads()
+        with time_dependency('airtable', 'count_leads'):
+            total_leads = await run_in_threadpool(airtable_client.count_leads, **filters)
+            breakdown = await run_in_threadpool(airtable_client.lead_breakdown)
         return {
-            "total_leads": len(all_leads),
-            "storage_mode": "mock" if airtable_client.use_mock else "airtable"
+            "total_leads": total_leads,
+            "storage_mode": "mock" if airtable_client.use_mock else "airtable",
+            **breakdown
         }
     except Exception as e:
         raise HTTPException(
@@ -133,3 +255,123 @@ async def get_leads_count():
             detail=f"Error retrieving lead count: {str(e)}"
         )
 
+@router.get("/leads", response_model=LeadPage)
+async def list_leads(
+    project_type: Optional[str] = Query(None, description="Only leads of this project type"),
+    status: Optional[str] = Query(None, description="Only leads with this status (e.g. New)"),
+    date_from: Optional[date] = Query(None, description="Only leads submitted on or after this date"),
+    date_to: Optional[date] = Query(None, description="Only leads submitted on or before this date"),
+    since: Optional[datetime] = Query(None, description="Only leads created at or after this time (e.g. the last sync)"),
+    until: Optional[datetime] = Query(None, description="Only leads created before this time"),
+    cursor: Optional[str] = Query(None, description="next_cursor from the previous page"),
+    limit: int = Query(50, ge=1, le=MAX_LEADS_PAGE_SIZE, description="Leads per page"),
+    airtable_client: AirtableClient = Depends(get_airtable_client)
+):
+    """
+    List stored leads in creation order, one page at a time (for CRM sync jobs).
+    
+    Uses keyset pagination: each page ends with a cursor naming its last lead,
+    so paging stays fast at any depth and leads added meanwhile never shift
+    or repeat entries. Filters are served from the lead store's indexes, and
+    since/until ranges by binary search over the time-sortable record IDs.
+    
+    Returns:
+        LeadPage with the leads, the cursor of the next page and the total match count
+    """
+    filters = _lead_filters(project_type, status, date_from, date_to, since, until)
+    with time_dependency('airtable', 'list_leads'):
+        page = await run_in_threadpool(airtable_client.list_leads, cursor=cursor, limit=limit, **filters)
+        total = await run_in_threadpool(airtable_client.count_leads, **filters)
+    return LeadPage(leads=page['leads'], next_cursor=page['next_cursor'], total=total)
+
+def _csv_rows(leads: List[Dict]) -> str:
+    """Format leads as CSV rows in EXPORT_CSV_COLUMNS order."""
+    out = io.StringIO()
+    writer = csv.writer(out)
+    for lead in leads:
+        fields = lead.get('fields') or {}
+        writer.writerow([lead.get('id'), lead.get('created_at'), (lead.get('sync') or {}).get('status')] +
+                        [fields.get(column) for column in EXPORT_CSV_COLUMNS[3:]])
+    return out.getvalue()
+
+def _ndjson_rows(leads: List[Dict]) -> str:
+    """Format leads as one JSON object per line."""
+    return ''.join(json.dumps(lead) + '\n' for lead in leads)
+
+def _export_chunks(leads: Iterator[Dict], format: str, compress: bool) -> Iterator[bytes]:
+    """Encode leads chunk by chunk, gzip-compressing each chunk as it is produced."""
+    compressor = zlib.compressobj(wbits=31) if compress else None   # wbits=31: gzip framing
+
+    def encode(text: str) -> bytes:
+        data = text.encode()
+        if compressor is None:
+            return data
+        # Sync flush, so every chunk can be decompressed as soon as it arrives
+        return compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    # Send the header straight away, before reading any lead
+    if format == 'csv':
+        header = io.StringIO()
+        csv.writer(header).writerow(EXPORT_CSV_COLUMNS)
+        yield encode(header.getvalue())
+    elif compressor is not None:
+        yield encode('')
+    rows = _csv_rows if format == 'csv' else _ndjson_rows
+    while True:
+        chunk = list(islice(leads, EXPORT_CHUNK_LEADS))
+        if not chunk:
+            break
+        yield encode(rows(chunk))
+    if compressor is not None:
+        yield compressor.flush()
+
+@router.get("/leads/export")
+async def export_leads(
+    format: Literal['csv', 'ndjson'] = Query('csv', description="csv or ndjson (one JSON lead per line)"),
+    since: Optional[datetime] = Query(None, description="Only leads created at or after this time"),
+    until: Optional[datetime] = Query(None, description="Only leads created before this time"),
+    accept_encoding: Optional[str] = Header(None),
+    airtable_client: AirtableClient = Depends(get_airtable_client)
+):
+    """
+    Export stored leads in creation order (for the nightly CRM export).
+    
+    The response is streamed as leads are read from the lead store, a chunk
+    at a time, so memory stays flat however many leads exist and the first
+    bytes go out immediately. Sent gzip-compressed when the client accepts it.
+    
+    Returns:
+        StreamingResponse with CSV (header row first) or NDJSON
+    """
+    _lead_filters(None, None, None, None, since, until)   # 422 on an inverted range
+    compress = 'gzip' in (accept_encoding or '').lower()
+    headers = {'Content-Disposition': f'attachment; filename="leads.{format}"', 'Vary': 'Accept-Encoding'}
+    if compress:
+        headers['Content-Encoding'] = 'gzip'
+    leads = airtable_client.export_leads(since=since, until=until)
+    return StreamingResponse(
+        _export_chunks(leads, format, compress),
+        media_type='text/csv' if format == 'csv' else 'application/x-ndjson',
+        headers=headers
+    )
+
+@router.get("/leads/{record_id}/status", response_model=LeadStatusResponse)
+async def get_lead_status(record_id: str, airtable_client: AirtableClient = Depends(get_airtable_client)):
+    """
+    Check whether a collected lead has been delivered to Airtable.
+    
+    Args:
+        record_id: Record ID returned by /collect-lead
+        airtable_client: Client holding the lead outbox
+    
+    Returns:
+        LeadStatusResponse with the sync status and delivery details
+    
+    Raises:
+        HTTPException: If no lead with this record ID exists
+    """
+    with time_dependency('airtable', 'get_lead_status'):
+        status = await run_in_threadpool(airtable_client.get_lead_status, record_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail=f"Lead {record_id} not found")
+    return status
@@ -5,18 +5,35 @@ Copyright (c) 2025 Saeed Alaediny. All rights reserved.
 This module handles renovation cost and timeline estimation requests.
 """
 
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel, Field, validator
-from typing import Optional, List
-import sys
+from fastapi import APIRouter, HTTPException, Body, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, Field, ValidationError, field_validator
+from typing import Optional, List, Dict, Any, Iterator, Union
+import json
 import os
 
-# Add parent directory to path for imports
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from data.db_helper import calculate_estimate, get_all_project_types, get_all_finish_levels
+from data.async_db import get_pricing_snapshot_async
+from data.db_helper import PricingSnapshot, calculate_estimate, calculate_estimates
+from routes.catalog import catalog
+from routes.response_cache import ResponseCache
 
 router = APIRouter()
 
+# Maximum number of items accepted by the batch estimation endpoint
+MAX_BATCH_SIZE = 10000
+
+# Batch items validated and priced together before their lines are streamed
+BATCH_CHUNK_SIZE = 500
+
+# Rendered /estimate responses, keyed by normalized request and pricing data version
+estimate_cache = ResponseCache(max_entries=int(os.getenv('ESTIMATE_CACHE_SIZE', '1024')))
+
+# Added to every estimate and quote response
+ESTIMATE_DISCLAIMER = ("This is an approximate estimate. Final costs may vary based on specific requirements, "
+                       "site conditions, and material selections. A detailed consultation is recommended for "
+                       "accurate pricing.")
+
 class EstimateRequest(BaseModel):
     """Request model for renovation estimation."""
     project_type: str = Field(..., description="Type of renovation project")
@@ -24,7 +41,19 @@ class EstimateRequest(BaseModel):
     finish_level: str = Field(..., description="Quality level: basic, standard, or premium")
     postal_code: Optional[str] = Field(None, description="Postal code for location-based adjustments")
     
-    @validator('project_type')
+    @field_validator('postal_code')
+    @classmethod
+    def validate_postal_code(cls, v):
+        """Normalize postal code to 'A1A 1A1' style spacing."""
+        if v is None:
+            return v
+        cleaned = v.upper().replace(' ', '').replace('-', '')
+        if not cleaned:
+            return None
+        return f"{cleaned[:3]} {cleaned[3:]}".strip()
+    
+    @field_validator('project_type')
+    @classmethod
     def validate_project_type(cls, v):
         """Validate project type."""
         valid_types = ['kitchen', 'bathroom', 'basement', 'full_home', 'addition']
@@ -32,7 +61,8 @@ class EstimateRequest(BaseModel):
             raise ValueError(f"Project type must be one of: {', '.join(valid_types)}")
         return v.lower()
     
-    @validator('finish_level')
+    @field_validator('finish_level')
+    @classmethod
     def validate_finish_level(cls, v):
         """Validate finish level."""
         valid_levels = ['basic', 'standard', 'premium']
@@ -40,7 +70,8 @@ class EstimateRequest(BaseModel):
             raise ValueError(f"Finish level must be one of: {', '.join(valid_levels)}")
         return v.lower()
     
-    @validator('size_sqft')
+    @field_validator('size_sqft')
+    @classmethod
     def validate_size(cls, v):
         """Validate size is reasonable."""
         if v > 10000:
@@ -54,12 +85,16 @@ class EstimateResponse(BaseModel):
     finish_level: str
     estimated_cost: float
     estimated_cost_range: dict
+    estimated_cost_percentiles: Optional[dict] = None
     estimated_timeline_weeks: int
+    estimated_timeline_percentiles: Optional[dict] = None
     cost_per_sqft: float
+    region: Optional[str] = None
+    regional_multiplier: float = 1.0
     suggested_materials: List[str]
     description: str
     location: Optional[str] = None
-    disclaimer: str = "This is an approximate estimate. Final costs may vary based on specific requirements, site conditions, and material selections. A detailed consultation is recommended for accurate pricing."
+    disclaimer: str = ESTIMATE_DISCLAIMER
 
 @router.post("/estimate", response_model=EstimateResponse)
 async def get_estimate(request: EstimateRequest):
@@ -70,16 +105,27 @@ async def get_estimate(request: EstimateRequest):
         request: EstimateRequest containing project details
     
     Returns:
-        EstimateResponse with calculated estimates
+        EstimateResponse with calculated estimates, rendered once and then
+        served from estimate_cache for identical requests
     
     Raises:
         HTTPException: If estimation data is not available
     """
+    snapshot = await get_pricing_snapshot_async()
+    cache_key = (request.project_type, request.finish_level, request.size_sqft,
+                 request.postal_code, snapshot.version)
+    
+    body = estimate_cache.get(cache_key)
+    if body is not None:
+        return Response(content=body, media_type="application/json")
+    
     # Calculate estimate using database helper
     estimate = calculate_estimate(
         project_type=request.project_type,
         finish_level=request.finish_level,
-        size_sqft=request.size_sqft
+        size_sqft=request.size_sqft,
+        postal_code=request.postal_code,
+        snapshot=snapshot
     )
     
     if not estimate:
@@ -93,35 +139,142 @@ async def get_estimate(request: EstimateRequest):
         estimate['location'] = f"Greater Vancouver Area ({request.postal_code})"
     
     # Add disclaimer
-    estimate['disclaimer'] = EstimateResponse.__fields__['disclaimer'].default
+    estimate['disclaimer'] = ESTIMATE_DISCLAIMER
+    
+    # Validate and render once; later hits skip both steps
+    body = JSONResponse(content=jsonable_encoder(EstimateResponse(**estimate))).body
+    estimate_cache.put(cache_key, body)
     
-    return estimate
+    return Response(content=body, media_type="application/json")
 
-@router.get("/project-types")
-async def get_project_types():
+@router.get("/estimate/cache-stats")
+async def get_estimate_cache_stats():
     """
-    Get list of available project types.
+    Get hit/miss/eviction counters for the estimate response cache.
+    
+    Returns:
+        Dictionary with cache statistics
+    """
+    return estimate_cache.stats()
+
+def _format_validation_errors(error: ValidationError) -> List[Dict[str, str]]:
+    """Flatten pydantic validation errors into JSON-serializable field/message pairs."""
+    return [
+        {'field': '.'.join(str(part) for part in err['loc']), 'message': err['msg']}
+        for err in error.errors()
+    ]
+
+def _batch_lines(items: List[Any], snapshot: PricingSnapshot) -> Iterator[str]:
+    """
+    Price batch items chunk by chunk, yielding one NDJSON line per item in order.
+
+    Items that did not validate as EstimateRequest are validated again here
+    only to report their errors.
+    """
+    for offset in range(0, len(items), BATCH_CHUNK_SIZE):
+        results: List[Dict[str, Any]] = []
+        requests: List[EstimateRequest] = []
+        for index, item in enumerate(items[offset:offset + BATCH_CHUNK_SIZE], offset):
+            if isinstance(item, EstimateRequest):
+                requests.append(item)
+                results.append({'index': index, 'status': 200})
+            elif not isinstance(item, dict):
+                results.append({'index': index, 'status': 422, 'errors': [{'field': '', 'message': 'Item must be an object'}]})
+            else:
+                try:
+                    requests.append(EstimateRequest(**item))
+                    results.append({'index': index, 'status': 200})
+                except ValidationError as e:
+                    results.append({'index': index, 'status': 422, 'errors': _format_validation_errors(e)})
+
+        estimates = iter(calculate_estimates(
+            project_types=[r.project_type for r in requests],
+            finish_levels=[r.finish_level for r in requests],
+            sizes_sqft=[r.size_sqft for r in requests],
+            postal_codes=[r.postal_code for r in requests],
+            snapshot=snapshot
+        ) if requests else [])
+        valid_requests = iter(requests)
+        for result in results:
+            if result['status'] == 200:
+                request = next(valid_requests)
+                estimate = next(estimates)
+                if estimate is None:
+                    result = {
+                        'index': result['index'],
+                        'status': 404,
+                        'errors': [{'field': '', 'message': f"No estimation data found for {request.project_type} with {request.finish_level} finish level"}]
+                    }
+                else:
+                    estimate['location'] = f"Greater Vancouver Area ({request.postal_code})" if request.postal_code else None
+                    estimate['disclaimer'] = ESTIMATE_DISCLAIMER
+                    result['estimate'] = estimate
+            yield json.dumps(result) + '\n'
+
+@router.post("/estimate/batch")
+async def get_estimate_batch(items: List[Union[EstimateRequest, Any]] = Body(..., description="List of EstimateRequest items")):
+    """
+    Calculate estimates for a whole portfolio of projects in one request.
+    
+    Items are declared as EstimateRequest; one that does not validate is
+    still accepted and answered with an inline error line instead of failing
+    the batch. Results are streamed back as NDJSON, one line per item in
+    request order. Lines are produced as the stream is read, BATCH_CHUNK_SIZE
+    items at a time, all priced against the pricing snapshot current when
+    the request arrived.
+    
+    Args:
+        items: List of EstimateRequest objects
     
     Returns:
-        Dictionary containing list of project types
+        StreamingResponse with one JSON object per line
+    
+    Raises:
+        HTTPException: If the batch exceeds MAX_BATCH_SIZE items
     """
-    project_types = get_all_project_types()
+    if len(items) > MAX_BATCH_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch size exceeds maximum allowed ({MAX_BATCH_SIZE} items)"
+        )
+    
+    snapshot = await get_pricing_snapshot_async()
+    # A plain generator: Starlette iterates it in the threadpool, off the event loop
+    return StreamingResponse(_batch_lines(items, snapshot), media_type="application/x-ndjson")
+
+def _project_types_document(snapshot, pricing_updated_at):
+    """Catalog payload for /project-types."""
+    return {
+        "project_types": list(snapshot.project_types),
+        "count": len(snapshot.project_types)
+    }
+
+def _finish_levels_document(snapshot, pricing_updated_at):
+    """Catalog payload for /finish-levels."""
     return {
-        "project_types": project_types,
-        "count": len(project_types)
+        "finish_levels": list(snapshot.finish_levels),
+        "count": len(snapshot.finish_levels)
     }
 
+catalog.register("project-types", _project_types_document)
+catalog.register("finish-levels", _finish_levels_document)
+
+@router.get("/project-types")
+async def get_project_types(request: Request):
+    """
+    Get list of available project types.
+    
+    Returns:
+        Dictionary containing list of project types (304 if the client's ETag is current)
+    """
+    return await catalog.response(request, "project-types")
+
 @router.get("/finish-levels")
-async def get_finish_levels():
+async def get_finish_levels(request: Request):
     """
     Get list of available finish levels.
     
     Returns:
-        Dictionary containing list of finish levels
+        Dictionary containing list of finish levels (304 if the client's ETag is current)
     """
-    finish_levels = get_all_finish_levels()
-    return {
-        "finish_levels": finish_levels,
-        "count": len(finish_levels)
-    }
-
+    return await catalog.response(request, "finish-levels")
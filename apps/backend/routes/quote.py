@@ -0,0 +1,140 @@
+"""
+RenovAI Canada - Project Quote Route Handler
+Copyright (c) 2025 Saeed Alaediny. All rights reserved.
+
+This module prices multi-line-item renovation projects (e.g. a kitchen, two
+bathrooms and a basement) in one request, with a combined timeline.
+"""
+
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel, Field, field_validator
+from typing import Optional, List
+
+from data.async_db import calculate_quote_async
+from routes.estimate import ESTIMATE_DISCLAIMER, EstimateRequest
+
+router = APIRouter()
+
+# Maximum number of line items, and units per line item, in one quote
+MAX_QUOTE_ITEMS = 50
+MAX_ITEM_QUANTITY = 20
+
+class QuoteLineItem(EstimateRequest):
+    """One line item of a quote; postal_code defaults to the quote's."""
+    quantity: int = Field(1, ge=1, le=MAX_ITEM_QUANTITY, description="Number of identical units (e.g. 2 bathrooms)")
+    label: Optional[str] = Field(None, max_length=100, description="Customer-facing name for the line item")
+
+class QuoteRequest(BaseModel):
+    """Request model for a multi-line-item project quote."""
+    items: List[QuoteLineItem] = Field(..., description="Line items to price together")
+    postal_code: Optional[str] = Field(None, description="Project postal code, applied to items without their own")
+
+    @field_validator('postal_code')
+    @classmethod
+    def validate_postal_code(cls, v):
+        """Normalize the postal code the same way as estimate requests."""
+        return EstimateRequest.validate_postal_code(v)
+
+    @field_validator('items')
+    @classmethod
+    def validate_items(cls, v):
+        """Validate the number of line items."""
+        if not v:
+            raise ValueError("Quote must contain at least one line item")
+        if len(v) > MAX_QUOTE_ITEMS:
+            raise ValueError(f"Quote exceeds maximum allowed ({MAX_QUOTE_ITEMS} line items)")
+        return v
+
+class QuoteItemSchedule(BaseModel):
+    """When a line item's work starts and ends, in weeks from project start."""
+    start_week: float
+    end_week: float
+
+class QuoteItem(BaseModel):
+    """Priced line item."""
+    label: Optional[str] = None
+    project_type: str
+    size_sqft: float
+    finish_level: str
+    quantity: int
+    unit_cost: float
+    estimated_cost: float
+    estimated_cost_range: dict
+    estimated_cost_percentiles: dict
+    estimated_timeline_weeks: int
+    estimated_timeline_percentiles: dict
+    cost_per_sqft: float
+    region: Optional[str] = None
+    regional_multiplier: float = 1.0
+    suggested_materials: List[str]
+    description: str
+    schedule: QuoteItemSchedule
+
+class TradeWindow(BaseModel):
+    """Period during which one trade is on site."""
+    trade: str
+    start_week: float
+    end_week: float
+    busy_weeks: float
+
+class QuoteTimeline(BaseModel):
+    """Combined project timeline."""
+    combined_weeks: int
+    sequential_weeks: int
+    weeks_saved: int
+    trades: List[TradeWindow]
+
+class QuoteResponse(BaseModel):
+    """Response model for a project quote."""
+    items: List[QuoteItem]
+    total_cost: float
+    total_cost_range: dict
+    total_cost_percentiles: dict
+    timeline: QuoteTimeline
+    pricing_version: str
+    location: Optional[str] = None
+    disclaimer: str = ESTIMATE_DISCLAIMER
+
+@router.post("/quote", response_model=QuoteResponse)
+async def get_quote(request: QuoteRequest):
+    """
+    Price several renovation line items together.
+
+    All line items are priced by one calculate_estimates call against the
+    same pricing snapshot, then their trade phases are scheduled together: trades
+    overlap across rooms, but each trade works on one room at a time and
+    structural work (whole home, additions) goes first.
+
+    Args:
+        request: QuoteRequest containing the line items
+
+    Returns:
+        QuoteResponse with per-item and total cost ranges and the combined timeline
+
+    Raises:
+        HTTPException: If any line item has no estimation data
+    """
+    items = request.items
+    quote = await calculate_quote_async(
+        project_types=[item.project_type for item in items],
+        finish_levels=[item.finish_level for item in items],
+        sizes_sqft=[item.size_sqft for item in items],
+        quantities=[item.quantity for item in items],
+        postal_codes=[item.postal_code or request.postal_code for item in items]
+    )
+
+    if 'missing' in quote:
+        raise HTTPException(
+            status_code=404,
+            detail=[f"No estimation data found for item {index}: {items[index].project_type} "
+                    f"with {items[index].finish_level} finish level" for index in quote['missing']]
+        )
+
+    for item, quoted in zip(items, quote['items']):
+        quoted['label'] = item.label
+
+    # Add location information if provided
+    if request.postal_code:
+        quote['location'] = f"Greater Vancouver Area ({request.postal_code})"
+
+    return quote
@@ -0,0 +1,87 @@
+"""
+RenovAI Canada - Response Cache
+Copyright (c) 2025 Saeed Alaediny. All rights reserved.
+
+Bounded LRU cache of fully rendered response bodies. Callers key entries by
+the normalized request plus the pricing data version, so a pricing update
+naturally retires every stale entry without an explicit flush.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional
+
+class ResponseCache:
+    """Thread-safe LRU cache mapping request keys to rendered response bytes."""
+
+    def __init__(self, max_entries: int = 1024):
+        """
+        Initialize the cache.
+
+        Args:
+            max_entries: Maximum number of responses kept before the least recently used is evicted
+        """
+        self.max_entries = max(1, max_entries)
+        self._entries: "OrderedDict[Hashable, bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: Hashable) -> Optional[bytes]:
+        """
+        Look up a rendered response.
+
+        Args:
+            key: Normalized request key
+
+        Returns:
+            The cached response bytes, or None on a miss
+        """
+        with self._lock:
+            body = self._entries.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def put(self, key: Hashable, body: bytes):
+        """
+        Store a rendered response, evicting the least recently used entry if full.
+
+        Args:
+            key: Normalized request key
+            body: Rendered response bytes
+        """
+        with self._lock:
+            self._entries[key] = body
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Drop every cached response and reset the counters."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict:
+        """
+        Return cache counters for sizing and monitoring.
+
+        Returns:
+            Dictionary with size, capacity, hits, misses, evictions and hit ratio
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_ratio': round(self.hits / lookups, 4) if lookups else 0.0
+            }
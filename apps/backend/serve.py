@@ -0,0 +1,334 @@
+"""
+RenovAI Canada - Production Server
+Copyright (c) 2025 Saeed Alaediny. All rights reserved.
+
+Pre-fork launcher running the API in several uvicorn worker processes that
+share one listening socket.
+
+The application, pricing snapshot, catalog documents, request/response
+validators and integration clients are loaded once in the master process and frozen out of the
+garbage collector before forking, so every worker shares those pages
+copy-on-write instead of building its own copy. On SIGTERM or SIGINT the
+workers stop accepting connections and finish in-flight requests; any worker
+still busy after GRACEFUL_TIMEOUT seconds is killed. Workers that die
+unexpectedly are replaced.
+
+Usage:
+    python serve.py --workers 4 --port 8000
+    APP_ENV=production python app.py
+"""
+
+import argparse
+import asyncio
+import gc
+import logging
+import os
+import select
+import shutil
+import signal
+import socket
+import sys
+import tempfile
+import time
+from typing import Dict, List, Optional
+
+import uvicorn
+
+# Measured from interpreter start-up to every worker accepting connections
+_PROCESS_START = time.perf_counter()
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Seconds workers get to finish in-flight requests after SIGTERM
+GRACEFUL_TIMEOUT = int(os.getenv('GRACEFUL_TIMEOUT', '30'))
+
+logger = logging.getLogger('renovai.serve')
+
+def default_workers() -> int:
+    """Worker count from WEB_CONCURRENCY, or one per CPU core this process may run on."""
+    configured = int(os.getenv('WEB_CONCURRENCY', '0'))
+    if configured:
+        return configured
+    # The affinity mask reflects container CPU limits (cpusets); cpu_count() is every host core
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0)) or 1
+    return os.cpu_count() or 1
+
+def preload(application=None):
+    """
+    Import the app and build all shared read-only state in the current process.
+
+    Args:
+        application: Already-imported ASGI app, or None to import app:app
+
+    Returns:
+        (app, timings) where timings holds import_ms and warmup_ms
+    """
+    if BACKEND_DIR not in sys.path:
+        sys.path.insert(0, BACKEND_DIR)
+
+    start = time.perf_counter()
+    if application is None:
+        from app import app as application
+    imported = time.perf_counter()
+
+    from data.db_helper import read_pool
+    from routes.collect_lead import get_airtable_client
+    import startup
+
+    startup.warm_pricing()
+    get_airtable_client()
+    # Connections are per process; workers open their own on first use
+    read_pool.close()
+    warmed = time.perf_counter()
+
+    return application, {
+        'import_ms': round((imported - start) * 1000, 1),
+        'warmup_ms': round((warmed - imported) * 1000, 1)
+    }
+
+def share_metrics() -> Optional[str]:
+    """
+    Give the workers a directory to share their metrics through, so a scrape
+    of any one of them reports them all (see metrics.py).
+
+    Uses RENOVAI_METRICS_DIR, emptied of a previous run's values, if set.
+
+    Returns:
+        The temporary directory created for this run, for the caller to remove, or None
+    """
+    from metrics import METRICS_DIR_ENV
+
+    directory = os.getenv(METRICS_DIR_ENV)
+    if directory is None:
+        directory = os.environ[METRICS_DIR_ENV] = tempfile.mkdtemp(prefix='renovai-metrics-')
+        return directory
+    os.makedirs(directory, exist_ok=True)
+    for name in os.listdir(directory):
+        if name.endswith(('.json', '.json.tmp')):
+            os.remove(os.path.join(directory, name))
+    return None
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    """Create the listening socket shared by every worker."""
+    family = socket.AF_INET6 if ':' in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+    return sock
+
+def _run_worker(application, sock: socket.socket, ready_fd: Optional[int], log_level: str,
+                graceful_timeout: int):
+    """Serve requests in a forked worker until told to stop."""
+    config = uvicorn.Config(application, log_level=log_level, lifespan='on',
+                            timeout_graceful_shutdown=graceful_timeout)
+    server = uvicorn.Server(config)
+
+    master_pid = os.getppid()
+
+    async def serve():
+        task = asyncio.create_task(server.serve(sockets=[sock]))
+        while not server.started and not task.done():
+            await asyncio.sleep(0.01)
+        if ready_fd is not None:
+            if server.started:
+                os.write(ready_fd, b'1')
+            os.close(ready_fd)
+        # Drain and exit if the master dies without stopping us (e.g. SIGKILL)
+        while not task.done():
+            if os.getppid() != master_pid:
+                server.should_exit = True
+            await asyncio.wait([task], timeout=1.0)
+        await task
+
+    asyncio.run(serve())
+
+class Supervisor:
+    """
+    Forks and supervises worker processes.
+
+    Args:
+        application: Preloaded ASGI app
+        sock: Listening socket inherited by the workers
+        workers: Number of worker processes
+        log_level: uvicorn log level for the workers
+        graceful_timeout: Seconds workers get to drain after SIGTERM
+    """
+
+    def __init__(self, application, sock: socket.socket, workers: int, log_level: str = 'info',
+                 graceful_timeout: int = GRACEFUL_TIMEOUT):
+        self.application = application
+        self.sock = sock
+        self.workers = max(1, workers)
+        self.log_level = log_level
+        self.graceful_timeout = graceful_timeout
+        self.pids: Dict[int, int] = {}  # pid -> worker slot
+        self._stopping = False
+
+    def spawn(self, slot: int, ready_fd: Optional[int] = None) -> int:
+        """Fork one worker process."""
+        pid = os.fork()
+        if pid:
+            self.pids[pid] = slot
+            return pid
+
+        # Child: restore default signal handling until uvicorn installs its own
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        gc.enable()
+        exit_code = 0
+        try:
+            _run_worker(self.application, self.sock, ready_fd, self.log_level, self.graceful_timeout)
+        except BaseException:
+            logger.exception('Worker %d crashed', os.getpid())
+            exit_code = 1
+        finally:
+            os._exit(exit_code)
+
+    def start(self, ready_timeout: float = 60.0) -> float:
+        """
+        Fork all workers and wait until each one is accepting connections.
+
+        Returns:
+            Milliseconds from the first fork until the last worker was ready
+
+        Raises:
+            RuntimeError: If a worker fails to start in time
+        """
+        signal.signal(signal.SIGTERM, self._handle_stop)
+        signal.signal(signal.SIGINT, self._handle_stop)
+        read_fd, write_fd = os.pipe()
+        start = time.perf_counter()
+        for slot in range(self.workers):
+            self.spawn(slot, write_fd)
+        os.close(write_fd)
+
+        ready = 0
+        deadline = time.monotonic() + ready_timeout
+        try:
+            while ready < self.workers:
+                if self._stopping:
+                    raise RuntimeError('interrupted while starting workers')
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise RuntimeError(f'only {ready} of {self.workers} workers started in time')
+                if len(self.pids) < self.workers:
+                    raise RuntimeError(f'a worker exited during start-up ({ready} of {self.workers} ready)')
+                if not select.select([read_fd], [], [], min(remaining, 0.2))[0]:
+                    self._reap()
+                    continue
+                data = os.read(read_fd, self.workers)
+                if not data:
+                    # Every worker closed the pipe; some exited before becoming ready
+                    raise RuntimeError(f'only {ready} of {self.workers} workers started')
+                ready += len(data)
+        finally:
+            os.close(read_fd)
+        return round((time.perf_counter() - start) * 1000, 1)
+
+    def _reap(self) -> List[int]:
+        """Collect exited workers without blocking; returns their slots."""
+        slots = []
+        while self.pids:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                self.pids.clear()
+                break
+            if pid == 0:
+                break
+            slot = self.pids.pop(pid, None)
+            if slot is not None:
+                slots.append(slot)
+                if not self._stopping:
+                    logger.warning('Worker %d exited with status %d', pid, os.waitstatus_to_exitcode(status))
+        return slots
+
+    def _handle_stop(self, signum, frame):
+        self._stopping = True
+
+    def run(self):
+        """Replace dead workers until SIGTERM or SIGINT, then drain and stop them all."""
+        while not self._stopping:
+            for slot in self._reap():
+                if not self._stopping:
+                    pid = self.spawn(slot)
+                    logger.info('Started replacement worker %d', pid)
+            time.sleep(0.2)
+        self.stop()
+
+    def stop(self):
+        """Ask every worker to drain, killing those that overrun the graceful timeout."""
+        self._stopping = True
+        logger.info('Draining %d workers (timeout %ds)', len(self.pids), self.graceful_timeout)
+        for pid in list(self.pids):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+        # uvicorn enforces the graceful timeout itself; the margin covers lifespan shutdown
+        deadline = time.monotonic() + self.graceful_timeout + 5
+        while self.pids and time.monotonic() < deadline:
+            self._reap()
+            time.sleep(0.05)
+        for pid in list(self.pids):
+            logger.warning('Killing worker %d after graceful timeout', pid)
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        while self.pids:
+            self._reap()
+            time.sleep(0.05)
+        self.sock.close()
+
+def main(argv: Optional[List[str]] = None, application=None):
+    parser = argparse.ArgumentParser(description='Run the RenovAI API with pre-forked workers.')
+    parser.add_argument('--host', default=os.getenv('HOST', '0.0.0.0'))
+    parser.add_argument('--port', type=int, default=int(os.getenv('PORT', 8000)))
+    parser.add_argument('--workers', type=int, default=default_workers(),
+                        help='Worker processes (default: WEB_CONCURRENCY or usable CPU count)')
+    parser.add_argument('--graceful-timeout', type=int, default=GRACEFUL_TIMEOUT,
+                        help='Seconds to let in-flight requests finish on shutdown')
+    parser.add_argument('--log-level', default=os.getenv('LOG_LEVEL', 'info'))
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=args.log_level.upper(), format='%(levelname)s:     [master] %(message)s')
+
+    if not hasattr(os, 'fork'):
+        # No fork() on this platform: run a single in-process server instead
+        application, _ = preload(application)
+        uvicorn.run(application, host=args.host, port=args.port, log_level=args.log_level,
+                    timeout_graceful_shutdown=args.graceful_timeout)
+        return
+
+    # Collections during preload would only be wasted work; freezing afterwards
+    # keeps the collector from touching (and un-sharing) the preloaded objects
+    gc.disable()
+    application, timings = preload(application)
+    gc.collect()
+    gc.freeze()
+
+    metrics_dir = share_metrics()
+    try:
+        sock = bind_socket(args.host, args.port)
+        supervisor = Supervisor(application, sock, args.workers, args.log_level, args.graceful_timeout)
+        try:
+            workers_ms = supervisor.start()
+        except RuntimeError:
+            supervisor.stop()
+            raise
+        logger.info('Preloaded app in %.1f ms (import %.1f ms, warm-up %.1f ms); %d workers ready in %.1f ms; '
+                    'total startup %.1f ms', timings['import_ms'] + timings['warmup_ms'], timings['import_ms'],
+                    timings['warmup_ms'], args.workers, workers_ms, (time.perf_counter() - _PROCESS_START) * 1000)
+        logger.info('Listening on http://%s:%d', args.host, args.port)
+        supervisor.run()
+    finally:
+        if metrics_dir is not None:
+            shutil.rmtree(metrics_dir, ignore_errors=True)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,150 @@
+"""
+RenovAI Canada - Startup Warm-up and Readiness
+Copyright (c) 2025 Saeed Alaediny. All rights reserved.
+
+Tracks how long this process took to become ready and whether it is ready
+to take traffic. Warm-up loads the pricing snapshot, renders the catalog
+documents and exercises the request/response models, while integrations
+initialize in parallel on the database thread pool. The per-phase timings are
+reported by /health and exported as metrics, since every scale-up pays them.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime
+from typing import Callable, Dict, Mapping, Optional
+
+from data import async_db
+from data.db_helper import PricingSnapshot, calculate_estimate, get_pricing_snapshot
+from metrics import READY, STARTUP_DURATION
+
+logger = logging.getLogger('uvicorn.error')
+
+class StartupState:
+    """Readiness flag and cold-start timings for this process."""
+
+    def __init__(self):
+        self.ready = False
+        self.stopping = False
+        self.ready_at: Optional[str] = None
+        self.phases: Dict[str, float] = {}
+        self.errors: Dict[str, str] = {}
+
+    def record(self, phase: str, seconds: float):
+        """Record how long a start-up phase took."""
+        self.phases[phase] = seconds
+        STARTUP_DURATION.set(seconds, phase=phase)
+
+    def mark_ready(self):
+        self.ready = True
+        self.stopping = False
+        self.ready_at = datetime.now().isoformat()
+        READY.set(1)
+
+    def mark_stopping(self):
+        self.ready = False
+        self.stopping = True
+        READY.set(0)
+
+    @property
+    def status(self) -> str:
+        if self.ready:
+            return 'ready'
+        return 'stopping' if self.stopping else 'starting'
+
+    def report(self) -> Dict:
+        """Readiness and cold-start timings for the health endpoint."""
+        return {
+            'status': self.status,
+            'ready_at': self.ready_at,
+            'cold_start_ms': {phase: round(seconds * 1000, 1) for phase, seconds in self.phases.items()},
+            'errors': dict(self.errors)
+        }
+
+state = StartupState()
+
+def _republish_after_fork():
+    # metrics drops the master's values in a forked worker; its cold start
+    # still includes the phases the master ran before forking
+    for phase, seconds in state.phases.items():
+        STARTUP_DURATION.set(seconds, phase=phase)
+    READY.set(1 if state.ready else 0)
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_republish_after_fork)
+
+def warm_validators(snapshot: PricingSnapshot):
+    """Exercise the request/response models once so their first real use is warm."""
+    from fastapi.encoders import jsonable_encoder
+    from routes.estimate import EstimateRequest, EstimateResponse
+    from routes.collect_lead import LeadRequest
+
+    if snapshot.project_types and snapshot.finish_levels:
+        request = EstimateRequest(project_type=snapshot.project_types[0],
+                                  finish_level=snapshot.finish_levels[0],
+                                  size_sqft=100, postal_code='V6B 1A1')
+        estimate = calculate_estimate(request.project_type, request.finish_level,
+                                      request.size_sqft, request.postal_code, snapshot=snapshot)
+        if estimate is not None:
+            jsonable_encoder(EstimateResponse(**estimate))
+    LeadRequest(name='Warm Up', email='warmup@example.com', phone='6045550100', project_type='kitchen')
+
+def warm_pricing() -> PricingSnapshot:
+    """
+    Load the pricing snapshot and everything rendered from it.
+
+    A snapshot already loaded by this process (or inherited from the serve.py
+    master) is reused as long as the database file is unchanged.
+
+    Returns:
+        The current PricingSnapshot
+    """
+    from routes.catalog import catalog
+
+    snapshot = get_pricing_snapshot()
+    catalog.warm(snapshot)
+    warm_validators(snapshot)
+    return snapshot
+
+async def _timed(phase: str, func: Callable[[], object]):
+    start = time.perf_counter()
+    try:
+        await async_db.run_db(func)
+    finally:
+        state.record(phase, time.perf_counter() - start)
+
+async def warm_up(integrations: Mapping[str, Callable[[], object]] = ()):
+    """
+    Warm pricing data and initialize integrations in parallel, then mark the process ready.
+
+    Integrations that fail to initialize are reported by /health but do not
+    block readiness; they are created on first use instead.
+
+    Args:
+        integrations: Mapping of integration name to a blocking initializer
+
+    Raises:
+        Exception: If the pricing data cannot be loaded
+    """
+    start = time.perf_counter()
+    names = list(integrations)
+    results = await asyncio.gather(
+        _timed('pricing', warm_pricing),
+        *(_timed(name, integrations[name]) for name in names),
+        return_exceptions=True
+    )
+    if isinstance(results[0], BaseException):
+        raise results[0]
+    for name, result in zip(names, results[1:]):
+        if isinstance(result, BaseException):
+            state.errors[name] = str(result)
+            logger.warning('Integration %s failed to initialize: %s', name, result)
+
+    state.record('warmup', time.perf_counter() - start)
+    if 'import' in state.phases:
+        state.record('total', state.phases['import'] + state.phases['warmup'])
+    state.mark_ready()
+    logger.info('Ready after %s', ', '.join(f'{phase} {seconds * 1000:.1f} ms'
+                                          for phase, seconds in state.phases.items()))
@@ -0,0 +1,44 @@
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+
+import pytest
+
+# Make the backend modules (app, routes, data) and the shared integrations
+# package importable from the tests, as app.py does at runtime
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+sys.path.insert(1, os.path.dirname(BACKEND_DIR))
+
+# Keep mock-mode leads written by the tests out of the real local journal
+os.environ.setdefault('AIRTABLE_MOCK_FILE', os.path.join(tempfile.mkdtemp(prefix='renovai-tests-'), 'leads.jsonl'))
+
+@pytest.fixture
+def pricing_db(tmp_path, monkeypatch):
+    """
+    Serve pricing from a copy of the database that the test may change.
+
+    Yields a function running SQL against the copy; the snapshot sees the
+    change on its next freshness check, which happens on every read.
+    """
+    from data import db_helper
+
+    path = str(tmp_path / 'pricing_timeline.db')
+    shutil.copyfile(db_helper.DB_PATH, path)
+    monkeypatch.setattr(db_helper, 'DB_PATH', path)
+    monkeypatch.setattr(db_helper, 'read_pool', db_helper.ReadConnectionPool(path))
+    monkeypatch.setattr(db_helper, 'SNAPSHOT_CHECK_INTERVAL', 0)
+    monkeypatch.setattr(db_helper, '_snapshot', None)
+
+    def execute(sql, *params):
+        stat = os.stat(path)
+        with sqlite3.connect(path) as conn:
+            conn.execute(sql, params)
+        conn.close()
+        # Coarse file timestamps could hide the change from the snapshot's signature
+        os.utime(path, ns=(stat.st_atime_ns, max(os.stat(path).st_mtime_ns, stat.st_mtime_ns + 1_000_000)))
+
+    yield execute
+    db_helper.read_pool.close()
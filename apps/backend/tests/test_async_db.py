@@ -0,0 +1,106 @@
+import asyncio
+import threading
+import time
+
+import httpx
+
+from app import app
+from data import db_helper
+
+SLOW_DISK_SECONDS = 0.02
+
+def _percentile(values, percent):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+async def _run_clients(client_count, waves):
+    """
+    Fire waves of simultaneous requests and return every request latency.
+
+    Latency is measured from the moment a wave is released, since a client
+    sharing the app's event loop cannot time its own request accurately while
+    the loop is blocked.
+    """
+    transport = httpx.ASGITransport(app=app)
+    payload = {'project_type': 'kitchen', 'size_sqft': 200, 'finish_level': 'standard'}
+    latencies = []
+
+    async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+        async def request(released_at):
+            response = await client.post('/api/estimate', json=payload)
+            latencies.append(time.perf_counter() - released_at)
+            assert response.status_code == 200
+
+        for _ in range(waves):
+            released_at = time.perf_counter()
+            await asyncio.gather(*(request(released_at) for _ in range(client_count)))
+    return latencies
+
+def _slow_disk(monkeypatch):
+    """
+    Make every freshness check hit a slow 'disk' on each request.
+
+    Returns:
+        Names of the threads the slow checks ran on, in order
+    """
+    real_signature = db_helper._file_signature
+    threads = []
+
+    def slow_signature():
+        threads.append(threading.current_thread().name)
+        time.sleep(SLOW_DISK_SECONDS)
+        return real_signature()
+
+    db_helper.reload_pricing_snapshot()
+    monkeypatch.setattr(db_helper, 'SNAPSHOT_CHECK_INTERVAL', 0)
+    monkeypatch.setattr(db_helper, '_file_signature', slow_signature)
+    return threads
+
+def test_p99_latency_does_not_degrade_linearly_with_parallel_clients(monkeypatch):
+    _slow_disk(monkeypatch)
+    clients = 16
+
+    single = asyncio.run(_run_clients(1, 10))
+    parallel = asyncio.run(_run_clients(clients, 5))
+
+    # If handlers blocked the loop, every request would queue behind all the
+    # others and p99 would approach clients x single latency.
+    assert _percentile(parallel, 99) < clients * _percentile(single, 50) / 2
+
+def test_event_loop_stays_responsive_during_database_work(monkeypatch):
+    slow_calls = _slow_disk(monkeypatch)
+
+    async def scenario():
+        gaps = []
+        stop = asyncio.Event()
+
+        async def ticker():
+            last = time.perf_counter()
+            while not stop.is_set():
+                await asyncio.sleep(0.001)
+                now = time.perf_counter()
+                gaps.append(now - last)
+                last = now
+
+        tick = asyncio.create_task(ticker())
+        await _run_clients(4, 5)
+        stop.set()
+        await tick
+        return gaps
+
+    gaps = asyncio.run(scenario())
+    # Every slow disk access ran on the database pool, never on the event
+    # loop, which kept ticking meanwhile
+    assert slow_calls and all(name.startswith('pricing-db') for name in slow_calls)
+    assert len(gaps) >= len(slow_calls)
+
+def test_read_pool_is_bounded_and_reuses_connections():
+    pool = db_helper.ReadConnectionPool(db_helper.DB_PATH, size=2)
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        assert second is first
+    with pool.connection() as a, pool.connection() as b:
+        assert a is not b
+    assert pool._created == 2
+    pool.close()
@@ -0,0 +1,50 @@
+import json
+
+from fastapi.testclient import TestClient
+
+from app import _root_document, app
+from data import db_helper
+from routes.catalog import VersionedCatalog
+
+def test_root_document_is_the_same_across_restarts():
+    first = VersionedCatalog()
+    first.register('root', _root_document)
+    snapshot = db_helper.reload_pricing_snapshot()
+    before = first.document('root', snapshot)
+
+    # A new process reloads the same data into a new catalog
+    restarted = VersionedCatalog()
+    restarted.register('root', _root_document)
+    after = restarted.document('root', db_helper.reload_pricing_snapshot())
+
+    assert after.body == before.body and after.etag == before.etag
+    # The cached body says when the pricing data changed, not when it was served
+    payload = json.loads(before.body)
+    assert payload['pricing_updated_at'] == snapshot.modified_at and 'timestamp' not in payload
+
+def test_catalog_responses_carry_a_strong_etag_and_answer_304():
+    with TestClient(app) as client:
+        first = client.get('/api/project-types')
+        etag = first.headers['etag']
+        revalidated = client.get('/api/project-types', headers={'If-None-Match': etag})
+        weak = client.get('/api/project-types', headers={'If-None-Match': f'"other", W/{etag}'})
+        stale = client.get('/api/project-types', headers={'If-None-Match': '"other"'})
+
+    assert first.status_code == 200 and 'kitchen' in first.json()['project_types']
+    assert etag.startswith('"') and not etag.startswith('W/')
+    assert 'max-age' in first.headers['cache-control']
+    assert revalidated.status_code == 304 and revalidated.content == b''
+    assert revalidated.headers['etag'] == etag
+    assert weak.status_code == 304
+    assert stale.status_code == 200 and stale.content == first.content
+
+def test_etag_changes_with_the_pricing_version(pricing_db):
+    with TestClient(app) as client:
+        before = client.get('/api/info')
+        pricing_db("INSERT INTO pricing_timeline (project_type, finish_level, cost_per_sqft, avg_duration_weeks) "
+                   "VALUES ('garage', 'basic', 90, 5)")
+        after = client.get('/api/info', headers={'If-None-Match': before.headers['etag']})
+
+    assert after.status_code == 200
+    assert after.headers['etag'] != before.headers['etag']
+    assert after.headers['x-pricing-version'] == after.json()['pricing_version'] != before.json()['pricing_version']
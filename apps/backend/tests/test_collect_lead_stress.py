@@ -0,0 +1,52 @@
+import asyncio
+import os
+import time
+
+import httpx
+
+from app import app
+from integrations import airtable_client, lead_store
+from integrations.airtable_client import AirtableClient
+from integrations.lead_store import LeadJournal
+from routes import collect_lead
+
+SUBMISSIONS = 400
+CLIENTS = 64
+SLOW_FSYNC_SECONDS = 0.005
+
+def _lead(i):
+    return {'name': f'Lead {i}', 'email': f'lead{i}@example.com', 'phone': f'604{i:07d}',
+            'project_type': 'kitchen'}
+
+async def _submit_all():
+    transport = httpx.ASGITransport(app=app)
+    slots = asyncio.Semaphore(CLIENTS)
+    async with httpx.AsyncClient(transport=transport, base_url='http://test') as client:
+        async def submit(i):
+            async with slots:
+                return await client.post('/api/collect-lead', json=_lead(i))
+        return await asyncio.gather(*(submit(i) for i in range(SUBMISSIONS)))
+
+def test_concurrent_submissions_through_the_app_share_fsyncs(monkeypatch, tmp_path):
+    fsyncs = []
+    real_fsync = os.fsync
+
+    def slow_fsync(fd):
+        # A disk slow enough that submissions pile up while a write is in flight
+        fsyncs.append(fd)
+        time.sleep(SLOW_FSYNC_SECONDS)
+        real_fsync(fd)
+    monkeypatch.setattr(lead_store.os, 'fsync', slow_fsync)
+    monkeypatch.setattr(airtable_client, 'print', lambda *args, **kwargs: None, raising=False)
+    client = AirtableClient(mock_file=str(tmp_path / 'leads.jsonl'), store_backend='journal')
+    monkeypatch.setattr(collect_lead, '_airtable_client', client)
+
+    responses = asyncio.run(_submit_all())
+    client.close()
+
+    assert [response.status_code for response in responses] == [200] * SUBMISSIONS
+    assert len({response.json()['record_id'] for response in responses}) == SUBMISSIONS
+    # Handlers wait for their write off the event loop, so concurrent
+    # submissions reach the journal writer together and share fsyncs
+    assert len(fsyncs) < SUBMISSIONS / 4
+    assert len(LeadJournal(str(tmp_path / 'leads.jsonl'))) == SUBMISSIONS
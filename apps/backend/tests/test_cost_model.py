@@ -0,0 +1,33 @@
+from data import db_helper
+from data.cost_model import simulate_quantiles
+
+def test_simulated_quantiles_are_ordered_and_deterministic():
+    cells = [('kitchen', 'basic'), ('kitchen', 'premium'), ('addition', 'premium')]
+    quantiles = simulate_quantiles(cells, samples=5000)
+
+    for cost, duration in quantiles.values():
+        assert cost[0] < cost[1] < cost[2]
+        assert duration[0] < duration[1] < duration[2]
+    # Premium finishes and riskier project types spread wider
+    spread = {cell: q[0][2] - q[0][0] for cell, q in quantiles.items()}
+    assert spread[('kitchen', 'basic')] < spread[('kitchen', 'premium')] < spread[('addition', 'premium')]
+    # Each cell has its own seed, so results do not depend on which other cells are simulated
+    assert simulate_quantiles(cells[1:2], samples=5000)[cells[1]] == quantiles[cells[1]]
+
+def test_estimate_percentiles_scale_stored_quantiles_by_size():
+    snapshot = db_helper.get_pricing_snapshot()
+    small = db_helper.calculate_estimate('bathroom', 'standard', 50, snapshot=snapshot)
+    large = db_helper.calculate_estimate('bathroom', 'standard', 100, snapshot=snapshot)
+
+    percentiles = small['estimated_cost_percentiles']
+    assert percentiles['p10'] < percentiles['p50'] < percentiles['p90']
+    assert small['estimated_cost_range'] == {'min': percentiles['p10'], 'max': percentiles['p90']}
+    for name, value in large['estimated_cost_percentiles'].items():
+        assert abs(value - 2 * percentiles[name]) <= 0.02
+
+def test_batch_percentiles_match_single_estimates():
+    snapshot = db_helper.get_pricing_snapshot()
+    cases = [('kitchen', 'premium', 320.5, 'V6B 1A1'), ('full_home', 'basic', 2400, None)]
+    batch = db_helper.calculate_estimates(*zip(*cases), snapshot=snapshot)
+    for case, estimate in zip(cases, batch):
+        assert estimate == db_helper.calculate_estimate(*case, snapshot=snapshot)
@@ -0,0 +1,74 @@
+import json
+
+from fastapi.testclient import TestClient
+
+from app import app
+from data import db_helper
+from routes import estimate
+
+ITEMS = [
+    {'project_type': 'kitchen', 'size_sqft': 200, 'finish_level': 'standard', 'postal_code': 'v6b1a1'},
+    {'project_type': 'Bathroom', 'size_sqft': 75.5, 'finish_level': 'PREMIUM'},
+    {'project_type': 'basement', 'size_sqft': 900, 'finish_level': 'basic', 'postal_code': 'V3S 2B2'},
+]
+
+def _lines(response):
+    return [json.loads(line) for line in response.text.splitlines()]
+
+def test_batch_results_match_single_estimates():
+    with TestClient(app) as client:
+        response = client.post('/api/estimate/batch', json=ITEMS)
+        singles = [client.post('/api/estimate', json=item).json() for item in ITEMS]
+
+    assert response.status_code == 200
+    assert response.headers['content-type'].startswith('application/x-ndjson')
+    lines = _lines(response)
+    assert [(line['index'], line['status']) for line in lines] == [(0, 200), (1, 200), (2, 200)]
+    for line, single in zip(lines, singles):
+        assert {key: line['estimate'].get(key) for key in single} == single
+
+def test_invalid_items_get_inline_errors(pricing_db):
+    pricing_db("DELETE FROM pricing_timeline WHERE project_type = 'addition' AND finish_level = 'premium'")
+    items = [ITEMS[0], 'not an object', {'project_type': 'garage', 'size_sqft': -1, 'finish_level': 'basic'},
+             {'project_type': 'addition', 'size_sqft': 300, 'finish_level': 'premium'}, ITEMS[1]]
+    with TestClient(app) as client:
+        lines = _lines(client.post('/api/estimate/batch', json=items))
+
+    assert [(line['index'], line['status']) for line in lines] == [(0, 200), (1, 422), (2, 422), (3, 404), (4, 200)]
+    assert lines[1]['errors'] == [{'field': '', 'message': 'Item must be an object'}]
+    assert {error['field'] for error in lines[2]['errors']} == {'project_type', 'size_sqft'}
+    assert 'addition with premium' in lines[3]['errors'][0]['message']
+    assert lines[4]['estimate']['project_type'] == 'bathroom'
+
+def test_oversized_batches_are_rejected(monkeypatch):
+    monkeypatch.setattr(estimate, 'MAX_BATCH_SIZE', 3)
+    with TestClient(app) as client:
+        assert client.post('/api/estimate/batch', json=ITEMS).status_code == 200
+        response = client.post('/api/estimate/batch', json=ITEMS + ITEMS[:1])
+    assert response.status_code == 413
+    assert '3 items' in response.json()['detail']
+
+def test_batch_items_are_documented_as_estimate_requests():
+    schema = app.openapi()['paths']['/api/estimate/batch']['post']['requestBody']['content']['application/json']['schema']
+    assert {'$ref': '#/components/schemas/EstimateRequest'} in schema['items']['anyOf']
+
+def test_batch_lines_are_priced_chunk_by_chunk_as_the_stream_is_read(monkeypatch):
+    monkeypatch.setattr(estimate, 'BATCH_CHUNK_SIZE', 2)
+    chunks = []
+    calculate_estimates = estimate.calculate_estimates
+    monkeypatch.setattr(estimate, 'calculate_estimates',
+                        lambda **kwargs: chunks.append(len(kwargs['sizes_sqft'])) or calculate_estimates(**kwargs))
+    items = [estimate.EstimateRequest(**item) for item in ITEMS] + [{'project_type': 'kitchen'}, 42]
+
+    lines = estimate._batch_lines(items, db_helper.get_pricing_snapshot())
+    assert chunks == []
+    assert json.loads(next(lines))['status'] == 200 and chunks == [2]
+    assert [json.loads(line)['status'] for line in lines] == [200, 200, 422, 422]
+    assert chunks == [2, 1]
+
+    with TestClient(app) as client:
+        chunks.clear()
+        response = client.post('/api/estimate/batch', json=ITEMS + [{'project_type': 'kitchen'}, 42])
+    assert [(line['index'], line['status']) for line in _lines(response)] == [(0, 200), (1, 200), (2, 200),
+                                                                            (3, 422), (4, 422)]
+    assert chunks == [2, 1]
@@ -0,0 +1,40 @@
+from fastapi.testclient import TestClient
+
+from app import app
+from routes import estimate
+from routes.response_cache import ResponseCache
+
+REQUEST = {'project_type': 'kitchen', 'size_sqft': 200, 'finish_level': 'basic'}
+
+def test_least_recently_used_entries_are_evicted():
+    cache = ResponseCache(max_entries=2)
+    assert cache.get('a') is None
+    cache.put('a', b'1')
+    cache.put('b', b'2')
+    assert cache.get('a') == b'1'
+    cache.put('c', b'3')
+
+    assert cache.get('b') is None
+    assert (cache.get('a'), cache.get('c')) == (b'1', b'3')
+    assert cache.stats() == {'size': 2, 'max_entries': 2, 'hits': 3, 'misses': 2, 'evictions': 1, 'hit_ratio': 0.6}
+
+def test_repeated_estimates_are_served_from_the_cache(monkeypatch):
+    monkeypatch.setattr(estimate, 'estimate_cache', ResponseCache())
+    with TestClient(app) as client:
+        first = client.post('/api/estimate', json=REQUEST)
+        # Same request once normalized
+        again = client.post('/api/estimate', json=dict(REQUEST, project_type='Kitchen', finish_level='BASIC'))
+        stats = client.get('/api/estimate/cache-stats').json()
+
+    assert again.content == first.content
+    assert (stats['hits'], stats['misses'], stats['size']) == (1, 1, 1)
+
+def test_new_pricing_data_bypasses_cached_estimates(monkeypatch, pricing_db):
+    monkeypatch.setattr(estimate, 'estimate_cache', ResponseCache())
+    with TestClient(app) as client:
+        before = client.post('/api/estimate', json=REQUEST).json()
+        pricing_db("UPDATE pricing_timeline SET cost_per_sqft = 175 WHERE project_type = 'kitchen' AND finish_level = 'basic'")
+        after = client.post('/api/estimate', json=REQUEST).json()
+
+    assert (before['cost_per_sqft'], after['cost_per_sqft']) == (150, 175)
+    assert estimate.estimate_cache.stats()['misses'] == 2
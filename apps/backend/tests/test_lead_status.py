@@ -0,0 +1,86 @@
+import time
+
+from fastapi.testclient import TestClient
+
+from app import app
+from integrations.airtable_client import AirtableClient
+from integrations.airtable_standin import AirtableStandIn
+from routes import collect_lead
+
+LEAD = {
+    'name': 'Jane Smith',
+    'email': 'jane.smith@example.com',
+    'phone': '604-555-0199',
+    'project_type': 'bathroom',
+    'size_sqft': 80,
+    'finish_level': 'standard',
+}
+
+def test_lead_is_acknowledged_before_it_reaches_airtable(monkeypatch, tmp_path):
+    with AirtableStandIn(api_key='test-key', latency=0.2) as standin:
+        client = AirtableClient(api_key='test-key', base_id='appTest', api_url=standin.url,
+                                mock_file=str(tmp_path / 'outbox.jsonl'))
+        monkeypatch.setattr(collect_lead, '_airtable_client', client)
+
+        with TestClient(app) as test_client:
+            lead = test_client.post('/api/collect-lead', json=LEAD).json()
+            assert lead['sync_status'] == 'pending'
+
+            deadline = time.monotonic() + 10
+            status = test_client.get(f"/api/leads/{lead['record_id']}/status").json()
+            while status['status'] == 'pending' and time.monotonic() < deadline:
+                time.sleep(0.05)
+                status = test_client.get(f"/api/leads/{lead['record_id']}/status").json()
+
+            assert status['status'] == 'synced'
+            [remote] = standin.records('appTest', 'Leads')
+            assert status['airtable_id'] == remote['id']
+            assert remote['fields']['Email'] == LEAD['email']
+
+            assert test_client.get('/api/leads/recMissing/status').status_code == 404
+        client.close()
+
+def test_mock_mode_leads_report_local_status(monkeypatch, tmp_path):
+    client = AirtableClient(mock_file=str(tmp_path / 'leads.jsonl'))
+    monkeypatch.setattr(collect_lead, '_airtable_client', client)
+    with TestClient(app) as test_client:
+        lead = test_client.post('/api/collect-lead', json=LEAD).json()
+        assert lead['sync_status'] is None
+        assert test_client.get(f"/api/leads/{lead['record_id']}/status").json()['status'] == 'local'
+    client.close()
+
+def test_retried_and_resubmitted_leads_are_delivered_once(monkeypatch, tmp_path):
+    with AirtableStandIn(api_key='test-key') as standin:
+        client = AirtableClient(api_key='test-key', base_id='appTest', api_url=standin.url,
+                                mock_file=str(tmp_path / 'outbox.jsonl'))
+        monkeypatch.setattr(collect_lead, '_airtable_client', client)
+
+        with TestClient(app) as test_client:
+            first = test_client.post('/api/collect-lead', json=LEAD).json()
+            assert first['duplicate'] is False
+            # Same person, differently formatted contact details
+            again = test_client.post('/api/collect-lead', json=dict(LEAD, email=' Jane.Smith@Example.com',
+                                                                     phone='+1 (604) 555 0199')).json()
+            assert again['duplicate'] is True
+            assert (again['record_id'], again['created_at']) == (first['record_id'], first['created_at'])
+
+            headers = {'Idempotency-Key': 'agent-call-42'}
+            other = dict(LEAD, email='sam@example.com', phone='778-555-0100')
+            keyed = test_client.post('/api/collect-lead', json=other, headers=headers).json()
+            retried = test_client.post('/api/collect-lead', json=dict(other, phone='778-555-0111'),
+                                       headers=headers).json()
+            assert retried['duplicate'] is True and retried['record_id'] == keyed['record_id']
+
+            deadline = time.monotonic() + 10
+            while client.store.outbox() and time.monotonic() < deadline:
+                time.sleep(0.05)
+            assert len(standin.records('appTest', 'Leads')) == 2
+        client.close()
+
+def test_dedup_window_can_be_disabled(monkeypatch, tmp_path):
+    client = AirtableClient(mock_file=str(tmp_path / 'leads.jsonl'), dedup_window=0)
+    monkeypatch.setattr(collect_lead, '_airtable_client', client)
+    with TestClient(app) as test_client:
+        ids = {test_client.post('/api/collect-lead', json=LEAD).json()['record_id'] for _ in range(3)}
+    assert len(ids) == 3
+    client.close()
@@ -0,0 +1,84 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+
+from app import app
+from integrations.airtable_client import AirtableClient
+from routes import collect_lead
+
+def _lead(i, project_type):
+    return {'name': f'Lead {i}', 'email': f'lead{i}@example.com', 'phone': '604-555-0199',
+            'project_type': project_type}
+
+def test_leads_are_counted_and_paged_by_index(monkeypatch, tmp_path):
+    client = AirtableClient(mock_file=str(tmp_path / 'leads.jsonl'))
+    monkeypatch.setattr(collect_lead, '_airtable_client', client)
+    # Count and list must not stream the whole store
+    monkeypatch.setattr(client.store, 'iter_records', None)
+
+    with TestClient(app) as test_client:
+        project_types = ['kitchen', 'bathroom', 'full_home']
+        record_ids = [test_client.post('/api/collect-lead', json=_lead(i, project_types[i % 3])).json()['record_id']
+                      for i in range(12)]
+
+        counts = test_client.get('/api/leads/count').json()
+        assert counts['total_leads'] == 12
+        assert counts['by_project_type'] == {'kitchen': 4, 'bathroom': 4, 'full_home': 4}
+        assert counts['by_status'] == {'new': 12}
+        assert test_client.get('/api/leads/count', params={'project_type': 'Full_Home'}).json()['total_leads'] == 4
+
+        pages, cursor = [], None
+        while True:
+            params = {'project_type': 'full_home', 'status': 'New', 'limit': 3}
+            if cursor:
+                params['cursor'] = cursor
+            page = test_client.get('/api/leads', params=params).json()
+            assert page['total'] == 4
+            pages.append([lead['id'] for lead in page['leads']])
+            cursor = page['next_cursor']
+            if cursor is None:
+                break
+        assert pages == [record_ids[2:9:3], record_ids[11:12]]
+
+        today = test_client.get('/api/leads', params={'date_from': '2000-01-01', 'limit': 100}).json()
+        assert [lead['id'] for lead in today['leads']] == record_ids
+        assert test_client.get('/api/leads', params={'date_to': '2000-01-01'}).json()['total'] == 0
+        assert test_client.get('/api/leads', params={'project_type': 'garage'}).status_code == 422
+
+        # Record IDs sort by creation time, so since/until bound the ID range
+        created_at = client.store.get(record_ids[6])['created_at']
+        recent = test_client.get('/api/leads', params={'since': created_at, 'limit': 100}).json()
+        recent_ids = [lead['id'] for lead in recent['leads']]
+        # Leads from the same millisecond as lead 6 may precede it
+        assert recent_ids == record_ids[-len(recent_ids):] and recent_ids[-6:] == record_ids[6:]
+        assert test_client.get('/api/leads/count', params={'until': '2000-01-01T00:00:00'}).json()['total_leads'] == 0
+        assert test_client.get('/api/leads', params={'since': '2030-01-02T00:00:00',
+                                                     'until': '2030-01-01T00:00:00'}).status_code == 422
+    client.close()
+
+def test_lead_reads_run_off_the_event_loop(monkeypatch, tmp_path):
+    client = AirtableClient(mock_file=str(tmp_path / 'leads.jsonl'))
+    monkeypatch.setattr(collect_lead, '_airtable_client', client)
+    on_loop = []
+
+    def off_loop(read):
+        def wrapper(*args, **kwargs):
+            # Store reads can block on the disk or the journal lock
+            try:
+                asyncio.get_running_loop()
+                on_loop.append(read.__name__)
+            except RuntimeError:
+                pass
+            return read(*args, **kwargs)
+        return wrapper
+    for name in ('count_leads', 'lead_breakdown', 'list_leads', 'get_lead_status'):
+        monkeypatch.setattr(client, name, off_loop(getattr(client, name)))
+
+    with TestClient(app) as test_client:
+        record_id = test_client.post('/api/collect-lead', json=_lead(0, 'kitchen')).json()['record_id']
+        assert test_client.get('/api/leads/count').json()['total_leads'] == 1
+        assert test_client.get('/api/leads').json()['total'] == 1
+        assert test_client.get(f'/api/leads/{record_id}/status').json()['status'] == 'local'
+    client.close()
+
+    assert on_loop == []
@@ -0,0 +1,64 @@
+import csv
+import gzip
+import io
+import json
+import zlib
+from datetime import datetime
+
+from fastapi.testclient import TestClient
+
+from app import app
+from integrations.airtable_client import EXPORT_PAGE_SIZE, AirtableClient
+from routes import collect_lead
+
+def test_export_streams_csv_and_ndjson_in_chunks(monkeypatch, tmp_path):
+    client = AirtableClient(mock_file=str(tmp_path / 'leads.jsonl'), dedup_window=0)
+    monkeypatch.setattr(collect_lead, '_airtable_client', client)
+    monkeypatch.setattr(collect_lead, 'EXPORT_CHUNK_LEADS', 4)
+    # The export must page through the store, never load it whole
+    monkeypatch.setattr(client.store, 'iter_records', None)
+    pages = []
+    query = client.store.query
+    monkeypatch.setattr(client.store, 'query', lambda *args, **kwargs: pages.append(kwargs['limit']) or
+                        query(*args, **kwargs))
+
+    with TestClient(app) as test_client:
+        record_ids = [test_client.post('/api/collect-lead', json={
+            'name': f'Lead {i}', 'email': f'lead{i}@example.com', 'phone': '604-555-0199',
+            'project_type': 'kitchen', 'project_notes': 'Island, "quartz"\nand new cabinets'}).json()['record_id']
+            for i in range(10)]
+
+        response = test_client.get('/api/leads/export', headers={'Accept-Encoding': 'identity'})
+        assert response.headers['content-type'].startswith('text/csv')
+        assert 'content-encoding' not in response.headers
+        rows = list(csv.DictReader(io.StringIO(response.text)))
+        assert [row['id'] for row in rows] == record_ids
+        assert rows[0]['Project Notes'] == 'Island, "quartz"\nand new cabinets'
+        assert rows[0]['Project Type'] == 'Kitchen'
+
+        since = client.store.get(record_ids[6])['created_at']
+        response = test_client.get('/api/leads/export', params={'format': 'ndjson', 'since': since},
+                                   headers={'Accept-Encoding': 'gzip'})
+        assert response.headers['content-encoding'] == 'gzip'
+        leads = [json.loads(line) for line in response.text.splitlines()]
+        assert [lead['id'] for lead in leads][-4:] == record_ids[6:]
+
+        until = datetime(2000, 1, 1).isoformat()
+        assert test_client.get('/api/leads/export', params={'until': until}).text.count('\n') == 1
+        assert test_client.get('/api/leads/export', params={'format': 'xml'}).status_code == 422
+
+        # Header, then one chunk per 4 leads, produced lazily
+        chunks = collect_lead._export_chunks(client.export_leads(page_size=3), 'csv', compress=False)
+        assert next(chunks).startswith(b'id,created_at,')
+        assert len(list(chunks)) == 3
+
+    assert pages and max(pages) <= EXPORT_PAGE_SIZE + 1
+
+def test_gzip_chunks_decompress_as_they_arrive():
+    leads = iter([{'id': f'rec{i}', 'fields': {'Name': f'Lead {i}'}} for i in range(3)])
+    chunks = list(collect_lead._export_chunks(leads, 'ndjson', compress=True))
+    decompressor = zlib.decompressobj(wbits=31)
+    # Everything sent before the final chunk is already readable
+    partial = b''.join(decompressor.decompress(chunk) for chunk in chunks[:-1])
+    assert partial.decode().count('\n') == 3
+    assert gzip.decompress(b''.join(chunks)) == partial
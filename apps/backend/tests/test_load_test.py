@@ -0,0 +1,28 @@
+import asyncio
+
+from benchmarks.load_test import benchmark_in_process, compare_to_baseline, percentile
+
+def test_in_process_benchmark_reports_latency_percentiles():
+    results = asyncio.run(benchmark_in_process(['estimate', 'collect_lead', 'project_types'],
+                                               concurrency=4, total_requests=40, warmup=4))
+
+    for result in results.values():
+        assert result['requests'] == 40
+        assert result['errors'] == 0
+        assert result['throughput_rps'] > 0
+        assert 0 < result['p50_ms'] <= result['p95_ms'] <= result['p99_ms']
+
+def test_compare_to_baseline_flags_regressions_beyond_threshold():
+    baseline = {'estimate': {'throughput_rps': 1000.0, 'p50_ms': 1.0, 'p95_ms': 2.0, 'p99_ms': 3.0}}
+    within = {'estimate': {'throughput_rps': 900.0, 'p50_ms': 1.1, 'p95_ms': 2.3, 'p99_ms': 3.4, 'errors': 0}}
+    slower = {'estimate': {'throughput_rps': 500.0, 'p50_ms': 2.0, 'p95_ms': 4.0, 'p99_ms': 3.0, 'errors': 0}}
+
+    assert compare_to_baseline(within, baseline, max_regression=0.2) == []
+    regressions = compare_to_baseline(slower, baseline, max_regression=0.2)
+    assert any('p95_ms' in r for r in regressions)
+    assert any('throughput' in r for r in regressions)
+
+def test_percentile_uses_nearest_rank():
+    values = [i / 1000 for i in range(1, 101)]
+    assert percentile(values, 50) == 0.05
+    assert percentile(values, 99) == 0.099
@@ -0,0 +1,112 @@
+import json
+import os
+import signal
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import app
+import metrics
+from metrics import (HTTP_IN_FLIGHT, HTTP_REQUESTS, REGISTRY, Histogram, dependency_report,
+                     time_dependency)
+
+def test_metrics_endpoint_reports_route_templates_and_dependencies():
+    with TestClient(app) as client:
+        client.get('/api/project-types')
+        client.get('/no-such-route')
+        health = client.get('/health').json()
+        body = client.get('/metrics').text
+
+    assert 'renovai_http_requests_total{method="GET",route="/api/project-types",status="200"}' in body
+    assert 'renovai_http_requests_total{method="GET",route="unmatched",status="404"}' in body
+    assert 'renovai_dependency_duration_seconds_count{dependency="sqlite",operation="ping"}' in body
+    assert '\nrenovai_estimate_cache_entries ' in body and 'pid=' not in body
+    assert health['database']['status'] == 'connected'
+    assert health['database']['operations']['ping']['count'] >= 1
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram('test_seconds', 'Test histogram.', ('route',), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 5.0):
+        histogram.observe(value, route='/x')
+
+    lines = histogram.render()
+    assert 'test_seconds_bucket{route="/x",le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{route="/x",le="1.0"} 3' in lines
+    assert 'test_seconds_bucket{route="/x",le="+Inf"} 4' in lines
+    assert 'test_seconds_count{route="/x"} 4' in lines
+    assert histogram.quantile(0.5, route='/x') == 1.0
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='needs fork()')
+def test_forked_workers_start_with_empty_metrics():
+    # Readings the master takes while preloading, before forking workers
+    with time_dependency('sqlite', 'preload'):
+        pass
+    HTTP_REQUESTS.inc(method='GET', route='/preload', status=200)
+
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        try:
+            os.close(read_fd)
+            report = {'body': REGISTRY.render(), 'sqlite': dependency_report('sqlite')}
+            with os.fdopen(write_fd, 'w') as pipe:
+                json.dump(report, pipe)
+        finally:
+            os._exit(0)
+    os.close(write_fd)
+    with os.fdopen(read_fd) as pipe:
+        child = json.load(pipe)
+    os.waitpid(pid, 0)
+
+    assert 'operation="preload"' not in child['body'] and 'route="/preload"' not in child['body']
+    assert 'preload' not in child['sqlite']
+    assert 'operation="preload"' in REGISTRY.render() and 'preload' in dependency_report('sqlite')
+
+def _total(body, series):
+    return sum(float(line.rsplit(' ', 1)[1]) for line in body.splitlines() if line.startswith(series + ' '))
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='needs fork()')
+def test_a_scrape_of_any_worker_reports_every_workers_metrics(monkeypatch, tmp_path):
+    monkeypatch.setenv(metrics.METRICS_DIR_ENV, str(tmp_path))
+    series = 'renovai_http_requests_total{method="GET",route="/shared",status="200"}'
+    in_flight_before = HTTP_IN_FLIGHT.value()
+
+    def worker(requests, in_flight, done_fd):
+        try:
+            for _ in range(requests):
+                HTTP_REQUESTS.inc(method='GET', route='/shared', status=200)
+            HTTP_IN_FLIGHT.inc(in_flight)
+            REGISTRY.write(str(tmp_path))
+            os.write(done_fd, b'1')
+            # Stay alive, so its gauges count, until the test has scraped
+            time.sleep(30)
+        finally:
+            os._exit(0)
+
+    read_fd, write_fd = os.pipe()
+    pids = []
+    for requests, in_flight in ((3, 2), (4, 1)):
+        pid = os.fork()
+        if pid == 0:
+            os.close(read_fd)
+            worker(requests, in_flight, write_fd)
+        pids.append(pid)
+    os.close(write_fd)
+    assert os.read(read_fd, 1) + os.read(read_fd, 1) == b'11'
+    os.close(read_fd)
+
+    try:
+        body = REGISTRY.render()
+        # This process (the one scraped) plus both workers, with no per-process series
+        assert _total(body, series) == 7 and 'pid=' not in body
+        assert _total(body, 'renovai_http_requests_in_flight') == in_flight_before + 3
+    finally:
+        for pid in pids:
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+
+    # Exited workers' requests still count, so totals never go backwards; their gauges do not
+    body = REGISTRY.render()
+    assert _total(body, series) == 7
+    assert _total(body, 'renovai_http_requests_in_flight') == in_flight_before
@@ -0,0 +1,47 @@
+import threading
+
+import pytest
+
+from data import db_helper
+
+def test_reload_swaps_in_a_new_snapshot_and_version(pricing_db):
+    before = db_helper.get_pricing_snapshot()
+    assert db_helper.get_pricing_snapshot() is before
+    with pytest.raises(TypeError):
+        before.rows[('kitchen', 'basic')] = {}
+
+    pricing_db("UPDATE pricing_timeline SET cost_per_sqft = 175 WHERE project_type = 'kitchen' AND finish_level = 'basic'")
+    after = db_helper.get_pricing_snapshot()
+
+    assert after is not before and after.version != before.version
+    assert after.get('kitchen', 'basic')['cost_per_sqft'] == 175
+    # Readers still holding the old snapshot keep a consistent view
+    assert before.get('kitchen', 'basic')['cost_per_sqft'] == 150
+    assert db_helper.calculate_estimate('kitchen', 'basic', 100)['cost_per_sqft'] == 175
+
+def test_version_follows_the_data_not_the_file(pricing_db):
+    before = db_helper.get_pricing_snapshot()
+    # The file changes but the pricing data does not
+    pricing_db("UPDATE pricing_timeline SET cost_per_sqft = cost_per_sqft WHERE project_type = 'kitchen'")
+    after = db_helper.get_pricing_snapshot()
+    assert after is not before and after.version == before.version
+
+def test_concurrent_readers_see_one_snapshot_or_the_other(pricing_db):
+    old = db_helper.get_pricing_snapshot()
+    seen, stop = set(), threading.Event()
+
+    def read():
+        while not stop.is_set():
+            snapshot = db_helper.get_pricing_snapshot()
+            seen.add((snapshot.version, snapshot.get('bathroom', 'basic')['cost_per_sqft']))
+
+    readers = [threading.Thread(target=read) for _ in range(4)]
+    for reader in readers:
+        reader.start()
+    pricing_db("UPDATE pricing_timeline SET cost_per_sqft = 220 WHERE project_type = 'bathroom' AND finish_level = 'basic'")
+    new = db_helper.get_pricing_snapshot()
+    stop.set()
+    for reader in readers:
+        reader.join()
+
+    assert seen <= {(old.version, 200.0), (new.version, 220.0)}
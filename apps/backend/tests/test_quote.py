@@ -0,0 +1,41 @@
+from fastapi.testclient import TestClient
+
+from app import app
+from data.db_helper import calculate_estimate
+from data.quote import schedule_trades
+
+def test_quote_totals_match_individual_estimates():
+    items = [
+        {'project_type': 'kitchen', 'size_sqft': 200, 'finish_level': 'standard'},
+        {'project_type': 'bathroom', 'size_sqft': 80, 'finish_level': 'premium', 'quantity': 2},
+        {'project_type': 'basement', 'size_sqft': 800, 'finish_level': 'basic', 'postal_code': 'V5K 0A1'},
+    ]
+    with TestClient(app) as client:
+        response = client.post('/api/quote', json={'postal_code': 'v6b 1a1', 'items': items})
+    assert response.status_code == 200
+    quote = response.json()
+
+    expected = 0.0
+    for item, quoted in zip(items, quote['items']):
+        estimate = calculate_estimate(item['project_type'], item['finish_level'], item['size_sqft'],
+                                      item.get('postal_code', 'V6B 1A1'))
+        assert quoted['unit_cost'] == estimate['estimated_cost']
+        expected += estimate['estimated_cost'] * item.get('quantity', 1)
+    assert quote['total_cost'] == round(expected, 2)
+    assert quote['total_cost_range']['min'] < quote['total_cost'] < quote['total_cost_range']['max']
+    assert quote['timeline']['combined_weeks'] < quote['timeline']['sequential_weeks']
+
+def test_same_trade_cannot_work_two_rooms_at_once():
+    one = schedule_trades([(0, 'bathroom', 4)])
+    two = schedule_trades([(0, 'bathroom', 4), (0, 'bathroom', 4)])
+    assert one['combined_weeks'] == 4
+    # Rooms overlap across trades but each crew works one room at a time
+    assert 4 < two['combined_weeks'] < 8
+    tiling = next(t for t in two['trades'] if t['trade'] == 'tiling')
+    assert tiling['busy_weeks'] == 2.8
+
+def test_structural_work_gates_other_items():
+    timeline = schedule_trades([(0, 'kitchen', 6), (1, 'addition', 12)])
+    # Foundation and framing of the addition (45% of 12 weeks) finish before the kitchen starts
+    assert timeline['items'][0]['start_week'] == 5.4
+    assert timeline['items'][1]['start_week'] == 0.0
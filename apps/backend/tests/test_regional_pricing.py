@@ -0,0 +1,42 @@
+import sqlite3
+
+from data import db_helper, init_db
+from data.db_helper import RegionIndex
+
+REGIONS = {
+    'V': ('British Columbia', 1.0),
+    'V6': ('Vancouver', 1.1),
+    'V6B': ('Downtown Vancouver', 1.15),
+}
+
+def test_unknown_fsas_fall_back_to_their_district_then_province():
+    index = RegionIndex(REGIONS)
+    assert index.resolve('v6b 1a1') == ('Downtown Vancouver', 1.15)
+    assert index.resolve('V6A-2B3') == ('Vancouver', 1.1)
+    assert index.resolve('V9Z 9Z9') == ('British Columbia', 1.0)
+    assert index.resolve('M5V 2T6') is None
+    assert index.resolve('') is None and index.resolve(None) is None
+
+def test_estimates_apply_the_regional_multiplier():
+    snapshot = db_helper.get_pricing_snapshot()
+    base = db_helper.calculate_estimate('kitchen', 'standard', 100, snapshot=snapshot)
+    downtown = db_helper.calculate_estimate('kitchen', 'standard', 100, 'V6B 1A1', snapshot=snapshot)
+
+    assert (base['region'], base['regional_multiplier']) == (None, 1.0)
+    assert (downtown['region'], downtown['regional_multiplier']) == ('Downtown Vancouver', 1.15)
+    assert downtown['estimated_cost'] == round(base['estimated_cost'] * 1.15, 2)
+
+def test_init_db_loads_regions_from_csv(tmp_path, monkeypatch):
+    csv_path = tmp_path / 'regions.csv'
+    csv_path.write_text('postal_prefix,region_name,multiplier\n'
+                        'v6b,Downtown Vancouver,1.2\n'
+                        'V 5,Vancouver East,1.05\n', encoding='utf-8')
+    monkeypatch.setattr(init_db, 'DB_PATH', str(tmp_path / 'pricing.db'))
+
+    init_db.init_database(init_db.read_regions_csv(str(csv_path)))
+
+    with sqlite3.connect(init_db.DB_PATH) as conn:
+        rows = conn.execute('SELECT postal_prefix, region_name, multiplier FROM regional_pricing ORDER BY 1').fetchall()
+        assert conn.execute('SELECT COUNT(*) FROM pricing_timeline').fetchone()[0] == 15
+    conn.close()
+    assert rows == [('V5', 'Vancouver East', 1.05), ('V6B', 'Downtown Vancouver', 1.2)]
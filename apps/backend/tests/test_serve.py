@@ -0,0 +1,120 @@
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import httpx
+import pytest
+
+from benchmarks.load_test import BACKEND_DIR, _free_port
+
+pytestmark = pytest.mark.skipif(not hasattr(os, 'fork') or not os.path.exists('/proc'),
+                                reason='pre-fork server needs fork() and /proc')
+
+def _children(pid):
+    with open(f'/proc/{pid}/task/{pid}/children') as f:
+        return {int(child) for child in f.read().split()}
+
+def _wait_for(predicate, timeout=15.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if predicate():
+            return True
+        time.sleep(0.1)
+    return False
+
+def _healthy(base_url):
+    try:
+        return httpx.get(f'{base_url}/health', timeout=1).status_code == 200
+    except httpx.HTTPError:
+        return False
+
+@pytest.fixture
+def server(tmp_path):
+    port = _free_port()
+    env = dict(os.environ, AIRTABLE_MOCK_FILE=str(tmp_path / 'leads.jsonl'))
+    log_path = tmp_path / 'serve.log'
+    with open(log_path, 'w') as log:
+        process = subprocess.Popen(
+            [sys.executable, 'serve.py', '--host', '127.0.0.1', '--port', str(port), '--workers', '2',
+             '--graceful-timeout', '5'],
+            cwd=BACKEND_DIR, env=env, stdout=log, stderr=subprocess.STDOUT
+        )
+    process.log_path = log_path
+    base_url = f'http://127.0.0.1:{port}'
+    try:
+        # The master logs once every worker has started
+        assert _wait_for(lambda: 'workers ready in' in log_path.read_text(), timeout=30)
+        assert _healthy(base_url)
+        yield process, base_url
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+
+def test_workers_are_replaced_and_drained_on_sigterm(server):
+    process, base_url = server
+    workers = _children(process.pid)
+    assert len(workers) == 2
+
+    killed = workers.pop()
+    os.kill(killed, signal.SIGKILL)
+    assert _wait_for(lambda: len(_children(process.pid) - workers - {killed}) == 1), process.log_path.read_text()
+    assert httpx.get(f'{base_url}/api/project-types', timeout=5).status_code == 200
+
+    process.send_signal(signal.SIGTERM)
+    process.wait(timeout=20)
+    output = process.log_path.read_text()
+    assert process.returncode == 0
+    assert 'workers ready in' in output
+    assert 'Started replacement worker' in output
+
+def test_workers_exit_when_master_is_killed(server):
+    process, base_url = server
+    workers = _children(process.pid)
+
+    process.kill()
+    process.wait()
+
+    def workers_gone():
+        return not any(os.path.exists(f'/proc/{pid}') and _state(pid) != 'Z' for pid in workers)
+    assert _wait_for(workers_gone, timeout=10)
+
+def _scraped_requests(base_url):
+    series = 'renovai_http_requests_total{method="GET",route="/api/project-types",status="200"} '
+    body = httpx.get(f'{base_url}/metrics', timeout=5).text
+    assert 'pid=' not in body
+    return sum(float(line[len(series):]) for line in body.splitlines() if line.startswith(series))
+
+def test_any_worker_scraped_reports_the_totals_of_all(server):
+    process, base_url = server
+    for _ in range(20):
+        # A new connection each time, so requests spread across the workers
+        assert httpx.get(f'{base_url}/api/project-types', timeout=5).status_code == 200
+
+    readings = []
+    def caught_up():
+        readings.append(_scraped_requests(base_url))
+        return readings[-1] == 20
+    assert _wait_for(caught_up, timeout=10), readings
+    # Whichever worker answers, the total never goes backwards
+    assert readings == sorted(readings)
+    assert all(_scraped_requests(base_url) == 20 for _ in range(10))
+
+def _state(pid):
+    try:
+        with open(f'/proc/{pid}/stat') as f:
+            return f.read().rsplit(')', 1)[1].split()[0]
+    except FileNotFoundError:
+        return 'X'
+
+def test_default_workers_follow_the_cpus_this_process_may_use(monkeypatch):
+    import serve
+
+    monkeypatch.delenv('WEB_CONCURRENCY', raising=False)
+    monkeypatch.setattr(os, 'cpu_count', lambda: 64)
+    monkeypatch.setattr(os, 'sched_getaffinity', lambda pid: {0, 1}, raising=False)
+    assert serve.default_workers() == 2
+    monkeypatch.setenv('WEB_CONCURRENCY', '3')
+    assert serve.default_workers() == 3
@@ -0,0 +1,51 @@
+import os
+import subprocess
+import sys
+
+from fastapi.testclient import TestClient
+
+import startup
+from app import app
+from benchmarks.load_test import BACKEND_DIR
+from integrations.airtable_client import AirtableClient
+from routes import collect_lead
+
+def test_importing_routes_has_no_side_effects():
+    script = (
+        'import sys; before = list(sys.path); '
+        'import routes.collect_lead, routes.estimate; '
+        'assert sys.path == before, "sys.path changed"; '
+        'assert routes.collect_lead._airtable_client is None'
+    )
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([BACKEND_DIR, os.path.dirname(BACKEND_DIR)]))
+    result = subprocess.run([sys.executable, '-c', script], cwd=BACKEND_DIR, env=env,
+                            capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout == ''
+
+def test_health_reports_ready_only_while_warm(monkeypatch, tmp_path):
+    monkeypatch.setattr(startup, 'state', startup.StartupState())
+    client = AirtableClient(mock_file=str(tmp_path / 'leads.json'))
+    monkeypatch.setattr(collect_lead, '_airtable_client', client)
+
+    # The lifespan has not run, so the process is still cold
+    cold = TestClient(app).get('/health')
+    assert cold.status_code == 503
+    assert cold.json()['status'] == 'starting'
+
+    with TestClient(app) as test_client:
+        health = test_client.get('/health')
+        assert health.status_code == 200
+        report = health.json()['startup']
+        assert report['status'] == 'ready'
+        assert {'pricing', 'airtable', 'warmup'} <= set(report['cold_start_ms'])
+        airtable = health.json()['integrations']['airtable']
+        assert (airtable['mode'], airtable['leads']) == ('mock', 0) and 'operations' in airtable
+        assert '\nrenovai_ready 1\n' in test_client.get('/metrics').text
+
+    # Shutdown closed the client and dropped it from the module
+    assert collect_lead._airtable_client is None
+    monkeypatch.setattr(collect_lead, '_airtable_client', client)
+    stopped = TestClient(app).get('/health')
+    assert stopped.status_code == 503
+    assert stopped.json()['status'] == 'stopping'
@@ -3,18 +3,182 @@ RenovAI Canada - Airtable Integration Module
 Copyright (c) 2025 Saeed Alaediny. All rights reserved.
 
 This module provides integration with Airtable for lead storage.
-For MVP, this uses mock responses. Real API integration will be added in Beta.
+
+Leads are always persisted to a local journal first. Without API credentials
+that journal is the lead store (mock mode); with them it is an outbox that a
+background worker delivers to Airtable in batches, so submitting a lead never
+waits on the Airtable API.
+
+API calls share one keep-alive HTTP session per client and a token bucket per
+base that keeps requests under Airtable's 5 requests/second limit; a 429
+pauses every request to the base for the Retry-After period.
+
+With credentials, lead reads (lists, counts, exports) are served from a
+local replica of the Airtable table that a background thread syncs
+incrementally, instead of paging through the API on every call. Leads still
+waiting in the outbox are merged into those reads, so a lead counts from the
+moment it is submitted.
 """
 
+import hashlib
+import itertools
 import os
-from typing import Dict, Optional
-from datetime import datetime
-import json
+import threading
+import weakref
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+from datetime import datetime, timedelta
+
+import httpx
+
+try:
+    from integrations import record_ids
+    from integrations.airtable_replica import LeadReplica, replica_record
+    from integrations.lead_store import PENDING, LeadStore, open_lead_store
+    from integrations.lead_sync import LeadSyncWorker, SyncError, pending_sync
+    from integrations.rate_limit import shared_bucket
+except ImportError:  # run as a script from this directory
+    import record_ids
+    from airtable_replica import LeadReplica, replica_record
+    from lead_store import PENDING, LeadStore, open_lead_store
+    from lead_sync import LeadSyncWorker, SyncError, pending_sync
+    from rate_limit import shared_bucket
+
+# Airtable REST API root (override to point at a stand-in server)
+AIRTABLE_API_URL = 'https://api.airtable.com/v0'
+
+# Seconds to wait for one Airtable API request
+AIRTABLE_TIMEOUT = 30.0
+
+# Records per create/update request (Airtable's limit)
+AIRTABLE_BATCH_SIZE = 10
+
+# Records per page when listing a table (Airtable's limit)
+AIRTABLE_PAGE_SIZE = 100
+
+# Requests per second allowed per base (Airtable's limit is 5)
+AIRTABLE_RATE_LIMIT = float(os.getenv('AIRTABLE_RATE_LIMIT', '5'))
+
+# Share of the limit actually used, so network jitter never squeezes an
+# extra request into a one-second window
+RATE_LIMIT_HEADROOM = 0.9
+
+# Seconds Airtable blocks a base after a 429 when no Retry-After is given
+AIRTABLE_RATE_LIMIT_PENALTY = 30.0
+
+# Times a request is retried after 429 before giving up
+MAX_RATE_LIMIT_RETRIES = 3
+
+# Pooled keep-alive connections to the API per process
+AIRTABLE_MAX_CONNECTIONS = 10
+
+# Seconds within which a lead with the same email and phone (or the same
+# idempotency key) is a duplicate of the earlier one; 0 disables the check
+LEAD_DEDUP_WINDOW_SECONDS = float(os.getenv('LEAD_DEDUP_WINDOW_SECONDS', str(24 * 3600)))
+
+# Leads read from the store at a time when exporting
+EXPORT_PAGE_SIZE = 500
+
+class AirtableAPIError(SyncError):
+    """
+    An Airtable API request failed.
+    
+    Args:
+        message: Error description
+        status_code: HTTP status, or None for network errors
+        retry_after: Seconds the server asked us to wait, if any
+    """
+    
+    def __init__(self, message: str, status_code: Optional[int] = None, retry_after: Optional[float] = None):
+        super().__init__(message, retryable=status_code is None or status_code == 429 or status_code >= 500,
+                         retry_after=retry_after)
+        self.status_code = status_code
+
+def _retry_after_seconds(response: httpx.Response) -> float:
+    """Seconds to wait after a 429, from Retry-After (seconds) or Airtable's fixed block."""
+    try:
+        return max(0.0, float(response.headers['Retry-After']))
+    except (KeyError, ValueError):
+        return AIRTABLE_RATE_LIMIT_PENALTY
+
+def _index_key(value: str) -> str:
+    """Normalize a field value for lookups ('Full Home' and 'full_home' match)."""
+    return value.strip().lower().replace(' ', '_')
+
+def _field_key(field: str) -> Callable[[Dict], Optional[str]]:
+    def key(lead: Dict) -> Optional[str]:
+        fields = lead.get('fields')
+        value = fields.get(field) if isinstance(fields, dict) else None
+        return _index_key(value) if isinstance(value, str) and value.strip() else None
+    return key
+
+def _id_range(since: Optional[datetime], until: Optional[datetime]):
+    """Record ID bounds (exclusive) for leads created in [since, until)."""
+    return (record_ids.id_bound(since) if since else None,
+            record_ids.id_bound(until) if until else None)
+
+def _contact_key(lead: Dict) -> Optional[str]:
+    """Hash of a lead's normalized email and phone, or None if it lacks either."""
+    fields = lead.get('fields')
+    if not isinstance(fields, dict):
+        return None
+    email, phone = fields.get('Email'), fields.get('Phone')
+    if not isinstance(email, str) or not isinstance(phone, str):
+        return None
+    email = email.strip().lower()
+    # Last 10 digits, so '+1 (604) 555-0199' and '604.555.0199' match
+    digits = ''.join(char for char in phone if char.isdigit())[-10:]
+    if not email or not digits:
+        return None
+    return hashlib.blake2b(f'{email}|{digits}'.encode(), digest_size=16).hexdigest()
+
+def _idempotency_key(lead: Dict) -> Optional[str]:
+    """Hash of the idempotency key a lead was submitted with, if any."""
+    key = lead.get('idempotency_key')
+    return hashlib.blake2b(key.encode(), digest_size=16).hexdigest() if isinstance(key, str) and key else None
+
+# Secondary indexes kept by the lead store: project type, status and
+# submission day, plus contact and idempotency key hashes for duplicate checks
+# and the sync status, so leads still in the outbox are counted without a scan
+LEAD_INDEXES = {
+    'project_type': _field_key('Project Type'),
+    'status': _field_key('Status'),
+    'date': lambda lead: (lead.get('created_at') or '')[:10] or None,
+    'contact': _contact_key,
+    'idempotency_key': _idempotency_key,
+    'legacy_id': lambda lead: lead.get('legacy_id'),
+    'sync_status': lambda lead: (lead.get('sync') or {}).get('status'),
+}
+
+# Indexes whose keys mark a submission as a duplicate
+DEDUP_INDEXES = ('idempotency_key', 'contact')
+
+# Secondary indexes kept by the Airtable replica: the lead filters, plus the
+# Airtable record ID for lookups by it
+REPLICA_INDEXES = {
+    'project_type': LEAD_INDEXES['project_type'],
+    'status': LEAD_INDEXES['status'],
+    'date': LEAD_INDEXES['date'],
+    'airtable_id': lambda record: record.get('airtable_id'),
+}
+
+# Live clients, so forked children drop sessions whose sockets belong to the parent
+_clients = weakref.WeakSet()
+
+def _reset_after_fork():
+    for client in list(_clients):
+        client._http_lock = threading.Lock()
+        client._http_client = None
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
 
 class AirtableClient:
     """Client for interacting with Airtable API."""
     
-    def __init__(self, api_key: Optional[str] = None, base_id: Optional[str] = None, table_name: str = "Leads"):
+    def __init__(self, api_key: Optional[str] = None, base_id: Optional[str] = None, table_name: str = "Leads",
+                 mock_file: Optional[str] = None, api_url: Optional[str] = None,
+                 rate_limit: Optional[float] = None, dedup_window: Optional[float] = None,
+                 store_backend: Optional[str] = None, replica_max_staleness: Optional[float] = None):
         """
         Initialize Airtable client.
         
@@ -22,91 +186,568 @@ class AirtableClient:
             api_key: Airtable API key (from environment variable)
             base_id: Airtable base ID (from environment variable)
             table_name: Name of the table to store leads
+            mock_file: JSON Lines journal holding leads locally: the lead store in
+                mock mode, the delivery outbox otherwise
+                (default: AIRTABLE_MOCK_FILE or mock_leads.jsonl)
+            api_url: Airtable API root (default: AIRTABLE_API_URL or the public API)
+            rate_limit: Requests per second to allow per base (default: AIRTABLE_RATE_LIMIT or 5)
+            dedup_window: Seconds within which a repeated submission is a duplicate
+                (default: LEAD_DEDUP_WINDOW_SECONDS or 24 hours; 0 disables)
+            store_backend: Local lead store, 'journal' or 'sqlite' (default:
+                LEAD_STORE_BACKEND or 'journal'); the SQLite database sits next
+                to mock_file and imports it once
+            replica_max_staleness: Seconds of Airtable changes lead reads may miss
+                (default: AIRTABLE_REPLICA_MAX_STALENESS or 60)
         """
         self.api_key = api_key or os.getenv('AIRTABLE_API_KEY', '')
         self.base_id = base_id or os.getenv('AIRTABLE_BASE_ID', '')
         self.table_name = table_name
+        self.api_url = (api_url or os.getenv('AIRTABLE_API_URL') or AIRTABLE_API_URL).rstrip('/')
         self.use_mock = not (self.api_key and self.base_id)
+        self.dedup_window = LEAD_DEDUP_WINDOW_SECONDS if dedup_window is None else dedup_window
+        self._http_client: Optional[httpx.Client] = None
+        self._http_lock = threading.Lock()
+        _clients.add(self)
+        # Shared by every client of the same base in this process
+        self.rate_limiter = shared_bucket(self.base_id, (rate_limit or AIRTABLE_RATE_LIMIT) * RATE_LIMIT_HEADROOM)
         
         if self.use_mock:
             print("⚠️  Using mock Airtable integration (no API key/base ID provided)")
-            # Create a local JSON file to simulate lead storage
-            self.mock_file = os.path.join(os.path.dirname(__file__), 'mock_leads.json')
-            if not os.path.exists(self.mock_file):
-                with open(self.mock_file, 'w') as f:
-                    json.dump([], f)
+        # Local lead store (append-only journal by default); leads from the old
+        # mock_leads.json array file are imported on first use
+        self.mock_file = mock_file or os.getenv('AIRTABLE_MOCK_FILE') or os.path.join(os.path.dirname(__file__), 'mock_leads.jsonl')
+        if self.mock_file.endswith('.json'):
+            # Path to an old-style JSON file: keep the journal next to it
+            self.mock_file += 'l'
+        self.store = open_lead_store(self.mock_file, backend=store_backend,
+                                     legacy_json_path=os.path.splitext(self.mock_file)[0] + '.json',
+                                     indexes=LEAD_INDEXES)
+        self._rekey_legacy_leads()
+        # Started on first use, so creating a client (e.g. before forking) starts no threads
+        self.sync = None if self.use_mock else LeadSyncWorker(self.store, self._deliver_leads,
+                                                              on_synced=self._replicate_delivered)
+        # Airtable records created by the last delivery, until the worker marks their leads synced
+        self._delivered: Dict[str, Dict] = {}
+        # Local copy of the Airtable table serving lead reads, kept next to the journal
+        self.replica = None
+        if not self.use_mock:
+            replica_store = open_lead_store(os.path.splitext(self.mock_file)[0] + '.replica.jsonl',
+                                            backend=store_backend, indexes=REPLICA_INDEXES)
+            self.replica = LeadReplica(replica_store, self.list_records, max_staleness=replica_max_staleness)
     
-    def create_lead(self, lead_data: Dict) -> Dict:
+    def create_lead(self, lead_data: Dict, idempotency_key: Optional[str] = None) -> Dict:
         """
         Create a new lead record in Airtable.
         
+        The lead is durable locally when this returns; with API credentials it
+        is then delivered to Airtable in the background. A lead repeating the
+        email and phone (or the idempotency key) of one submitted within the
+        dedup window is not stored again: the original lead is returned.
+        
         Args:
             lead_data: Dictionary containing lead information
+            idempotency_key: Client-chosen key identifying this submission across retries
         
         Returns:
-            Dictionary with creation status and record ID
+            Dictionary with creation status, record ID, sync status and
+            whether the lead duplicates an earlier one
         """
         if self.use_mock:
-            return self._mock_create_lead(lead_data)
+            return self._mock_create_lead(lead_data, idempotency_key)
+        
+        lead_record, duplicate = self._store_lead(lead_data, idempotency_key, sync=pending_sync())
+        if not duplicate:
+            self.sync.notify()
         
-        # Real Airtable API integration would go here
-        # For MVP, we use mock implementation
-        return self._mock_create_lead(lead_data)
+        return {
+            'success': True,
+            'record_id': lead_record['id'],
+            'message': ('Lead already received' if duplicate
+                        else 'Lead stored successfully; delivery to Airtable queued'),
+            'created_at': lead_record['created_at'],
+            'sync_status': (lead_record.get('sync') or {}).get('status'),
+            'duplicate': duplicate
+        }
     
-    def _mock_create_lead(self, lead_data: Dict) -> Dict:
+    def _mock_create_lead(self, lead_data: Dict, idempotency_key: Optional[str] = None) -> Dict:
         """
         Mock implementation of lead creation for MVP testing.
         
         Args:
             lead_data: Dictionary containing lead information
+            idempotency_key: Client-chosen key identifying this submission across retries
         
         Returns:
             Dictionary with creation status and mock record ID
         """
-        # Add timestamp and generate mock ID
+        lead_record, duplicate = self._store_lead(lead_data, idempotency_key)
+        
+        if duplicate:
+            print(f"♻️  Duplicate lead, returning {lead_record['id']}")
+        else:
+            print(f"✅ Mock lead created: {lead_record['id']}")
+        
+        return {
+            'success': True,
+            'record_id': lead_record['id'],
+            'message': 'Lead already received (mock mode)' if duplicate else 'Lead stored successfully (mock mode)',
+            'created_at': lead_record['created_at'],
+            'duplicate': duplicate
+        }
+    
+    def _store_lead(self, lead_data: Dict, idempotency_key: Optional[str] = None,
+                    sync: Optional[Dict] = None) -> Tuple[Dict, bool]:
+        """
+        Persist a new lead in the local journal, unless it is a duplicate.
+        
+        Args:
+            lead_data: Dictionary containing lead information
+            idempotency_key: Client-chosen key identifying this submission across retries
+            sync: Initial sync state, if the lead is to be delivered to Airtable
+        
+        Returns:
+            (stored lead record, False), or (the earlier lead, True) for a duplicate
+        """
+        # Time-sortable, collision-free record ID; created_at is the time it encodes
+        record_id, created_ms = record_ids.generator.new()
+        created = datetime.fromtimestamp(created_ms / 1000)
         lead_record = {
-            'id': f"rec{datetime.now().strftime('%Y%m%d%H%M%S')}",
-            'created_at': datetime.now().isoformat(),
+            'id': record_id,
+            'created_at': created.isoformat(timespec='milliseconds'),
             'fields': lead_data
         }
+        if idempotency_key:
+            lead_record['idempotency_key'] = idempotency_key
+        if sync is not None:
+            lead_record['sync'] = sync
         
-        # Store in local JSON file
-        try:
-            with open(self.mock_file, 'r') as f:
-                leads = json.load(f)
-        except (FileNotFoundError, json.JSONDecodeError):
-            leads = []
+        if self.dedup_window <= 0:
+            self.store.append(lead_record)
+            return lead_record, False
         
-        leads.append(lead_record)
+        # Check and write atomically in the journal's writer (durable once this
+        # returns); only leads created within the window count as duplicates
+        window_start = record_ids.id_bound(created - timedelta(seconds=self.dedup_window))
+        original_id = self.store.append(lead_record, unique=DEDUP_INDEXES, after=window_start)
+        if original_id is None:
+            return lead_record, False
+        original = self.store.get(original_id)
+        return (original or {'id': original_id, 'created_at': lead_record['created_at']}), True
+    
+    def _rekey_legacy_leads(self):
+        """
+        Move leads stored under legacy 'recYYYYMMDD...' IDs to time-sortable IDs.
         
-        with open(self.mock_file, 'w') as f:
-            json.dump(leads, f, indent=2)
+        Legacy IDs sort after every time-sortable one, so they would fall in
+        every since-only range and every dedup window. Each such lead is
+        stored again under an ID encoding its creation time, keeping the old
+        ID as legacy_id for lookups, and the old version is deleted.
+        """
+        after = record_ids.LEGACY_ID_FLOOR
+        while True:
+            page = self.store.query(after=after, limit=EXPORT_PAGE_SIZE)
+            if not page:
+                return
+            after = page[-1]['id']
+            rekeyed = []
+            for lead in page:
+                created = record_ids.legacy_id_time(lead['id'])
+                if created is None:
+                    continue
+                try:
+                    created = datetime.fromisoformat(lead['created_at'])
+                except (KeyError, TypeError, ValueError):
+                    pass
+                rekeyed.append(dict(lead, id=record_ids.rekeyed_id(lead['id'], created), legacy_id=lead['id']))
+            self.store.put_many(rekeyed)
+            for lead in rekeyed:
+                self.store.delete(lead['legacy_id'])
+    
+    def _local_lead(self, record_id: str) -> Optional[Dict]:
+        """Lead in the local store by its record ID, or by the legacy ID it was re-keyed from."""
+        lead = self.store.get(record_id)
+        if lead is None and record_ids.legacy_id_time(record_id) is not None:
+            matches = self.store.query({'legacy_id': [record_id]}, limit=1)
+            lead = matches[0] if matches else None
+        return lead
+    
+    def _http(self) -> httpx.Client:
+        """Keep-alive HTTP session for the Airtable API, created on first use."""
+        with self._http_lock:
+            if self._http_client is None:
+                self._http_client = httpx.Client(
+                    base_url=f"{self.api_url}/{self.base_id}/",
+                    headers={'Authorization': f'Bearer {self.api_key}'},
+                    timeout=AIRTABLE_TIMEOUT,
+                    limits=httpx.Limits(max_connections=AIRTABLE_MAX_CONNECTIONS,
+                                        max_keepalive_connections=AIRTABLE_MAX_CONNECTIONS)
+                )
+            return self._http_client
+    
+    def _request(self, method: str, json: Optional[Dict] = None, params: Optional[Dict] = None) -> Dict:
+        """
+        Send one request to the table, paced by the base's token bucket.
         
-        print(f"✅ Mock lead created: {lead_record['id']}")
+        A 429 pauses every request to the base for the Retry-After period
+        (Airtable's 30 second block if the header is missing) before retrying.
         
-        return {
-            'success': True,
-            'record_id': lead_record['id'],
-            'message': 'Lead stored successfully (mock mode)',
-            'created_at': lead_record['created_at']
-        }
+        Args:
+            method: HTTP method
+            json: Request body
+            params: Query string parameters
+        
+        Returns:
+            Decoded JSON response
+        
+        Raises:
+            AirtableAPIError: If the request fails; retryable for network errors, 429 and 5xx
+        """
+        session = self._http()
+        for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+            # Take the token last, right before sending, so requests leave evenly spaced
+            self.rate_limiter.acquire()
+            try:
+                response = session.request(method, self.table_name, json=json, params=params)
+            except httpx.HTTPError as e:
+                raise AirtableAPIError(f"Airtable request failed: {e}")
+            if response.status_code != 429:
+                break
+            retry_after = _retry_after_seconds(response)
+            self.rate_limiter.pause(retry_after)
+            print(f"⚠️  Airtable rate limit reached; pausing requests for {retry_after:.0f}s")
+        
+        if response.status_code != 200:
+            raise AirtableAPIError(
+                f"Airtable returned {response.status_code}: {response.text[:200]}",
+                status_code=response.status_code,
+                retry_after=_retry_after_seconds(response) if response.status_code == 429 else None
+            )
+        return response.json()
+    
+    def create_records(self, records: List[Dict]) -> List[Dict]:
+        """
+        Create records in the Airtable table, 10 per request.
+        
+        Args:
+            records: Field dictionaries of the records to create
+        
+        Returns:
+            Created Airtable records (id, createdTime, fields), in the same order
+        
+        Raises:
+            AirtableAPIError: If a request fails (earlier chunks stay created)
+        """
+        created = []
+        for start in range(0, len(records), AIRTABLE_BATCH_SIZE):
+            chunk = records[start:start + AIRTABLE_BATCH_SIZE]
+            response = self._request('POST', {'records': [{'fields': fields} for fields in chunk], 'typecast': True})
+            created.extend(response['records'])
+        return created
+    
+    def update_records(self, updates: List[Dict]) -> List[Dict]:
+        """
+        Update fields of existing Airtable records, 10 per request.
+        
+        Args:
+            updates: Dictionaries with the Airtable record 'id' and the 'fields' to change
+        
+        Returns:
+            Updated Airtable records, in the same order
+        
+        Raises:
+            AirtableAPIError: If a request fails (earlier chunks stay updated)
+        """
+        updated = []
+        for start in range(0, len(updates), AIRTABLE_BATCH_SIZE):
+            chunk = updates[start:start + AIRTABLE_BATCH_SIZE]
+            response = self._request('PATCH', {'records': [{'id': update['id'], 'fields': update['fields']}
+                                                           for update in chunk], 'typecast': True})
+            updated.extend(response['records'])
+        return updated
     
-    def get_all_leads(self) -> list:
+    def list_records(self, filter_by_formula: Optional[str] = None,
+                     page_size: int = AIRTABLE_PAGE_SIZE) -> Iterator[Dict]:
         """
-        Retrieve all leads (mock implementation for testing).
+        Stream the records of the Airtable table, one page per request.
+        
+        Args:
+            filter_by_formula: Airtable formula records must satisfy
+            page_size: Records per request (Airtable allows at most 100)
         
         Returns:
-            List of all lead records
+            Iterator over Airtable records (id, createdTime, fields)
+        
+        Raises:
+            AirtableAPIError: If a request fails
+        """
+        params = {'pageSize': page_size}
+        if filter_by_formula:
+            params['filterByFormula'] = filter_by_formula
+        while True:
+            response = self._request('GET', params=params)
+            yield from response.get('records', [])
+            offset = response.get('offset')
+            if not offset:
+                return
+            params['offset'] = offset
+    
+    def _deliver_leads(self, records: List[Dict]) -> List[str]:
+        """Create one batch of outbox leads in Airtable; returns their Airtable IDs."""
+        created = self.create_records(records)
+        self._delivered = {record['id']: record for record in created}
+        return [record['id'] for record in created]
+    
+    def _replicate_delivered(self, leads: List[Dict]):
+        """Write leads just marked synced to the replica, so reads keep seeing them until its next sync."""
+        created = [self._delivered.pop(lead['sync']['airtable_id'], None) for lead in leads]
+        self.replica.store.put_many([replica_record(record) for record in created if record is not None])
+    
+    def start_sync(self):
+        """Start delivering queued leads to Airtable and refreshing the replica in the background (no-op in mock mode)."""
+        if self.sync is not None:
+            self.sync.start()
+        if self.replica is not None:
+            self.replica.start()
+    
+    def _read_store(self) -> LeadStore:
+        """
+        Store serving lead reads: the local store in mock mode, otherwise the
+        Airtable replica as of its last sync.
+        
+        Reads never wait on Airtable; the replica's background thread (started
+        here if need be) keeps it fresh, and until its first load completes
+        the replica is empty.
         """
         if self.use_mock:
-            try:
-                with open(self.mock_file, 'r') as f:
-                    return json.load(f)
-            except (FileNotFoundError, json.JSONDecodeError):
-                return []
+            return self.store
+        self.replica.start()
+        return self.replica.store
+    
+    @staticmethod
+    def _pending(filters: Dict[str, List[str]]) -> Dict[str, List[str]]:
+        """Index filters selecting the leads among `filters` still in the outbox, not yet in Airtable."""
+        return {**filters, 'sync_status': [PENDING]}
+    
+    def _count_pending(self, filters: Dict[str, List[str]], after: Optional[str] = None,
+                       before: Optional[str] = None) -> int:
+        """
+        Count leads in the outbox that match the filters and ID bounds
+        (exclusive) from the store's indexes; none in mock mode, where every
+        lead is read from the local store.
+        """
+        if self.use_mock:
+            return 0
+        return self.store.count(self._pending(filters), after=after, before=before)
+    
+    def _pending_leads(self, filters: Dict[str, List[str]], after: Optional[str] = None,
+                       before: Optional[str] = None, limit: int = EXPORT_PAGE_SIZE) -> List[Dict]:
+        """
+        One page of leads in the outbox that match the filters and ID bounds
+        (exclusive); none in mock mode.
+        
+        Returns:
+            Up to `limit` matching leads in creation order
+        """
+        if self.use_mock:
+            return []
+        return self.store.query(self._pending(filters), after=after, limit=limit, before=before)
+    
+    def _all_pending_leads(self) -> Iterator[Dict]:
+        """Stream every lead in the outbox, a page at a time."""
+        after = None
+        while True:
+            page = self._pending_leads({}, after=after)
+            yield from page
+            if len(page) < EXPORT_PAGE_SIZE:
+                return
+            after = page[-1]['id']
+    
+    def get_lead(self, record_id: str) -> Optional[Dict]:
+        """
+        Retrieve one lead by local or Airtable record ID.
+        
+        Returns:
+            The lead record, or None if not found
+        """
+        lead = self._local_lead(record_id)
+        if lead is not None or self.use_mock:
+            return lead
+        
+        matches = self._read_store().query({'airtable_id': [record_id]}, limit=1)
+        return matches[0] if matches else None
+    
+    def get_all_leads(self) -> Iterator[Dict]:
+        """
+        Stream all leads.
+        
+        Returns:
+            Iterator over lead records; leads not yet delivered to Airtable come last
+        """
+        return itertools.chain(self._read_store().iter_records(), self._all_pending_leads())
+    
+    def export_leads(self, since: Optional[datetime] = None, until: Optional[datetime] = None,
+                     page_size: int = EXPORT_PAGE_SIZE) -> Iterator[Dict]:
+        """
+        Stream leads in creation order, a page at a time, for exports.
+        
+        Only one page is held in memory, and the store is not locked between
+        pages, so an export of any size neither grows memory nor blocks new leads.
         
-        # Real Airtable API would be called here
-        return []
+        Args:
+            since: Only leads created at or after this time
+            until: Only leads created before this time
+            page_size: Leads read from the store at a time
+        
+        Returns:
+            Iterator over lead records
+        """
+        cursor = None
+        while True:
+            page = self.list_leads(since=since, until=until, cursor=cursor, limit=page_size)
+            yield from page['leads']
+            cursor = page['next_cursor']
+            if cursor is None:
+                return
+    
+    def count_leads(self, project_type: Optional[str] = None, status: Optional[str] = None,
+                    date_from: Optional[str] = None, date_to: Optional[str] = None,
+                    since: Optional[datetime] = None, until: Optional[datetime] = None) -> int:
+        """
+        Count stored leads from the store's indexes, without reading them.
+        
+        Args:
+            project_type: Only leads of this project type (e.g. 'full_home')
+            status: Only leads with this status (e.g. 'new')
+            date_from: Only leads submitted on or after this date (YYYY-MM-DD)
+            date_to: Only leads submitted on or before this date (YYYY-MM-DD)
+            since: Only leads created at or after this time
+            until: Only leads created before this time
+        
+        Returns:
+            Number of matching lead records
+        """
+        store = self._read_store()
+        filters = self._lead_filters(store, project_type, status, date_from, date_to)
+        after, before = _id_range(since, until)
+        return store.count(filters, after=after, before=before) + self._count_pending(filters, after, before)
+    
+    def list_leads(self, project_type: Optional[str] = None, status: Optional[str] = None,
+                   date_from: Optional[str] = None, date_to: Optional[str] = None,
+                   cursor: Optional[str] = None, limit: int = 50,
+                   since: Optional[datetime] = None, until: Optional[datetime] = None) -> Dict:
+        """
+        Read one page of leads in creation order, optionally filtered.
+        
+        Pages use keyset pagination: pass the previous page's next_cursor to
+        continue, and leads added meanwhile never shift or repeat entries.
+        Record IDs sort by creation time, so a since/until range is a binary
+        search over the ID index rather than a scan.
+        
+        Args:
+            project_type: Only leads of this project type (e.g. 'full_home')
+            status: Only leads with this status (e.g. 'new')
+            date_from: Only leads submitted on or after this date (YYYY-MM-DD)
+            date_to: Only leads submitted on or before this date (YYYY-MM-DD)
+            cursor: next_cursor of the previous page
+            since: Only leads created at or after this time
+            until: Only leads created before this time
+            limit: Most leads per page
+        
+        Returns:
+            Dictionary with the page of leads and next_cursor (None on the last page)
+        """
+        store = self._read_store()
+        filters = self._lead_filters(store, project_type, status, date_from, date_to)
+        # One extra lead tells whether another page follows
+        after, before = _id_range(since, until)
+        if cursor and (after is None or cursor > after):
+            after = cursor
+        leads = store.query(filters, after=after, limit=limit + 1, before=before)
+        pending = self._pending_leads(filters, after, before, limit=limit + 1)
+        if pending:
+            leads = sorted(leads + pending, key=lambda lead: lead['id'])[:limit + 1]
+        next_cursor = leads[limit - 1]['id'] if len(leads) > limit else None
+        return {'leads': leads[:limit], 'next_cursor': next_cursor}
+    
+    def lead_breakdown(self) -> Dict[str, Dict[str, int]]:
+        """
+        Lead counts per project type and per status.
+        
+        Returns:
+            Dictionary with by_project_type and by_status counts
+        """
+        store = self._read_store()
+        breakdown = {'by_project_type': dict(store.keys('project_type')), 'by_status': dict(store.keys('status'))}
+        if self.use_mock:
+            return breakdown
+        # Few distinct keys, each counted from the indexes
+        for name, counts in (('project_type', breakdown['by_project_type']), ('status', breakdown['by_status'])):
+            for key in self.store.keys(name):
+                pending = self._count_pending({name: [key]})
+                if pending:
+                    counts[key] = counts.get(key, 0) + pending
+        return breakdown
+    
+    def _lead_filters(self, store: LeadStore, project_type: Optional[str], status: Optional[str],
+                      date_from: Optional[str], date_to: Optional[str]) -> Dict[str, List[str]]:
+        """Translate lead query parameters into secondary index filters."""
+        filters = {}
+        if project_type:
+            filters['project_type'] = [_index_key(project_type)]
+        if status:
+            filters['status'] = [_index_key(status)]
+        if date_from or date_to:
+            # One index entry per submission day, so a range covers few keys;
+            # days of leads still in the outbox count too
+            days = set(store.keys('date')) | set(self.store.keys('date'))
+            filters['date'] = [day for day in sorted(days)
+                               if (not date_from or day >= date_from) and (not date_to or day <= date_to)]
+        return filters
+    
+    def get_lead_status(self, record_id: str) -> Optional[Dict]:
+        """
+        Report whether a lead has reached Airtable.
+        
+        Args:
+            record_id: Record ID returned by create_lead
+        
+        Returns:
+            Dictionary with the sync status ('local' in mock mode, otherwise
+            'pending', 'synced' or 'failed') and delivery details, or None if
+            no such lead was stored here
+        """
+        lead = self._local_lead(record_id)
+        if lead is None:
+            return None
+        sync = lead.get('sync') or {'status': 'local'}
+        return dict(sync, record_id=record_id, created_at=lead['created_at'])
+    
+    def status(self) -> Dict:
+        """
+        Integration state for the health endpoint.
+        
+        Returns:
+            Dictionary with the mode ('mock' without credentials, otherwise
+            'live'), the number of locally stored leads in mock mode, and
+            with credentials the outbox backlog and the replica's freshness
+        """
+        if self.use_mock:
+            return {'mode': 'mock', 'leads': len(self.store)}
+        return {'mode': 'live', 'base_id': self.base_id, 'outbox': self.sync.status(),
+                'replica': self.replica.status()}
+    
+    def close(self):
+        """Stop background delivery and replica refreshes, release the local stores and close the HTTP session."""
+        if self.sync is not None:
+            self.sync.stop()
+        if self.replica is not None:
+            self.replica.stop()
+            self.replica.store.close()
+        self.store.close()
+        with self._http_lock:
+            if self._http_client is not None:
+                self._http_client.close()
+            self._http_client = None
 
 # Example usage and testing
 if __name__ == '__main__':
@@ -129,6 +770,5 @@ if __name__ == '__main__':
     print(f"\nTest Result: {result}")
     
     # Display all leads
-    all_leads = client.get_all_leads()
-    print(f"\nTotal leads stored: {len(all_leads)}")
+    print(f"\nTotal leads stored: {client.count_leads()}")
 
@@ -0,0 +1,270 @@
+"""
+RenovAI Canada - Local Replica of the Airtable Lead Table
+Copyright (c) 2025 Saeed Alaediny. All rights reserved.
+
+Lead reads (lists, counts, exports) are served from a local copy of the
+Airtable table instead of paging through the remote table on every call.
+The replica starts with one full load, then fetches only the records
+modified since the previous sync (filterByFormula on LAST_MODIFIED_TIME()).
+Incremental syncs cannot see deletions, so the replica is fully reloaded
+again at a longer interval.
+
+Reads never wait on Airtable: they see the replica as of its last sync. A
+background thread syncs whenever the replica may miss more than half of
+`max_staleness` seconds of changes (one sync at a time, across threads and
+processes), so while Airtable is reachable reads lag it by at most that
+bound; when it is not, reads keep serving the last synced state.
+
+Replica records use time-sortable IDs built from the Airtable createdTime
+and record ID, so they page in creation order and since/until ranges work
+as they do on the local lead store.
+"""
+
+import json
+import os
+import threading
+import time
+import weakref
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:  # no file locking on this platform; single process only
+    fcntl = None
+
+try:
+    from integrations import record_ids
+    from integrations.lead_store import LeadStore
+except ImportError:  # run as a script from this directory
+    import record_ids
+    from lead_store import LeadStore
+
+# Seconds of Airtable changes a read may miss
+REPLICA_MAX_STALENESS_SECONDS = float(os.getenv('AIRTABLE_REPLICA_MAX_STALENESS', '60'))
+
+# Seconds between full reloads, which drop records deleted in Airtable
+REPLICA_FULL_RELOAD_SECONDS = float(os.getenv('AIRTABLE_REPLICA_FULL_RELOAD', str(24 * 3600)))
+
+# Incremental syncs re-read changes this many seconds older than the last
+# sync, so clock skew between us and Airtable cannot lose an update
+SYNC_OVERLAP_SECONDS = 60.0
+
+# Replica records written per store write
+SYNC_WRITE_BATCH = 500
+
+def replica_record(record: Dict) -> Dict:
+    """
+    Convert an Airtable record into a replica record.
+
+    The replica ID starts like a local lead ID for its creation time, then
+    carries the Airtable record ID, so replica IDs sort by creation time.
+    """
+    created = datetime.fromisoformat(record['createdTime'].replace('Z', '+00:00')).astimezone()
+    return {
+        'id': record_ids.id_bound(created) + record['id'][len(record_ids.PREFIX):],
+        'airtable_id': record['id'],
+        'created_at': created.replace(tzinfo=None).isoformat(timespec='milliseconds'),
+        'fields': record.get('fields') or {},
+    }
+
+def _formula_time(moment: float) -> str:
+    return datetime.fromtimestamp(moment, timezone.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+
+# Live replicas, so forked children get their own locks and refresh thread
+_replicas = weakref.WeakSet()
+
+def _reset_after_fork():
+    for replica in list(_replicas):
+        replica._reset_after_fork()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+class LeadReplica:
+    """
+    Local copy of an Airtable table, refreshed by a background thread.
+
+    Args:
+        store: Lead store holding the replica records
+        fetch: Streams Airtable records, optionally only those matching an
+            Airtable formula (AirtableClient.list_records)
+        max_staleness: Seconds of Airtable changes a read may miss while
+            Airtable is reachable (default: AIRTABLE_REPLICA_MAX_STALENESS or 60)
+        full_reload_interval: Seconds between full reloads
+            (default: AIRTABLE_REPLICA_FULL_RELOAD or 24 hours)
+    """
+
+    def __init__(self, store: LeadStore, fetch: Callable[[Optional[str]], Iterator[Dict]],
+                 max_staleness: Optional[float] = None, full_reload_interval: Optional[float] = None):
+        self.store = store
+        self.fetch = fetch
+        self.max_staleness = REPLICA_MAX_STALENESS_SECONDS if max_staleness is None else max_staleness
+        self.full_reload_interval = REPLICA_FULL_RELOAD_SECONDS if full_reload_interval is None else full_reload_interval
+        # Shared by every process replicating into this store
+        self.state_path = store.path + '.replica-state'
+        self._state: Dict = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._thread_lock = threading.Lock()
+        _replicas.add(self)
+
+    def _reset_after_fork(self):
+        self._lock = threading.Lock()
+        self._thread_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def synced_as_of(self) -> Optional[float]:
+        """Epoch time up to which the replica holds every Airtable change, or None before the first sync."""
+        return self._state.get('synced_as_of')
+
+    def status(self) -> Dict:
+        """
+        Freshness of the replica for health checks, as last synced by any process.
+
+        Returns:
+            Dictionary with the record count, the time up to which the replica
+            holds every Airtable change and its age in seconds (None before the
+            first sync), the last full load, and whether this process refreshes it
+        """
+        # Read without replacing the state a sync in progress works from
+        state = self._load_state()
+        synced_as_of, full_load_at = state.get('synced_as_of'), state.get('full_load_at')
+        return {
+            'records': len(self.store),
+            'synced_as_of': datetime.fromtimestamp(synced_as_of).isoformat() if synced_as_of else None,
+            'age_seconds': round(time.time() - synced_as_of, 1) if synced_as_of else None,
+            'max_staleness_seconds': self.max_staleness,
+            'full_load_at': datetime.fromtimestamp(full_load_at).isoformat() if full_load_at else None,
+            'refreshing': self._thread is not None,
+        }
+
+    def _load_state(self) -> Dict:
+        try:
+            with open(self.state_path, 'r') as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    def _read_state(self) -> Dict:
+        self._state = self._load_state()
+        return self._state
+
+    def _write_state(self, state: Dict):
+        tmp_path = f'{self.state_path}.{os.getpid()}'
+        with open(tmp_path, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_path, self.state_path)
+        self._state = state
+
+    def _is_fresh(self, now: float, max_age: float) -> bool:
+        synced_as_of = self.synced_as_of
+        return synced_as_of is not None and now - synced_as_of <= max_age
+
+    @contextmanager
+    def _sync_lock(self):
+        """One sync at a time across threads and processes."""
+        with self._lock:
+            fd = os.open(self.state_path + '.lock', os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_EX)
+                yield
+            finally:
+                os.close(fd)
+
+    def ensure_fresh(self, max_age: Optional[float] = None):
+        """
+        Sync if the replica may miss changes older than max_age seconds
+        (default: max_staleness).
+
+        Raises:
+            AirtableAPIError: If a sync is due and Airtable cannot be read
+        """
+        max_age = self.max_staleness if max_age is None else max_age
+        if self._is_fresh(time.time(), max_age):
+            return
+        with self._sync_lock():
+            # Another thread or process may have synced while we waited
+            if not self._is_fresh(time.time(), max_age) and not self._is_fresh_on_disk(max_age):
+                self._sync()
+
+    def _is_fresh_on_disk(self, max_age: float) -> bool:
+        self._read_state()
+        return self._is_fresh(time.time(), max_age)
+
+    def sync(self, full: bool = False) -> int:
+        """
+        Bring the replica up to date with Airtable.
+
+        Args:
+            full: Reload every record (otherwise only a full reload is due, or
+                there has been none yet)
+
+        Returns:
+            Number of records written to the replica
+
+        Raises:
+            AirtableAPIError: If Airtable cannot be read
+        """
+        with self._sync_lock():
+            self._read_state()
+            return self._sync(full)
+
+    def _sync(self, full: bool = False) -> int:
+        """Fetch changes and apply them (sync lock held)."""
+        state = self._state
+        started = time.time()
+        full = (full or state.get('full_load_at') is None or
+                started - state['full_load_at'] >= self.full_reload_interval)
+        formula = None
+        if not full:
+            since = state['synced_as_of'] - SYNC_OVERLAP_SECONDS
+            formula = f"IS_AFTER(LAST_MODIFIED_TIME(), '{_formula_time(since)}')"
+
+        seen = set()
+        written, batch = 0, []
+        for record in self.fetch(formula):
+            batch.append(replica_record(record))
+            seen.add(batch[-1]['id'])
+            if len(batch) >= SYNC_WRITE_BATCH:
+                self.store.put_many(batch)
+                written, batch = written + len(batch), []
+        self.store.put_many(batch)
+        written += len(batch)
+        if full:
+            # Whatever the full load did not return was deleted in Airtable
+            for record_id in [record['id'] for record in self.store.iter_records() if record['id'] not in seen]:
+                self.store.delete(record_id)
+
+        self._write_state({'synced_as_of': started, 'full_load_at': started if full else state['full_load_at']})
+        print(f"🔄 Airtable replica {'loaded' if full else 'synced'}: {written} records")
+        return written
+
+    def start(self):
+        """Keep the replica fresh from a background thread (idempotent; reads call it)."""
+        with self._thread_lock:
+            if self._thread is None:
+                self._stop.clear()
+                self._thread = threading.Thread(target=self._run, name='airtable-replica', daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        with self._thread_lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join()
+
+    def _run(self):
+        while not self._stop.is_set():
+            # Syncing at half the bound, checked every half, keeps reads within it
+            try:
+                self.ensure_fresh(self.max_staleness / 2)
+            except Exception as e:
+                print(f"❌ Airtable replica sync error: {e}")
+            self._stop.wait(max(0.1, self.max_staleness / 2))
@@ -0,0 +1,333 @@
+"""
+RenovAI Canada - Local Airtable Stand-in Server
+Copyright (c) 2025 Saeed Alaediny. All rights reserved.
+
+A small in-memory imitation of the Airtable REST API for tests, benchmarks
+and offline development. It implements the parts RenovAI uses:
+
+- POST /v0/{base_id}/{table} creates up to 10 records per request
+- PATCH /v0/{base_id}/{table} updates up to 10 records per request
+- DELETE /v0/{base_id}/{table}?records[]=... deletes up to 10 records
+- GET /v0/{base_id}/{table} lists records in creation order, pageSize (at
+  most 100) at a time, returning an offset to pass back for the next page;
+  filterByFormula supports IS_AFTER(LAST_MODIFIED_TIME(), '<ISO time>')
+- Bearer token authentication
+- The per-base request rate limit: over it, every request to the base gets
+  429 for a penalty period (30 seconds on Airtable), with Retry-After
+- Injected failures and latency, to exercise retries
+
+Run it standalone and point AIRTABLE_API_URL at it:
+
+    python airtable_standin.py --port 8089
+    AIRTABLE_API_URL=http://127.0.0.1:8089/v0 AIRTABLE_API_KEY=test AIRTABLE_BASE_ID=appTest ...
+"""
+
+import argparse
+import json
+import math
+import re
+import threading
+import time
+from collections import defaultdict, deque
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from itertools import count
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+# Airtable accepts at most this many records per create/update request
+MAX_RECORDS_PER_REQUEST = 10
+
+# Seconds a base stays blocked after exceeding the rate limit
+RATE_LIMIT_PENALTY_SECONDS = 30.0
+
+# Most records per page when listing (Airtable's limit and default)
+MAX_PAGE_SIZE = 100
+
+# The one filterByFormula the stand-in understands: records modified after a time
+MODIFIED_AFTER_FORMULA = re.compile(r"^IS_AFTER\(LAST_MODIFIED_TIME\(\), *'([^']+)'\)$")
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+def _timestamp(moment: datetime) -> str:
+    return moment.isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+
+class AirtableStandIn:
+    """
+    In-memory Airtable API served over HTTP on a background thread.
+
+    Args:
+        api_key: Token that requests must present as 'Authorization: Bearer <token>'
+        host: Interface to bind
+        port: Port to bind (0 picks a free one)
+        latency: Seconds to wait before answering each request
+        rate_limit: Requests per second allowed per base (None for no limit;
+            Airtable allows 5)
+        rate_limit_penalty: Seconds a base answers 429 after exceeding the limit
+    """
+
+    def __init__(self, api_key: str = 'test-key', host: str = '127.0.0.1', port: int = 0, latency: float = 0.0,
+                 rate_limit: Optional[float] = None, rate_limit_penalty: float = RATE_LIMIT_PENALTY_SECONDS):
+        self.api_key = api_key
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.rate_limit_penalty = rate_limit_penalty
+        self.rate_limited = 0                  # requests answered with 429
+        self._recent: Dict[str, deque] = defaultdict(deque)
+        self._blocked_until: Dict[str, float] = {}
+        self.tables: Dict[Tuple[str, str], Dict[str, Dict]] = defaultdict(dict)
+        self._modified: Dict[str, datetime] = {}   # record ID -> last modified time
+        self.requests: List[Dict] = []         # method, path and record count of every request
+        self._failures: List[Tuple[int, Dict]] = []
+        self._lock = threading.Lock()
+        self._ids = count(1)
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """API root to use as AIRTABLE_API_URL."""
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}/v0'
+
+    def start(self) -> 'AirtableStandIn':
+        self._thread = threading.Thread(target=self._server.serve_forever, name='airtable-standin', daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        """Serve on the calling thread until interrupted."""
+        try:
+            self._server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._server.server_close()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> 'AirtableStandIn':
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+    def fail_next(self, times: int = 1, status: int = 503, error: Optional[Dict] = None):
+        """Answer the next `times` API requests with an error instead of handling them."""
+        error = error or {'type': 'SERVICE_UNAVAILABLE', 'message': 'Injected failure'}
+        with self._lock:
+            self._failures.extend([(status, error)] * times)
+
+    def records(self, base_id: str, table: str) -> List[Dict]:
+        """Stored records of a table, in creation order."""
+        with self._lock:
+            return list(self.tables[(base_id, table)].values())
+
+    def _throttle(self, base_id: str) -> Optional[float]:
+        """Count a request against the base's rate limit; returns seconds to wait if it is over."""
+        if not self.rate_limit:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            blocked_until = self._blocked_until.get(base_id, 0.0)
+            if now < blocked_until:
+                self.rate_limited += 1
+                return blocked_until - now
+            recent = self._recent[base_id]
+            while recent and recent[0] <= now - 1.0:
+                recent.popleft()
+            if len(recent) >= self.rate_limit:
+                self._blocked_until[base_id] = now + self.rate_limit_penalty
+                self.rate_limited += 1
+                return self.rate_limit_penalty
+            recent.append(now)
+        return None
+
+    def _create(self, base_id: str, table: str, body: Dict) -> Tuple[int, Dict]:
+        records = body.get('records')
+        if not isinstance(records, list) or not records:
+            return 422, {'error': {'type': 'INVALID_REQUEST_MISSING_FIELDS', 'message': 'Missing records'}}
+        if len(records) > MAX_RECORDS_PER_REQUEST:
+            return 422, {'error': {'type': 'INVALID_RECORDS',
+                                   'message': f'You can create up to {MAX_RECORDS_PER_REQUEST} records per request'}}
+        if not all(isinstance(record.get('fields'), dict) for record in records):
+            return 422, {'error': {'type': 'INVALID_RECORDS', 'message': 'Each record needs a fields object'}}
+
+        now = _now()
+        created = []
+        with self._lock:
+            table_records = self.tables[(base_id, table)]
+            for record in records:
+                stored = {'id': f'rec{next(self._ids):014d}', 'createdTime': _timestamp(now), 'fields': record['fields']}
+                table_records[stored['id']] = stored
+                self._modified[stored['id']] = now
+                created.append(stored)
+        return 200, {'records': created}
+
+    def _update(self, base_id: str, table: str, body: Dict) -> Tuple[int, Dict]:
+        records = body.get('records')
+        if not isinstance(records, list) or not records:
+            return 422, {'error': {'type': 'INVALID_REQUEST_MISSING_FIELDS', 'message': 'Missing records'}}
+        if len(records) > MAX_RECORDS_PER_REQUEST:
+            return 422, {'error': {'type': 'INVALID_RECORDS',
+                                   'message': f'You can update up to {MAX_RECORDS_PER_REQUEST} records per request'}}
+        with self._lock:
+            table_records = self.tables[(base_id, table)]
+            missing = [record.get('id') for record in records if record.get('id') not in table_records]
+            if missing:
+                return 404, {'error': {'type': 'NOT_FOUND', 'message': f'Records not found: {missing}'}}
+            if not all(isinstance(record.get('fields'), dict) for record in records):
+                return 422, {'error': {'type': 'INVALID_RECORDS', 'message': 'Each record needs a fields object'}}
+            updated = []
+            now = _now()
+            for record in records:
+                stored = table_records[record['id']]
+                stored['fields'] = dict(stored['fields'], **record['fields'])
+                self._modified[record['id']] = now
+                updated.append(dict(stored))
+        return 200, {'records': updated}
+
+    def _delete(self, base_id: str, table: str, query: Dict[str, List[str]]) -> Tuple[int, Dict]:
+        record_ids = query.get('records[]') or []
+        if not record_ids or len(record_ids) > MAX_RECORDS_PER_REQUEST:
+            return 422, {'error': {'type': 'INVALID_RECORDS',
+                                   'message': f'You can delete 1 to {MAX_RECORDS_PER_REQUEST} records per request'}}
+        with self._lock:
+            table_records = self.tables[(base_id, table)]
+            missing = [record_id for record_id in record_ids if record_id not in table_records]
+            if missing:
+                return 404, {'error': {'type': 'NOT_FOUND', 'message': f'Records not found: {missing}'}}
+            for record_id in record_ids:
+                del table_records[record_id]
+                self._modified.pop(record_id, None)
+        return 200, {'records': [{'id': record_id, 'deleted': True} for record_id in record_ids]}
+
+    def _list(self, base_id: str, table: str, query: Dict[str, List[str]]) -> Tuple[int, Dict]:
+        """One page of records, continuing after the record named by the offset."""
+        try:
+            page_size = int((query.get('pageSize') or [MAX_PAGE_SIZE])[0])
+        except ValueError:
+            page_size = 0
+        if not 1 <= page_size <= MAX_PAGE_SIZE:
+            return 422, {'error': {'type': 'INVALID_PAGE_SIZE',
+                                   'message': f'pageSize must be between 1 and {MAX_PAGE_SIZE}'}}
+        modified_after = None
+        formula = (query.get('filterByFormula') or [''])[0]
+        if formula:
+            match = MODIFIED_AFTER_FORMULA.match(formula)
+            try:
+                modified_after = datetime.fromisoformat(match.group(1).replace('Z', '+00:00')) if match else None
+            except ValueError:
+                modified_after = None
+            if modified_after is None or modified_after.tzinfo is None:
+                return 422, {'error': {'type': 'INVALID_FILTER_BY_FORMULA',
+                                       'message': f'Unsupported formula: {formula}'}}
+        # Offsets name the last record of the previous page ('itr<n>/<record ID>')
+        offset = (query.get('offset') or [''])[0]
+        after = offset.partition('/')[2] if offset else ''
+        if offset and not (offset.startswith('itr') and after.startswith('rec')):
+            return 422, {'error': {'type': 'LIST_RECORDS_ITERATOR_NOT_AVAILABLE', 'message': 'Invalid offset'}}
+
+        with self._lock:
+            matching = [dict(record) for record_id, record in self.tables[(base_id, table)].items()
+                        if record_id > after and
+                        (modified_after is None or self._modified[record_id] > modified_after)]
+        page = matching[:page_size]
+        payload = {'records': page}
+        if len(matching) > page_size:
+            payload['offset'] = f"itr{next(self._ids):014d}/{page[-1]['id']}"
+        return 200, payload
+
+    def _handler(self):
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass
+
+            def _send(self, status: int, payload: Dict, retry_after: Optional[float] = None):
+                body = json.dumps(payload).encode('utf-8')
+                self.send_response(status)
+                if retry_after is not None:
+                    self.send_header('Retry-After', str(math.ceil(retry_after)))
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _route(self, method: str):
+                length = int(self.headers.get('Content-Length') or 0)
+                raw = self.rfile.read(length) if length else b''
+                url = urlsplit(self.path)
+                parts = url.path.strip('/').split('/')
+                query = parse_qs(url.query)
+                if standin.latency:
+                    time.sleep(standin.latency)
+
+                try:
+                    body = json.loads(raw) if raw else {}
+                except json.JSONDecodeError:
+                    return self._send(422, {'error': {'type': 'INVALID_REQUEST_BODY', 'message': 'Invalid JSON'}})
+                with standin._lock:
+                    standin.requests.append({'method': method, 'path': self.path,
+                                             'records': len(body.get('records') or [])})
+                    failure = standin._failures.pop(0) if standin._failures else None
+                if self.headers.get('Authorization') != f'Bearer {standin.api_key}':
+                    return self._send(401, {'error': {'type': 'AUTHENTICATION_REQUIRED',
+                                                      'message': 'Authentication required'}})
+                if failure:
+                    return self._send(failure[0], {'error': failure[1]})
+                if len(parts) != 3 or parts[0] != 'v0':
+                    return self._send(404, {'error': 'NOT_FOUND'})
+
+                _, base_id, table = parts
+                retry_after = standin._throttle(base_id)
+                if retry_after is not None:
+                    return self._send(429, {'errors': [{'error': 'RATE_LIMIT_REACHED',
+                                                        'message': 'Rate limit exceeded'}]}, retry_after)
+                if method == 'POST':
+                    return self._send(*standin._create(base_id, table, body))
+                if method == 'PATCH':
+                    return self._send(*standin._update(base_id, table, body))
+                if method == 'DELETE':
+                    return self._send(*standin._delete(base_id, table, query))
+                if method == 'GET':
+                    return self._send(*standin._list(base_id, table, query))
+                return self._send(404, {'error': 'NOT_FOUND'})
+
+            def do_POST(self):
+                self._route('POST')
+
+            def do_PATCH(self):
+                self._route('PATCH')
+
+            def do_DELETE(self):
+                self._route('DELETE')
+
+            def do_GET(self):
+                self._route('GET')
+
+        return Handler
+
+# Run as a standalone server
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Local Airtable API stand-in')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--api-key', default='test-key')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds added to every response')
+    parser.add_argument('--rate-limit', type=float, default=5.0, help='Requests per second per base (0: unlimited)')
+    parser.add_argument('--rate-limit-penalty', type=float, default=RATE_LIMIT_PENALTY_SECONDS,
+                        help='Seconds a base is blocked after exceeding the rate limit')
+    args = parser.parse_args()
+
+    server = AirtableStandIn(api_key=args.api_key, host=args.host, port=args.port, latency=args.latency,
+                             rate_limit=args.rate_limit or None, rate_limit_penalty=args.rate_limit_penalty)
+    print(f"🧪 Airtable stand-in listening on {server.url} (token: {args.api_key})")
+    server.serve_forever()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+RenovAI Canada - Airtable Client Throughput Benchmark
+Copyright (c) 2025 Saeed Alaediny. All rights reserved.
+
+Creates records through AirtableClient from several threads against the
+local Airtable stand-in, which enforces the per-base rate limit the way
+Airtable does (over the limit, the base answers 429 for a penalty period).
+Reports sustained requests/records per second and how many requests were
+rate limited, with the client-side token bucket on and, for comparison, off.
+
+Usage:
+    python benchmarks/airtable_bench.py
+    python benchmarks/airtable_bench.py --requests 100 --threads 16 --penalty 30
+"""
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+APPS_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if APPS_DIR not in sys.path:
+    sys.path.insert(0, APPS_DIR)
+
+from integrations import airtable_client
+from integrations.airtable_client import AIRTABLE_BATCH_SIZE, RATE_LIMIT_HEADROOM, AirtableAPIError, AirtableClient
+from integrations.airtable_standin import AirtableStandIn
+from integrations.rate_limit import TokenBucket
+
+BASE_ID = 'appBench'
+
+def run_bench(requests: int = 40, threads: int = 8, rate_limit: float = 5.0, penalty: float = 2.0,
+              use_bucket: bool = True, latency: float = 0.02) -> Dict:
+    """
+    Create `requests` full batches of records and measure throughput.
+
+    Args:
+        requests: Create requests to send (each with 10 records)
+        threads: Threads sending concurrently
+        rate_limit: Requests per second allowed by the stand-in, and by the client's bucket
+        penalty: Seconds the stand-in blocks the base after a 429 (30 on Airtable)
+        use_bucket: Pace requests with the client-side token bucket
+        latency: Simulated API latency in seconds
+
+    Returns:
+        Dictionary with elapsed time, throughput (of successful requests),
+        rate-limited request count and requests that failed after retries
+    """
+    batch = [{'Name': f'Bench lead {i}'} for i in range(AIRTABLE_BATCH_SIZE)]
+    with AirtableStandIn(api_key='bench-key', latency=latency, rate_limit=rate_limit,
+                         rate_limit_penalty=penalty) as standin, tempfile.TemporaryDirectory() as tmp:
+        client = AirtableClient(api_key='bench-key', base_id=BASE_ID, api_url=standin.url,
+                                mock_file=os.path.join(tmp, 'outbox.jsonl'), rate_limit=rate_limit)
+        # A fresh bucket per run, so earlier runs do not pause this one; without
+        # pacing, requests still wait out the Retry-After of a 429
+        client.rate_limiter = TokenBucket(rate_limit * RATE_LIMIT_HEADROOM if use_bucket else 1e9)
+
+        def send(_) -> int:
+            try:
+                return len(client.create_records(batch))
+            except AirtableAPIError:
+                return 0
+
+        try:
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=threads) as pool:
+                results = list(pool.map(send, range(requests)))
+            elapsed = time.perf_counter() - start
+        finally:
+            client.close()
+        created = sum(results)
+        assert created == len(standin.records(BASE_ID, 'Leads'))
+        return {
+            'bucket': use_bucket,
+            'requests': requests,
+            'failed': results.count(0),
+            'records': created,
+            'elapsed_s': round(elapsed, 2),
+            'requests_per_s': round((requests - results.count(0)) / elapsed, 2),
+            'records_per_s': round(created / elapsed, 1),
+            'rate_limited': standin.rate_limited,
+        }
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Airtable client throughput against the rate-limited stand-in')
+    parser.add_argument('--requests', type=int, default=40, help='Create requests (10 records each)')
+    parser.add_argument('--threads', type=int, default=8, help='Concurrent sending threads')
+    parser.add_argument('--rate-limit', type=float, default=5.0, help='Requests per second per base')
+    parser.add_argument('--penalty', type=float, default=2.0,
+                        help='Seconds the stand-in blocks after a 429 (Airtable: 30)')
+    parser.add_argument('--latency', type=float, default=0.02, help='Simulated API latency in seconds')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args(argv)
+
+    # Keep the client's 429 notices out of the report
+    airtable_client.print = lambda *a, **k: None
+    results = [run_bench(args.requests, args.threads, args.rate_limit, args.penalty, use_bucket, args.latency)
+               for use_bucket in (True, False)]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f'Limit: {args.rate_limit:g} req/s per base, {args.threads} threads, '
+              f'{args.requests} requests x {AIRTABLE_BATCH_SIZE} records')
+        print(f"{'bucket':<8}{'elapsed s':>10}{'req/s':>8}{'records/s':>11}{'429s':>6}{'failed':>8}")
+        for result in results:
+            print(f"{'on' if result['bucket'] else 'off':<8}{result['elapsed_s']:>10}{result['requests_per_s']:>8}"
+                  f"{result['records_per_s']:>11}{result['rate_limited']:>6}{result['failed']:>8}")
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+RenovAI Canada - Lead Store Backend Benchmark
+Copyright (c) 2025 Saeed Alaediny. All rights reserved.
+
+Compares the JSONL journal (the mock-mode store) with the SQLite WAL backend
+at growing lead counts. For each backend and size it measures:
+
+- bulk load: leads written with put_many in batches of 1000
+- reopen: time and resident memory to open the existing store
+- submit: concurrent single-lead appends with the duplicate check, as
+  /api/collect-lead does them
+- get: random reads by record ID
+- count/page: a filtered count, and a filtered page deep in the ID range
+
+Usage:
+    python benchmarks/lead_store_bench.py
+    python benchmarks/lead_store_bench.py --sizes 10000 100000 1000000
+"""
+
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+APPS_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+if APPS_DIR not in sys.path:
+    sys.path.insert(0, APPS_DIR)
+
+from integrations import record_ids, sqlite_lead_store
+from integrations.airtable_client import DEDUP_INDEXES, LEAD_INDEXES
+from integrations.lead_store import LeadJournal
+from integrations.sqlite_lead_store import SQLiteLeadStore
+
+BACKENDS = ('journal', 'sqlite')
+PROJECT_TYPES = ['Kitchen', 'Bathroom', 'Basement', 'Full Home', 'Addition', 'Other']
+LOAD_BATCH = 1000
+
+def _lead(i: int) -> Dict:
+    record_id, created_ms = record_ids.generator.new()
+    return {
+        'id': record_id,
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(created_ms / 1000)),
+        'fields': {
+            'Name': f'Bench Lead {i}',
+            'Email': f'lead{i}@example.com',
+            'Phone': f'604{i:07d}',
+            'Project Type': PROJECT_TYPES[i % len(PROJECT_TYPES)],
+            'Size (sq ft)': 100 + i % 900,
+            'Lead Source': 'RenovAI ChatGPT Agent',
+            'Status': 'New' if i % 4 else 'Contacted',
+        },
+    }
+
+def _open(backend: str, directory: str):
+    if backend == 'journal':
+        return LeadJournal(os.path.join(directory, 'leads.jsonl'), indexes=LEAD_INDEXES)
+    return SQLiteLeadStore(os.path.join(directory, 'leads.sqlite3'), indexes=LEAD_INDEXES)
+
+def _rss_bytes() -> Optional[int]:
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        return None
+
+def _size_on_disk(directory: str) -> int:
+    return sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+
+def run_bench(backend: str, size: int, submissions: int = 2000, threads: int = 16, reads: int = 5000) -> Dict:
+    """
+    Benchmark one backend at one lead count.
+
+    Args:
+        backend: 'journal' or 'sqlite'
+        size: Leads loaded before measuring
+        submissions: Concurrent single-lead appends measured
+        threads: Threads submitting concurrently
+        reads: Random reads by ID measured
+
+    Returns:
+        Dictionary of timings and sizes
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        store = _open(backend, directory)
+        ids: List[str] = []
+        start = time.perf_counter()
+        for first in range(0, size, LOAD_BATCH):
+            batch = [_lead(i) for i in range(first, min(size, first + LOAD_BATCH))]
+            store.put_many(batch)
+            ids.extend(lead['id'] for lead in batch)
+        load_s = time.perf_counter() - start
+        store.close()
+        del store
+
+        gc.collect()
+        rss_before = _rss_bytes()
+        start = time.perf_counter()
+        store = _open(backend, directory)
+        store.count()   # the journal indexes on open; make sure SQLite has really opened too
+        reopen_s = time.perf_counter() - start
+        rss_after = _rss_bytes()
+
+        def submit(i: int) -> Optional[str]:
+            return store.append(_lead(size + i), unique=DEDUP_INDEXES)
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=threads) as pool:
+            assert not any(pool.map(submit, range(submissions)))
+        submit_s = time.perf_counter() - start
+
+        sample = random.Random(42).choices(ids, k=reads)
+        start = time.perf_counter()
+        for record_id in sample:
+            store.get(record_id)
+        get_s = time.perf_counter() - start
+
+        filters = {'project_type': ['kitchen'], 'status': ['new']}
+        start = time.perf_counter()
+        matched = store.count(filters)
+        count_ms = (time.perf_counter() - start) * 1000
+
+        start = time.perf_counter()
+        page = store.query(filters, after=ids[len(ids) // 2], limit=50)
+        page_ms = (time.perf_counter() - start) * 1000
+        assert len(page) == 50 or size < 1000
+
+        result = {
+            'backend': backend,
+            'leads': size,
+            'load_per_s': round(size / load_s),
+            'reopen_s': round(reopen_s, 3),
+            'reopen_rss_mb': round((rss_after - rss_before) / 2 ** 20, 1) if rss_before is not None else None,
+            'submit_per_s': round(submissions / submit_s),
+            'get_us': round(get_s / reads * 1e6, 1),
+            'count_ms': round(count_ms, 2),
+            'matched': matched,
+            'page_ms': round(page_ms, 2),
+            'disk_mb': round(_size_on_disk(directory) / 2 ** 20, 1),
+        }
+        store.close()
+        return result
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='Lead store backends at growing lead counts')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000], help='Lead counts to test')
+    parser.add_argument('--backends', nargs='+', choices=BACKENDS, default=list(BACKENDS))
+    parser.add_argument('--submissions', type=int, default=2000, help='Concurrent appends measured')
+    parser.add_argument('--threads', type=int, default=16, help='Threads submitting concurrently')
+    parser.add_argument('--json', action='store_true', help='Print results as JSON')
+    args = parser.parse_args(argv)
+
+    sqlite_lead_store.print = lambda *a, **k: None
+    results = []
+    for size in args.sizes:
+        for backend in args.backends:
+            results.append(run_bench(backend, size, args.submissions, args.threads))
+            if not args.json:
+                if len(results) == 1:
+                    print(f"{'backend':<9}{'leads':>9}{'load/s':>9}{'reopen s':>10}{'reopen MB':>11}"
+                          f"{'submit/s':>10}{'get us':>8}{'count ms':>10}{'page ms':>9}{'disk MB':>9}")
+                r = results[-1]
+                print(f"{r['backend']:<9}{r['leads']:>9}{r['load_per_s']:>9}{r['reopen_s']:>10}"
+                      f"{r['reopen_rss_mb']!s:>11}{r['submit_per_s']:>10}{r['get_us']:>8}{r['count_ms']:>10}"
+                      f"{r['page_ms']:>9}{r['disk_mb']:>9}", flush=True)
+    if args.json:
+        print(json.dumps(results, indent=2))
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
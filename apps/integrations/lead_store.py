@@ -0,0 +1,791 @@
+"""
+RenovAI Canada - Local Lead Journal
+Copyright (c) 2025 Saeed Alaediny. All rights reserved.
+
+Append-only JSON Lines store for leads kept locally (mock/offline mode).
+
+Every write appends one line, so storing a lead costs the same no matter how
+many leads already exist. All writes go through a single writer thread: callers
+queue their record and wait, and the writer drains whatever has queued up,
+appends the whole burst with one write and makes it durable with one fsync.
+Across processes (e.g. pre-forked server workers) writers take an exclusive
+file lock, and each process catches up on lines appended by the others before
+reading or writing.
+
+An in-memory index of byte offsets gives random access by record ID, and the
+IDs of records whose sync status is pending form the outbox that the Airtable
+sync worker drains. Optional secondary indexes (e.g. by project type) keep
+the IDs of matching records sorted, so counts are O(1) and filtered pages are
+read with keyset pagination instead of scanning the file; an append can be
+made conditional on its keys in some of those indexes being unused, which
+rejects duplicate submissions atomically across processes. Updates
+and deletions append a new version of the record, and background compaction
+rewrites the file with only the latest live version of each record once
+enough stale lines accumulate.
+
+LeadStore is the interface shared with the SQLite backend (sqlite_lead_store);
+open_lead_store() picks the backend from LEAD_STORE_BACKEND.
+"""
+
+import json
+import os
+import queue
+import threading
+import weakref
+from abc import ABC, abstractmethod
+from concurrent.futures import Future
+from contextlib import contextmanager
+from bisect import bisect_left, bisect_right, insort
+from heapq import merge
+from itertools import islice
+from typing import Callable, Collection, Dict, Hashable, Iterator, List, Mapping, Optional, Tuple
+
+try:
+    import fcntl
+except ImportError:  # no file locking on this platform; single process only
+    fcntl = None
+
+# Lead store backend used by open_lead_store(): 'journal' or 'sqlite'
+LEAD_STORE_BACKEND = os.getenv('LEAD_STORE_BACKEND', 'journal')
+
+# Compact once at least this share of the file is stale versions...
+COMPACTION_GARBAGE_RATIO = 0.5
+# ...and the stale versions add up to at least this many bytes
+COMPACTION_MIN_BYTES = 1024 * 1024
+
+# Most records the writer appends with one write and one fsync
+MAX_BATCH_RECORDS = 1000
+
+# Bytes read at a time when scanning the journal
+READ_CHUNK_BYTES = 1024 * 1024
+
+# Marks a deleted record in the journal
+DELETED = '_deleted'
+
+# Sync state of a record still waiting to be delivered to Airtable
+PENDING = 'pending'
+
+def _encode(record: Dict) -> bytes:
+    return (json.dumps(record, separators=(',', ':'), ensure_ascii=False) + '\n').encode('utf-8')
+
+def _write_all(fd: int, data: bytes):
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+
+def _index_key(key: Callable[[Dict], Optional[Hashable]], record: Dict) -> Optional[Hashable]:
+    # The line is already written, so a malformed record is left out of the index, never fatal
+    try:
+        return key(record)
+    except Exception:
+        return None
+
+# Open journals, so forked children can reset their locks and writer thread
+_journals = weakref.WeakSet()
+
+def _reset_after_fork():
+    for journal in list(_journals):
+        journal._reset_after_fork()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+class LeadStore(ABC):
+    """
+    Durable local store of lead records, keyed by their 'id'.
+
+    Implementations are safe to share between threads and between processes
+    opening the same path, keep the IDs of records pending sync as an outbox,
+    and maintain secondary indexes given as functions returning a record's key
+    (or None to leave the record out of that index).
+    """
+
+    path: str
+    indexes: Dict[str, Callable[[Dict], Optional[Hashable]]]
+
+    @abstractmethod
+    def append(self, record: Dict, unique: Collection[str] = (), after: Optional[str] = None) -> Optional[str]:
+        """Store a new record unless it duplicates one (see LeadJournal.append)."""
+
+    @abstractmethod
+    def put(self, record: Dict):
+        """Store a new version of a record, replacing any existing one."""
+
+    @abstractmethod
+    def put_many(self, records: List[Dict]):
+        """Store new versions of several records, written together."""
+
+    @abstractmethod
+    def delete(self, record_id: str) -> bool:
+        """Delete a record; True if it existed."""
+
+    @abstractmethod
+    def get(self, record_id: str) -> Optional[Dict]:
+        """Read the latest version of a record by ID, or None."""
+
+    @abstractmethod
+    def __contains__(self, record_id: str) -> bool:
+        ...
+
+    @abstractmethod
+    def __len__(self) -> int:
+        ...
+
+    @abstractmethod
+    def outbox(self, limit: Optional[int] = None) -> List[str]:
+        """IDs of records whose latest version is pending sync, oldest first."""
+
+    @abstractmethod
+    def count(self, filters: Optional[Mapping[str, Collection[Hashable]]] = None, after: Optional[str] = None,
+              before: Optional[str] = None) -> int:
+        """Count live records matching secondary index keys and an ID range."""
+
+    @abstractmethod
+    def query(self, filters: Optional[Mapping[str, Collection[Hashable]]] = None, after: Optional[str] = None,
+              limit: int = 50, before: Optional[str] = None) -> List[Dict]:
+        """Read one page of matching records in record ID order (keyset pagination)."""
+
+    @abstractmethod
+    def keys(self, name: str) -> Dict[Hashable, int]:
+        """Record count per key of a secondary index."""
+
+    @abstractmethod
+    def iter_records(self) -> Iterator[Dict]:
+        """Stream the latest version of every live record, from a point-in-time view."""
+
+    @abstractmethod
+    def stats(self) -> Dict:
+        """Record count and storage sizes in bytes."""
+
+    @abstractmethod
+    def close(self):
+        """Finish queued writes and release the store's files."""
+
+    def __iter__(self) -> Iterator[Dict]:
+        return self.iter_records()
+
+class LeadJournal(LeadStore):
+    """
+    Append-only JSONL lead store with an offset index and a single writer thread.
+
+    Safe to share between threads, and between processes that open the same
+    path (or inherit an open journal across fork).
+
+    Args:
+        path: Journal file path (created if missing)
+        legacy_json_path: JSON array file to import once when the journal does not exist yet
+        fsync: Whether writes wait for fsync (disable only for throwaway stores)
+        auto_compact: Whether to compact in a background thread when stale versions pile up
+        indexes: Secondary indexes, by name, as functions returning a record's
+            key (or None to leave the record out of that index)
+    """
+
+    def __init__(self, path: str, legacy_json_path: Optional[str] = None, fsync: bool = True,
+                 auto_compact: bool = True, indexes: Optional[Mapping[str, Callable[[Dict], Optional[Hashable]]]] = None):
+        self.path = path
+        self.fsync = fsync
+        self.auto_compact = auto_compact
+        self.indexes = dict(indexes or {})
+        self._lock = threading.Lock()          # guards the fd, index and end offset
+        self._write_lock = threading.Lock()    # in-process half of the cross-process file lock
+        self._queue: queue.Queue = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        self._index: Dict[str, int] = {}       # record ID -> offset of its latest version
+        self._sizes: Dict[str, int] = {}       # record ID -> length of its latest version
+        self._outbox: Dict[str, None] = {}     # IDs awaiting sync, oldest first (ordered set)
+        self._reset_secondary()
+        self._end = 0                          # end of the last complete line indexed
+        self._garbage = 0                      # bytes taken by superseded versions
+        self._compacting = False
+        self._closed = False
+        self._fd = None
+
+        # Separate lock file, since compaction replaces the journal file itself
+        self._lock_fd = os.open(path + '.lock', os.O_RDWR | os.O_CREAT, 0o644)
+        with self._file_lock():
+            if not os.path.exists(path) and legacy_json_path and os.path.exists(legacy_json_path):
+                self._migrate(legacy_json_path)
+            self._fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_APPEND, 0o644)
+            with self._lock:
+                self._catch_up(repair=True)
+        _journals.add(self)
+
+    def _migrate(self, legacy_json_path: str):
+        """Import the records of a legacy JSON array file into a new journal."""
+        try:
+            with open(legacy_json_path, 'r') as f:
+                records = json.load(f)
+        except (json.JSONDecodeError, OSError):
+            records = []
+        tmp_path = self.path + '.migrating'
+        with open(tmp_path, 'wb') as f:
+            for record in records:
+                f.write(_encode(record))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    @contextmanager
+    def _file_lock(self):
+        """Exclusive write access across threads and processes."""
+        with self._write_lock:
+            if fcntl is not None:
+                fcntl.flock(self._lock_fd, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(self._lock_fd, fcntl.LOCK_UN)
+
+    def _reset_after_fork(self):
+        """Give a forked child its own locks, writer and file lock handle."""
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._writer = None
+        self._compacting = False
+        if self._lock_fd is not None:
+            # flock is shared by every copy of an inherited descriptor
+            os.close(self._lock_fd)
+            self._lock_fd = os.open(self.path + '.lock', os.O_RDWR | os.O_CREAT, 0o644)
+
+    def _catch_up(self, repair: bool = False):
+        """
+        Index lines appended since the last call, by this or another process.
+
+        Called with the lock held. If another process compacted the journal,
+        the new file is reopened and indexed from the start.
+
+        Args:
+            repair: Cut off a trailing partial line (only safe under the file
+                lock, where it can only be left over from a crash)
+        """
+        try:
+            replaced = os.stat(self.path).st_ino != os.fstat(self._fd).st_ino
+        except FileNotFoundError:
+            replaced = False
+        size = os.fstat(self._fd).st_size
+        if replaced or size < self._end:
+            if replaced:
+                old_fd, self._fd = self._fd, os.open(self.path, os.O_RDWR | os.O_APPEND)
+                os.close(old_fd)
+                size = os.fstat(self._fd).st_size
+            self._index, self._sizes, self._outbox = {}, {}, {}
+            self._reset_secondary()
+            self._end = self._garbage = 0
+        if size <= self._end:
+            return
+
+        offset, pending = self._end, b''
+        while offset < size:
+            chunk = os.pread(self._fd, min(READ_CHUNK_BYTES, size - offset), offset)
+            if not chunk:
+                break
+            offset += len(chunk)
+            lines = (pending + chunk).split(b'\n')
+            pending = lines.pop()
+            for line in lines:
+                self._index_line(line + b'\n', self._end)
+                self._end += len(line) + 1
+        if pending and repair:
+            # Partial write from a crash: cut it off so appends start clean
+            os.ftruncate(self._fd, self._end)
+
+    def _index_line(self, line: bytes, offset: int):
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError:
+            self._garbage += len(line)
+        else:
+            self._index_version(record, offset, len(line))
+
+    def _reset_secondary(self):
+        self._ids: List[str] = []              # live record IDs, sorted
+        self._keys: Dict[str, Tuple] = {}      # record ID -> its key in each secondary index
+        # index name -> key -> sorted IDs of the live records with that key
+        self._secondary: Dict[str, Dict[Hashable, List[str]]] = {name: {} for name in self.indexes}
+
+    def _index_version(self, record: Dict, offset: int, size: int):
+        record_id = record['id']
+        if record_id in self._index:
+            self._garbage += self._sizes[record_id]
+        self._outbox.pop(record_id, None)
+        if (record.get('sync') or {}).get('status') == PENDING:
+            self._outbox[record_id] = None
+        if record.get(DELETED):
+            if self._index.pop(record_id, None) is not None:
+                del self._ids[bisect_left(self._ids, record_id)]
+            self._sizes.pop(record_id, None)
+            self._garbage += size
+            self._index_keys(record_id, None)
+        else:
+            if record_id not in self._index:
+                # IDs mostly arrive in order, making this an append
+                insort(self._ids, record_id)
+            self._index[record_id] = offset
+            self._sizes[record_id] = size
+            self._index_keys(record_id, record)
+
+    def _index_keys(self, record_id: str, record: Optional[Dict]):
+        """Move a record to the secondary index entries for its latest version."""
+        if not self.indexes:
+            return
+        old = self._keys.get(record_id)
+        new = None if record is None else tuple(_index_key(key, record) for key in self.indexes.values())
+        if old == new:
+            return
+        for name, old_key, new_key in zip(self.indexes, old or [None] * len(self.indexes),
+                                          new or [None] * len(self.indexes)):
+            if old_key == new_key:
+                continue
+            entries = self._secondary[name]
+            if old_key is not None:
+                ids = entries[old_key]
+                del ids[bisect_left(ids, record_id)]
+                if not ids:
+                    del entries[old_key]
+            if new_key is not None:
+                insort(entries.setdefault(new_key, []), record_id)
+        if new is None:
+            del self._keys[record_id]
+        else:
+            self._keys[record_id] = new
+
+    def _append(self, records: List[Dict], new: bool = False,
+                unique: Optional[Tuple[Collection[str], Optional[str]]] = None) -> List[Optional[str]]:
+        """
+        Queue record versions for the writer and wait until they are durable.
+
+        Returns:
+            Per record, None if it was written, or the ID of the existing
+            record it duplicates (see append)
+        """
+        writes = [(record, _encode(record), new, unique, Future()) for record in records]
+        with self._lock:
+            if self._closed:
+                raise ValueError('Lead journal is closed')
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name='lead-journal-writer', daemon=True)
+                self._writer.start()
+            for write in writes:
+                self._queue.put(write)
+        results = [future.result() for _, _, _, _, future in writes]
+        self._maybe_compact()
+        return results
+
+    def _write_loop(self):
+        """Writer thread: append queued records in batches until closed."""
+        write_queue = self._queue
+        while True:
+            batch = [write_queue.get()]
+            while len(batch) < MAX_BATCH_RECORDS:
+                try:
+                    batch.append(write_queue.get_nowait())
+                except queue.Empty:
+                    break
+            writes = [item for item in batch if item is not None]
+            if writes:
+                try:
+                    self._write_batch(writes)
+                except BaseException as exc:
+                    for _, _, _, _, future in writes:
+                        if not future.done():
+                            future.set_exception(exc)
+            if len(writes) < len(batch):
+                return
+
+    def _write_batch(self, batch):
+        """Append a burst of queued records with one write and one fsync."""
+        accepted, duplicates = [], []
+        with self._file_lock():
+            with self._lock:
+                # Other processes may have appended since we last looked
+                self._catch_up(repair=True)
+                ids = set()
+                claimed = {}   # (index name, key) -> ID of a record accepted earlier in this batch
+                for record, line, new, unique, future in batch:
+                    record_id = record['id']
+                    if new and (record_id in self._index or record_id in ids):
+                        future.set_exception(KeyError(f"Record {record_id} already exists"))
+                        continue
+                    if unique:
+                        names, after = unique
+                        keys = [(name, _index_key(self.indexes[name], record)) for name in names]
+                        keys = [name_key for name_key in keys if name_key[1] is not None]
+                        existing = self._existing(keys, after, claimed)
+                        if existing is not None:
+                            duplicates.append((existing, future))
+                            continue
+                        claimed.update((name_key, record_id) for name_key in keys)
+                    ids.add(record_id)
+                    accepted.append((record, line, future))
+                _write_all(self._fd, b''.join(line for _, line, _ in accepted))
+                for record, line, _ in accepted:
+                    self._index_version(record, self._end, len(line))
+                    self._end += len(line)
+                fd = self._fd
+            # Still under the file lock, so compaction cannot swap the fd meanwhile
+            if self.fsync and accepted:
+                os.fsync(fd)
+        for _, _, future in accepted:
+            future.set_result(None)
+        # Only once durable, as the record they duplicate may be in this batch
+        for existing, future in duplicates:
+            future.set_result(existing)
+
+    def _existing(self, keys: List[Tuple[str, Hashable]], after: Optional[str],
+                  claimed: Dict[Tuple[str, Hashable], str]) -> Optional[str]:
+        """Newest live record ID above `after` holding any of these index keys (lock held)."""
+        for name_key in keys:
+            if name_key in claimed:
+                return claimed[name_key]
+            name, key = name_key
+            # IDs per key are sorted, so the newest is the last: one dict lookup
+            ids = self._secondary[name].get(key)
+            if ids and (after is None or ids[-1] > after):
+                return ids[-1]
+        return None
+
+    def append(self, record: Dict, unique: Collection[str] = (), after: Optional[str] = None) -> Optional[str]:
+        """
+        Store a new record, unless it duplicates an existing one.
+
+        The duplicate check and the write are atomic, across threads and
+        processes: of several concurrent duplicates exactly one is stored.
+
+        Args:
+            record: Record with a unique 'id'
+            unique: Secondary indexes whose keys identify a duplicate: the
+                record is not stored if a live record has the same key in any
+                of them
+            after: Only records with IDs greater than this count as duplicates
+                (with time-sortable IDs, those created after a given time)
+
+        Returns:
+            None if the record was stored, otherwise the ID of the newest
+            record it duplicates
+
+        Raises:
+            KeyError: If a record with the same ID already exists
+            ValueError: If `unique` names an unknown index
+        """
+        for name in unique:
+            if name not in self.indexes:
+                raise ValueError(f"Unknown index: {name}")
+        return self._append([record], new=True, unique=(tuple(unique), after) if unique else None)[0]
+
+    def put(self, record: Dict):
+        """Store a new version of a record, replacing any existing one."""
+        self._append([record])
+
+    def put_many(self, records: List[Dict]):
+        """Store new versions of several records, written together."""
+        if records:
+            self._append(records)
+
+    def delete(self, record_id: str) -> bool:
+        """
+        Delete a record.
+
+        Returns:
+            True if the record existed
+        """
+        if record_id not in self:
+            return False
+        self._append([{'id': record_id, DELETED: True}])
+        return True
+
+    def get(self, record_id: str) -> Optional[Dict]:
+        """Read the latest version of a record by ID, or None."""
+        with self._lock:
+            self._catch_up()
+            offset = self._index.get(record_id)
+            if offset is None:
+                return None
+            size = self._sizes[record_id]
+            return json.loads(os.pread(self._fd, size, offset))
+
+    def __contains__(self, record_id: str) -> bool:
+        with self._lock:
+            self._catch_up()
+            return record_id in self._index
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._catch_up()
+            return len(self._index)
+
+    def outbox(self, limit: Optional[int] = None) -> List[str]:
+        """IDs of records whose latest version is pending sync, oldest first."""
+        with self._lock:
+            self._catch_up()
+            return list(islice(self._outbox, limit))
+
+    def _candidates(self, filters: Mapping[str, Collection[Hashable]], after: Optional[str],
+                    before: Optional[str] = None) -> Iterator[str]:
+        """
+        IDs matching every filter, sorted, between `after` and `before` (lock held).
+
+        Walks the sorted ID lists of the most selective filter and checks the
+        other filters against each record's keys.
+        """
+        for name in filters:
+            if name not in self.indexes:
+                raise ValueError(f"Unknown index: {name}")
+        def between(ids: List[str]) -> Iterator[str]:
+            # Binary search for both ends: only IDs in range are visited
+            start = bisect_right(ids, after) if after is not None else 0
+            stop = bisect_left(ids, before) if before is not None else len(ids)
+            return (ids[i] for i in range(start, stop))
+
+        if not filters:
+            return between(self._ids)
+
+        def lists(name):
+            entries = self._secondary[name]
+            return [entries[key] for key in set(filters[name]) if key in entries]
+
+        driver = min(filters, key=lambda name: sum(len(ids) for ids in lists(name)))
+        positions = {name: i for i, name in enumerate(self.indexes)}
+        others = [(positions[name], set(keys)) for name, keys in filters.items() if name != driver]
+        streams = [between(ids) for ids in lists(driver)]
+        ids = streams[0] if len(streams) == 1 else merge(*streams)
+        return (record_id for record_id in ids
+                if all(self._keys[record_id][position] in keys for position, keys in others))
+
+    def count(self, filters: Optional[Mapping[str, Collection[Hashable]]] = None, after: Optional[str] = None,
+              before: Optional[str] = None) -> int:
+        """
+        Count live records, optionally only those matching secondary index keys.
+
+        Counting with one filter is O(number of keys); an ID range is found
+        by binary search; combining filters walks the IDs of the most
+        selective one.
+
+        Args:
+            filters: Index name -> accepted keys; a record must match every index
+            after: Count only records with IDs greater than this
+            before: Count only records with IDs less than this
+
+        Raises:
+            ValueError: If a filter names an unknown index
+        """
+        with self._lock:
+            self._catch_up()
+            if after is not None or before is not None:
+                if not filters:
+                    start = bisect_right(self._ids, after) if after is not None else 0
+                    stop = bisect_left(self._ids, before) if before is not None else len(self._ids)
+                    return max(0, stop - start)
+                return sum(1 for _ in self._candidates(filters, after, before))
+            if not filters:
+                return len(self._index)
+            if len(filters) == 1:
+                [(name, keys)] = filters.items()
+                if name not in self.indexes:
+                    raise ValueError(f"Unknown index: {name}")
+                entries = self._secondary[name]
+                return sum(len(entries.get(key, ())) for key in set(keys))
+            return sum(1 for _ in self._candidates(filters, None))
+
+    def query(self, filters: Optional[Mapping[str, Collection[Hashable]]] = None, after: Optional[str] = None,
+              limit: int = 50, before: Optional[str] = None) -> List[Dict]:
+        """
+        Read one page of live records in record ID order (keyset pagination).
+
+        With time-sortable IDs, `after`/`before` bounds select a creation time
+        range, located by binary search without reading other records.
+
+        Args:
+            filters: Index name -> accepted keys; a record must match every index
+            after: Return only records with IDs greater than this (the last ID of the previous page)
+            limit: Most records to return
+            before: Return only records with IDs less than this
+
+        Returns:
+            Latest versions of the matching records
+
+        Raises:
+            ValueError: If a filter names an unknown index
+        """
+        with self._lock:
+            self._catch_up()
+            page = list(islice(self._candidates(filters or {}, after, before), max(0, limit)))
+            return [json.loads(os.pread(self._fd, self._sizes[record_id], self._index[record_id]))
+                    for record_id in page]
+
+    def keys(self, name: str) -> Dict[Hashable, int]:
+        """Record count per key of a secondary index."""
+        with self._lock:
+            self._catch_up()
+            return {key: len(ids) for key, ids in self._secondary[name].items()}
+
+    def iter_records(self) -> Iterator[Dict]:
+        """
+        Stream the latest version of every live record, in the order those
+        versions were written (creation order for records never updated).
+
+        Reads from a point-in-time view of the file: records appended after
+        iteration starts are not included, and concurrent compaction does not
+        disturb an iteration in progress.
+        """
+        with self._lock:
+            self._catch_up()
+            end = self._end
+            # Without stale versions every line is live, so the index need not be copied
+            live = dict(self._index) if self._garbage else None
+            f = self._open_reader()
+        with f:
+            offset = 0
+            for line in f:
+                if offset >= end:
+                    break
+                record_offset, offset = offset, offset + len(line)
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if live is None or live.get(record.get('id')) == record_offset:
+                    yield record
+
+    def _open_reader(self):
+        """Open the file the index describes for reading (called with the lock held)."""
+        while True:
+            f = open(self.path, 'rb')
+            if os.fstat(f.fileno()).st_ino == os.fstat(self._fd).st_ino:
+                return f
+            # Replaced by another process's compaction in between
+            f.close()
+            self._catch_up()
+
+    def stats(self) -> Dict:
+        """Record count and file/garbage sizes in bytes."""
+        with self._lock:
+            self._catch_up()
+            return {'records': len(self._index), 'bytes': self._end, 'garbage_bytes': self._garbage}
+
+    def _maybe_compact(self):
+        if not self.auto_compact or self._compacting:
+            return
+        garbage, end = self._garbage, self._end
+        if garbage >= COMPACTION_MIN_BYTES and garbage >= end * COMPACTION_GARBAGE_RATIO:
+            self._compacting = True
+            threading.Thread(target=self.compact, name='lead-journal-compaction', daemon=True).start()
+
+    def compact(self):
+        """
+        Rewrite the journal with only the latest version of each live record.
+
+        Live records up to the current end are copied without holding any
+        lock; writers are paused only to copy lines appended meanwhile and
+        swap the files. Other processes pick up the new file on their next
+        read or write.
+        """
+        self._compacting = True
+        tmp_path = f'{self.path}.compacting.{os.getpid()}'
+        try:
+            with self._lock:
+                self._catch_up()
+                end = self._end
+                live = dict(self._index)
+                source = self._open_reader()
+                inode = os.fstat(source.fileno()).st_ino
+            new_index: Dict[str, int] = {}
+            new_sizes: Dict[str, int] = {}
+            with source, open(tmp_path, 'wb') as out:
+                offset = new_offset = 0
+                for line in source:
+                    if offset >= end:
+                        break
+                    record_offset, offset = offset, offset + len(line)
+                    try:
+                        record_id = json.loads(line).get('id')
+                    except json.JSONDecodeError:
+                        continue
+                    if live.get(record_id) == record_offset:
+                        out.write(line)
+                        new_index[record_id] = new_offset
+                        new_sizes[record_id] = len(line)
+                        new_offset += len(line)
+                out.flush()
+
+                with self._file_lock(), self._lock:
+                    self._catch_up(repair=True)
+                    if os.fstat(self._fd).st_ino != inode:
+                        # Another process compacted the journal first
+                        return
+                    # Carry over everything appended while the copy was running
+                    tail = os.pread(self._fd, self._end - end, end) if self._end > end else b''
+                    out.write(tail)
+                    out.flush()
+                    os.fsync(out.fileno())
+                    for record_id, old_offset in self._index.items():
+                        if old_offset >= end:
+                            new_index[record_id] = new_offset + old_offset - end
+                            new_sizes[record_id] = self._sizes[record_id]
+                    # Records deleted while copying must stay deleted
+                    for record_id in list(new_index):
+                        if record_id not in self._index:
+                            del new_index[record_id]
+                            del new_sizes[record_id]
+
+                    os.replace(tmp_path, self.path)
+                    old_fd = self._fd
+                    self._fd = os.open(self.path, os.O_RDWR | os.O_APPEND)
+                    os.close(old_fd)
+                    self._index, self._sizes = new_index, new_sizes
+                    self._end = new_offset + len(tail)
+                    self._garbage = self._end - sum(new_sizes.values())
+        finally:
+            self._compacting = False
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def close(self):
+        """Finish queued writes, then close the journal file."""
+        with self._lock:
+            self._closed = True
+            writer, self._writer = self._writer, None
+            if writer is not None:
+                self._queue.put(None)
+        if writer is not None:
+            writer.join()
+        with self._lock:
+            if self._fd is not None:
+                if self.fsync:
+                    os.fsync(self._fd)
+                os.close(self._fd)
+                self._fd = None
+            if self._lock_fd is not None:
+                os.close(self._lock_fd)
+                self._lock_fd = None
+        _journals.discard(self)
+
+def open_lead_store(path: str, backend: Optional[str] = None, legacy_json_path: Optional[str] = None,
+                    indexes: Optional[Mapping[str, Callable[[Dict], Optional[Hashable]]]] = None) -> LeadStore:
+    """
+    Open the local lead store with the configured backend.
+
+    Args:
+        path: Journal file path; the SQLite backend keeps its database next to
+            it (same name, .sqlite3 suffix) and imports an existing journal once
+        backend: 'journal' or 'sqlite' (default: LEAD_STORE_BACKEND)
+        legacy_json_path: JSON array file to import once into a new store
+        indexes: Secondary indexes, by name, as functions returning a record's key
+
+    Raises:
+        ValueError: If the backend is unknown
+    """
+    backend = (backend or LEAD_STORE_BACKEND).lower()
+    if backend == 'journal':
+        return LeadJournal(path, legacy_json_path=legacy_json_path, indexes=indexes)
+    if backend == 'sqlite':
+        try:
+            from integrations.sqlite_lead_store import SQLiteLeadStore
+        except ImportError:  # run as a script from this directory
+            from sqlite_lead_store import SQLiteLeadStore
+        legacy_path = path if os.path.exists(path) else legacy_json_path
+        return SQLiteLeadStore(os.path.splitext(path)[0] + '.sqlite3', legacy_path=legacy_path, indexes=indexes)
+    raise ValueError(f"Unknown lead store backend: {backend}")
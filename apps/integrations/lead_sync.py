@@ -0,0 +1,269 @@
+"""
+RenovAI Canada - Lead Sync Worker
+Copyright (c) 2025 Saeed Alaediny. All rights reserved.
+
+Write-behind delivery of leads to Airtable.
+
+Leads are acknowledged as soon as they are durable in the local journal with
+sync status 'pending'; that journal is the outbox. A background worker sends
+pending leads to Airtable in batches of up to 10 records (Airtable's per
+request limit) and records the outcome on each lead:
+
+- pending: stored locally, not yet in Airtable
+- synced: created in Airtable (airtable_id holds the remote record ID)
+- failed: rejected by Airtable, or still failing after MAX_SYNC_ATTEMPTS
+
+Transient failures (network errors, 429 and 5xx responses, and any
+unexpected error) back off exponentially before the next attempt. When several processes share one
+journal, only the one holding the sync lock delivers; the others keep
+trying to take over in case it exits.
+"""
+
+import os
+import random
+import threading
+import time
+import weakref
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # no file locking on this platform; single process only
+    fcntl = None
+
+try:
+    from integrations.lead_store import PENDING
+except ImportError:  # run as a script from this directory
+    from lead_store import PENDING
+
+# Airtable accepts at most this many records per create request
+SYNC_BATCH_SIZE = 10
+
+# Attempts per lead before it is marked failed
+MAX_SYNC_ATTEMPTS = 8
+
+# Backoff after a transient failure: base * 2^(consecutive failures - 1), capped, with jitter
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 300.0
+
+# How often the worker looks for leads queued by other processes
+POLL_INTERVAL_SECONDS = 1.0
+
+SYNCED = 'synced'
+FAILED = 'failed'
+
+class SyncError(Exception):
+    """
+    Delivery to Airtable failed.
+
+    Args:
+        message: Error description
+        retryable: Whether trying again later may succeed
+        retry_after: Seconds the server asked us to wait, if any
+    """
+
+    def __init__(self, message: str, retryable: bool = True, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+def pending_sync() -> Dict:
+    """Sync state of a lead that has not been delivered yet."""
+    return {'status': PENDING, 'attempts': 0}
+
+def backoff_delay(failures: int) -> float:
+    """Seconds to wait after `failures` consecutive transient failures."""
+    delay = min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** max(0, failures - 1))
+    return delay * random.uniform(0.5, 1.0)
+
+# Running workers, so forked children can reset their thread and sync lock
+_workers = weakref.WeakSet()
+
+def _reset_after_fork():
+    for worker in list(_workers):
+        worker._reset_after_fork()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+class LeadSyncWorker:
+    """
+    Background thread delivering pending leads from a journal to Airtable.
+
+    Args:
+        store: LeadStore holding the leads (the outbox)
+        send: Creates records in Airtable from a list of field dicts and
+            returns their Airtable IDs in the same order; raises SyncError
+        batch_size: Most leads per Airtable request
+        on_synced: Called with the updated leads after a batch is marked synced
+    """
+
+    def __init__(self, store, send: Callable[[List[Dict]], List[str]], batch_size: int = SYNC_BATCH_SIZE,
+                 on_synced: Optional[Callable[[List[Dict]], None]] = None):
+        self.store = store
+        self.send = send
+        self.batch_size = batch_size
+        self.on_synced = on_synced
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock_fd: Optional[int] = None
+        self._failures = 0                     # consecutive transient failures
+        self._retry_at = 0.0                   # monotonic time of the next attempt after a failure
+
+    def start(self):
+        """Start the worker thread if it is not running (idempotent)."""
+        with self._lock:
+            if self._thread is not None or self._stop.is_set():
+                return
+            self._thread = threading.Thread(target=self._run, name='lead-sync', daemon=True)
+            self._thread.start()
+        _workers.add(self)
+
+    def notify(self):
+        """Wake the worker: new leads are pending."""
+        self.start()
+        self._wake.set()
+
+    def stop(self, timeout: float = 5.0):
+        """Stop the worker; leads still pending stay in the outbox for the next start."""
+        self._stop.set()
+        self._wake.set()
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join(timeout)
+        self._release()
+        _workers.discard(self)
+
+    def status(self) -> Dict:
+        """
+        Delivery state for health checks.
+
+        Returns:
+            Dictionary with the number of leads pending delivery, whether this
+            process holds the sync lock (is the one delivering), and the
+            consecutive transient failures with the seconds until the next attempt
+        """
+        return {
+            'pending': len(self.store.outbox()),
+            'delivering': self._lock_fd is not None,
+            'consecutive_failures': self._failures,
+            'retry_in_seconds': round(max(0.0, self._retry_at - time.monotonic()), 1) if self._failures else None,
+        }
+
+    def _reset_after_fork(self):
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        stopped, self._stop = self._stop.is_set(), threading.Event()
+        if stopped:
+            self._stop.set()
+        self._thread = None
+        self._failures = 0
+        if self._lock_fd is not None:
+            # The parent's flock is shared by the inherited descriptor
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+    def _acquire(self) -> bool:
+        """Try to become the process that delivers leads for this journal."""
+        if self._lock_fd is not None:
+            return True
+        fd = os.open(self.store.path + '.sync.lock', os.O_RDWR | os.O_CREAT, 0o644)
+        if fcntl is not None:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                os.close(fd)
+                return False
+        self._lock_fd = fd
+        return True
+
+    def _release(self):
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            if not self._acquire():
+                self._wait(POLL_INTERVAL_SECONDS)
+                continue
+            try:
+                delivered = self.sync_once()
+            except Exception as e:
+                # e.g. the journal cannot be read: back off as after a transient failure
+                print(f"❌ Lead sync error: {e}")
+                self._failures += 1
+                self._retry_at = time.monotonic() + backoff_delay(self._failures)
+                delivered = 0
+            if self._failures:
+                self._wait(self._retry_at - time.monotonic(), wake=False)
+            elif not delivered:
+                self._wait(POLL_INTERVAL_SECONDS)
+
+    def _wait(self, seconds: float, wake: bool = True):
+        """Sleep, returning early on stop (and on new leads if `wake`)."""
+        seconds = max(0.0, seconds)
+        if wake:
+            self._wake.wait(seconds)
+            self._wake.clear()
+        else:
+            self._stop.wait(seconds)
+
+    def sync_once(self) -> int:
+        """
+        Deliver one batch of pending leads.
+
+        Returns:
+            Number of leads whose sync status changed
+        """
+        batch = []
+        for record_id in self.store.outbox(self.batch_size):
+            record = self.store.get(record_id)
+            if record is not None and (record.get('sync') or {}).get('status') == PENDING:
+                batch.append(record)
+        if not batch:
+            return 0
+        return self._deliver(batch)
+
+    def _deliver(self, batch: List[Dict]) -> int:
+        try:
+            airtable_ids = self.send([record['fields'] for record in batch])
+        except Exception as e:
+            if not isinstance(e, SyncError):
+                # Not a known Airtable failure: count the attempt and back off,
+                # so the lead is marked failed after MAX_SYNC_ATTEMPTS
+                e = SyncError(f"Unexpected error: {e!r}")
+            if not e.retryable and len(batch) > 1:
+                # One bad record rejects the whole request; find it by sending singly
+                return sum(self._deliver([record]) for record in batch)
+            self.store.put_many([self._failed_attempt(record, e) for record in batch])
+            if not e.retryable:
+                self._failures = 0
+                return len(batch)
+            self._failures += 1
+            self._retry_at = time.monotonic() + max(e.retry_after or 0.0, backoff_delay(self._failures))
+            return 0
+
+        self._failures = 0
+        synced_at = datetime.now().isoformat()
+        synced = [
+            dict(record, sync={'status': SYNCED, 'attempts': record['sync']['attempts'] + 1,
+                               'airtable_id': airtable_id, 'synced_at': synced_at})
+            for record, airtable_id in zip(batch, airtable_ids)
+        ]
+        self.store.put_many(synced)
+        if self.on_synced is not None:
+            self.on_synced(synced)
+        return len(batch)
+
+    def _failed_attempt(self, record: Dict, error: SyncError) -> Dict:
+        attempts = record['sync']['attempts'] + 1
+        gave_up = not error.retryable or attempts >= MAX_SYNC_ATTEMPTS
+        if gave_up:
+            print(f"❌ Lead {record['id']} could not be synced to Airtable: {error}")
+        return dict(record, sync={'status': FAILED if gave_up else PENDING, 'attempts': attempts,
+                                  'last_error': str(error), 'last_attempt_at': datetime.now().isoformat()})
@@ -0,0 +1,194 @@
+"""
+RenovAI Canada - Client-Side Rate Limiting
+Copyright (c) 2025 Saeed Alaediny. All rights reserved.
+
+Token bucket used to keep Airtable API calls under the per-base request
+limit, so requests are spaced out locally instead of being rejected with
+429 responses (after which Airtable blocks the base for 30 seconds).
+
+The limit is per base, not per process: pre-forked server workers deliver
+leads and sync the replica from different processes. shared_bucket()
+therefore keeps each base's bucket in a small state file under a file lock,
+so every process on the host draws from one budget.
+"""
+
+import hashlib
+import os
+import struct
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # no file locking on this platform; buckets stay per process
+    fcntl = None
+
+# Directory holding the state files of buckets shared between processes
+RATE_LIMIT_DIR = os.getenv('AIRTABLE_RATE_LIMIT_DIR') or tempfile.gettempdir()
+
+# Shared state further ahead than this is left over from a clock step, not
+# from queued requests or a 429 pause, and is ignored
+STALE_STATE_SECONDS = 3600.0
+
+# Shared state: next free slot and end of any pause, as epoch seconds
+_STATE = struct.Struct('<dd')
+
+class TokenBucket:
+    """
+    Thread-safe token bucket.
+
+    Args:
+        rate: Tokens added per second (sustained requests per second)
+        capacity: Most tokens that can accumulate; 1 spaces requests evenly,
+            so no one-second window ever holds more than `rate` requests
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """
+        Take one token, sleeping until one is available.
+
+        Returns:
+            Seconds spent waiting
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if now < self._paused_until:
+                    delay = self._paused_until - now
+                elif self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                else:
+                    delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def pause(self, seconds: float):
+        """Hand out no tokens for `seconds` (e.g. after the server returned 429)."""
+        with self._lock:
+            now = time.monotonic()
+            self._paused_until = max(self._paused_until, now + seconds)
+            self._tokens = 0.0
+            self._updated = now
+
+class FileTokenBucket(TokenBucket):
+    """
+    Token bucket shared by every process using the same state file.
+
+    Each acquire reserves the next free slot under an exclusive file lock
+    and sleeps until it outside the lock (the generic cell rate algorithm:
+    the state is just the time the next slot frees up), so waiting processes
+    queue in order without polling. Times are epoch seconds, comparable
+    between processes.
+
+    Args:
+        path: State file (created on first use)
+        rate: Tokens added per second (sustained requests per second)
+        capacity: Most tokens that can accumulate
+    """
+
+    def __init__(self, path: str, rate: float, capacity: float = 1.0):
+        super().__init__(rate, capacity)
+        self.path = path
+
+    @contextmanager
+    def _state(self) -> Iterator[List[float]]:
+        """Lock the state file and yield [next_free, paused_until]; changes are written back."""
+        with self._lock:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+                data = os.pread(fd, _STATE.size, 0)
+                now = time.time()
+                state = list(_STATE.unpack(data)) if len(data) == _STATE.size else [0.0, 0.0]
+                if max(state) > now + STALE_STATE_SECONDS:
+                    state = [0.0, 0.0]
+                before = list(state)
+                yield state
+                if state != before:
+                    os.pwrite(fd, _STATE.pack(*state), 0)
+            finally:
+                os.close(fd)
+
+    def acquire(self) -> float:
+        """
+        Take one token, sleeping until one is available.
+
+        Returns:
+            Seconds spent waiting
+        """
+        interval = 1.0 / self.rate
+        waited = 0.0
+        while True:
+            with self._state() as state:
+                now = time.time()
+                next_free, paused_until = state
+                if now < paused_until:
+                    delay, reserved = paused_until - now, False
+                else:
+                    state[0] = max(next_free, now) + interval
+                    delay, reserved = max(0.0, state[0] - self.capacity * interval - now), True
+            if delay:
+                time.sleep(delay)
+                waited += delay
+            # A 429 while we slept pauses even the slots already handed out
+            if reserved and (not delay or not self._paused()):
+                return waited
+
+    def _paused(self) -> bool:
+        with self._state() as state:
+            return time.time() < state[1]
+
+    def pause(self, seconds: float):
+        """Hand out no tokens, in any process, for `seconds` (e.g. after the server returned 429)."""
+        with self._state() as state:
+            now = time.time()
+            state[1] = max(state[1], now + seconds)
+            state[0] = max(state[0], state[1])
+
+# One bucket per rate-limited key (e.g. Airtable base), shared by every client in the process
+_buckets: Dict[str, TokenBucket] = {}
+_buckets_lock = threading.Lock()
+
+def shared_bucket(key: str, rate: float) -> TokenBucket:
+    """
+    Return the token bucket for `key`, shared by every client in every
+    process on this host (see FileTokenBucket), creating it on first use.
+
+    Args:
+        key: What the limit applies to (e.g. an Airtable base ID)
+        rate: Requests per second, used when the bucket is created
+    """
+    with _buckets_lock:
+        bucket: Optional[TokenBucket] = _buckets.get(key)
+        if bucket is None or bucket.rate != rate:
+            if fcntl is None:
+                bucket = TokenBucket(rate)
+            else:
+                name = hashlib.sha256(key.encode('utf-8')).hexdigest()[:16]
+                bucket = FileTokenBucket(os.path.join(RATE_LIMIT_DIR, f'renovai-rate-{name}.bucket'), rate)
+            _buckets[key] = bucket
+        return bucket
+
+def _reset_after_fork():
+    global _buckets_lock
+    _buckets_lock = threading.Lock()
+    for bucket in _buckets.values():
+        bucket._lock = threading.Lock()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
@@ -0,0 +1,139 @@
+"""
+RenovAI Canada - Time-Sortable Record IDs
+Copyright (c) 2025 Saeed Alaediny. All rights reserved.
+
+ULID-style record IDs: a prefix ('rec', like Airtable's) followed by 26
+Crockford base32 characters, 10 for a 48-bit millisecond timestamp and 16 for
+80 random bits. IDs sort lexicographically in creation order, so a store
+keeping its IDs sorted can find every record created in a time range by
+binary search.
+
+Leads stored before these IDs have 'rec' plus their creation time as
+YYYYMMDDHHMMSS (and later microseconds). Starting with a year, those sort
+above every time-sortable ID, so AirtableClient re-keys them on open with
+rekeyed_id().
+
+Within one process IDs are strictly increasing: several IDs in the same
+millisecond (or after the clock steps back) increment the random part of the
+previous one instead of drawing new bits. Across processes, the 80 random
+bits make collisions practically impossible.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Optional, Tuple
+
+# Crockford's base32 alphabet (no I, L, O or U)
+ALPHABET = '0123456789ABCDEFGHJKMNPQRSTVWXYZ'
+_DECODE = {char: value for value, char in enumerate(ALPHABET)}
+
+PREFIX = 'rec'
+TIME_CHARS = 10
+RANDOM_CHARS = 16
+RANDOM_BITS = 80
+
+# Legacy IDs start with a year, so they all sort above this bound (the
+# first character of a time-sortable ID stays '0' or '1' until year 4200)
+LEGACY_ID_FLOOR = PREFIX + '2'
+
+# strptime formats of legacy IDs, by length of the part after the prefix
+_LEGACY_FORMATS = {14: '%Y%m%d%H%M%S', 20: '%Y%m%d%H%M%S%f'}
+
+def _encode(value: int, length: int) -> str:
+    chars = []
+    for _ in range(length):
+        value, digit = divmod(value, 32)
+        chars.append(ALPHABET[digit])
+    return ''.join(reversed(chars))
+
+def _decode(text: str) -> int:
+    value = 0
+    for char in text:
+        value = value * 32 + _DECODE[char]
+    return value
+
+class RecordIdGenerator:
+    """
+    Thread-safe generator of monotonic, time-sortable record IDs.
+
+    Args:
+        prefix: Text put before every ID
+    """
+
+    def __init__(self, prefix: str = PREFIX):
+        self.prefix = prefix
+        self._lock = threading.Lock()
+        self._last_ms = -1
+        self._last_random = 0
+
+    def new(self) -> Tuple[str, int]:
+        """
+        Generate the next ID.
+
+        Returns:
+            (record ID, its timestamp in milliseconds since the epoch)
+        """
+        with self._lock:
+            ms = time.time_ns() // 1_000_000
+            if ms > self._last_ms:
+                random_part = int.from_bytes(os.urandom(RANDOM_BITS // 8), 'big')
+            else:
+                # Same millisecond (or the clock stepped back): keep order by counting up
+                ms, random_part = self._last_ms, self._last_random + 1
+                if random_part >> RANDOM_BITS:
+                    ms, random_part = ms + 1, 0
+            self._last_ms, self._last_random = ms, random_part
+        return f'{self.prefix}{_encode(ms, TIME_CHARS)}{_encode(random_part, RANDOM_CHARS)}', ms
+
+    def _reset_after_fork(self):
+        # Draw fresh random bits, so parent and child never count up from the same ID
+        self._lock = threading.Lock()
+        self._last_ms = -1
+
+def id_time(record_id: str, prefix: str = PREFIX) -> Optional[datetime]:
+    """Creation time encoded in a record ID, or None if it is not a time-sortable ID."""
+    body = record_id[len(prefix):]
+    if not record_id.startswith(prefix) or len(body) != TIME_CHARS + RANDOM_CHARS:
+        return None
+    try:
+        return datetime.fromtimestamp(_decode(body[:TIME_CHARS]) / 1000)
+    except KeyError:
+        return None
+
+def legacy_id_time(record_id: str, prefix: str = PREFIX) -> Optional[datetime]:
+    """Creation time encoded in a legacy 'recYYYYMMDDHHMMSS[ffffff]' ID, or None if it is not one."""
+    body = record_id[len(prefix):]
+    if not record_id.startswith(prefix) or not body.isdigit() or len(body) not in _LEGACY_FORMATS:
+        return None
+    try:
+        return datetime.strptime(body, _LEGACY_FORMATS[len(body)])
+    except ValueError:
+        return None
+
+def rekeyed_id(legacy_id: str, created: datetime, prefix: str = PREFIX) -> str:
+    """
+    Time-sortable ID replacing a legacy one: the creation time, then bits
+    hashed from the legacy ID, so re-keying the same record twice (say, in
+    two processes) gives the same ID.
+    """
+    digest = hashlib.sha256(legacy_id.encode('utf-8')).digest()
+    random_part = int.from_bytes(digest[:RANDOM_BITS // 8], 'big')
+    return id_bound(created, prefix) + _encode(random_part, RANDOM_CHARS)
+
+def id_bound(moment: datetime, prefix: str = PREFIX) -> str:
+    """
+    Sort key just below every ID created at or after `moment`.
+
+    All IDs created before `moment` sort below it, so records created in
+    [since, until) are those with since_bound < ID < until_bound.
+    """
+    return f'{prefix}{_encode(round(moment.timestamp() * 1_000_000) // 1000, TIME_CHARS)}'
+
+# Process-wide generator, shared by every client so IDs stay monotonic
+generator = RecordIdGenerator()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=generator._reset_after_fork)
@@ -0,0 +1,535 @@
+"""
+RenovAI Canada - SQLite Lead Store
+Copyright (c) 2025 Saeed Alaediny. All rights reserved.
+
+LeadStore backend on an embedded SQLite database in WAL mode, selected with
+LEAD_STORE_BACKEND=sqlite. Unlike the JSONL journal it keeps no in-memory
+index, so memory use and start-up time do not grow with the number of
+leads, and the database can be queried directly (e.g. with the sqlite3 shell).
+
+Writes go through a single writer thread, as in the journal: the writer
+drains whatever has queued up and applies it with batched executemany
+statements in one transaction, so concurrent submissions share one commit.
+Readers borrow connections from a small pool and, thanks to WAL, never wait
+for the writer. Every statement is parameterized, so SQLite's per-connection
+statement cache reuses the prepared statements.
+
+Schema: one row per live record (its latest version as JSON, with indexed
+email and created_at columns), and one lead_keys row per secondary index key,
+so filters, counts and duplicate checks are index lookups.
+"""
+
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+import weakref
+from concurrent.futures import Future
+from contextlib import contextmanager
+from itertools import islice
+from typing import Callable, Collection, Dict, Hashable, Iterator, List, Mapping, Optional, Tuple
+
+try:
+    from integrations.lead_store import DELETED, MAX_BATCH_RECORDS, PENDING, LeadJournal, LeadStore, _index_key
+except ImportError:  # run as a script from this directory
+    from lead_store import DELETED, MAX_BATCH_RECORDS, PENDING, LeadJournal, LeadStore, _index_key
+
+# Seconds a write waits for another process's transaction before failing
+BUSY_TIMEOUT_SECONDS = 30.0
+
+# Read connections kept open per store
+READ_POOL_SIZE = 4
+
+# Prepared statements cached per connection
+STATEMENT_CACHE_SIZE = 128
+
+# Seconds filter match counts are reused when picking which filter drives a query
+MATCH_COUNT_TTL_SECONDS = 60.0
+MATCH_COUNT_CACHE_SIZE = 1024
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS leads (
+    id TEXT PRIMARY KEY,
+    created_at TEXT,
+    email TEXT,
+    pending INTEGER NOT NULL DEFAULT 0,
+    seq INTEGER NOT NULL,
+    record TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS leads_email ON leads (email);
+CREATE INDEX IF NOT EXISTS leads_created_at ON leads (created_at);
+CREATE UNIQUE INDEX IF NOT EXISTS leads_seq ON leads (seq);
+CREATE INDEX IF NOT EXISTS leads_outbox ON leads (seq) WHERE pending = 1;
+CREATE TABLE IF NOT EXISTS lead_keys (
+    name TEXT NOT NULL,
+    key NOT NULL,
+    id TEXT NOT NULL,
+    PRIMARY KEY (name, key, id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS lead_keys_id ON lead_keys (id);
+CREATE TABLE IF NOT EXISTS lead_store_meta (
+    name TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+'''
+
+UPSERT = '''
+INSERT INTO leads (id, created_at, email, pending, seq, record) VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (id) DO UPDATE SET created_at = excluded.created_at, email = excluded.email,
+    pending = excluded.pending, seq = excluded.seq, record = excluded.record
+'''
+
+def _email(record: Dict) -> Optional[str]:
+    fields = record.get('fields')
+    email = fields.get('Email') if isinstance(fields, dict) else None
+    return email.strip().lower() if isinstance(email, str) else None
+
+# Open stores, so forked children drop connections and threads belonging to the parent
+_stores = weakref.WeakSet()
+
+def _reset_after_fork():
+    for store in list(_stores):
+        store._reset_after_fork()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+class SQLiteLeadStore(LeadStore):
+    """
+    Lead store on a SQLite database in WAL mode.
+
+    Safe to share between threads, and between processes that open the same
+    database (or inherit an open store across fork).
+
+    Args:
+        path: Database file path (created if missing)
+        legacy_path: Lead journal (.jsonl) or JSON array file to import once
+            when the database is new
+        fsync: Whether commits wait for fsync (disable only for throwaway stores)
+        indexes: Secondary indexes, by name, as functions returning a record's
+            key (a string or number, or None to leave the record out)
+    """
+
+    def __init__(self, path: str, legacy_path: Optional[str] = None, fsync: bool = True,
+                 indexes: Optional[Mapping[str, Callable[[Dict], Optional[Hashable]]]] = None):
+        self.path = path
+        self.fsync = fsync
+        self.indexes = dict(indexes or {})
+        self._lock = threading.Lock()          # guards the writer thread and the read pool
+        self._queue: queue.Queue = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        self._idle: List[sqlite3.Connection] = []
+        self._match_counts: Dict[Tuple, Tuple[float, int]] = {}
+        self._closed = False
+
+        conn = self._connect()
+        try:
+            conn.executescript(SCHEMA)
+            self._prepare(conn, legacy_path)
+        finally:
+            conn.close()
+        _stores.add(self)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT_SECONDS, isolation_level=None,
+                               check_same_thread=False, cached_statements=STATEMENT_CACHE_SIZE)
+        conn.execute('PRAGMA journal_mode = WAL')
+        # In WAL mode FULL syncs the log on every commit; OFF leaves it to the OS
+        conn.execute(f"PRAGMA synchronous = {'FULL' if self.fsync else 'OFF'}")
+        return conn
+
+    def _prepare(self, conn: sqlite3.Connection, legacy_path: Optional[str]):
+        """Import legacy leads into a new database and rebuild keys if the index set changed."""
+        with self._transaction(conn):
+            meta = dict(conn.execute('SELECT name, value FROM lead_store_meta'))
+            if 'created_at' not in meta:
+                conn.execute("INSERT INTO lead_store_meta VALUES ('created_at', datetime('now'))")
+                if legacy_path and os.path.exists(legacy_path):
+                    self._import(conn, legacy_path)
+            names = json.dumps(sorted(self.indexes))
+            if meta.get('indexes') != names:
+                # Index functions are code: rebuild the keys whenever the set of indexes changes
+                conn.execute('DELETE FROM lead_keys')
+                rows = conn.execute('SELECT record FROM leads')
+                while True:
+                    records = [json.loads(record) for record, in islice(rows, MAX_BATCH_RECORDS)]
+                    if not records:
+                        break
+                    conn.executemany('INSERT INTO lead_keys VALUES (?, ?, ?)',
+                                     [key_row for record in records for key_row in self._key_rows(record)])
+                conn.execute('INSERT OR REPLACE INTO lead_store_meta VALUES (?, ?)', ('indexes', names))
+
+    def _import(self, conn: sqlite3.Connection, legacy_path: str):
+        if legacy_path.endswith('.jsonl'):
+            journal = LeadJournal(legacy_path, auto_compact=False)
+            try:
+                records = list(journal.iter_records())
+            finally:
+                journal.close()
+        else:
+            try:
+                with open(legacy_path, 'r') as f:
+                    records = json.load(f)
+            except (json.JSONDecodeError, OSError):
+                records = []
+        records = [record for record in records if isinstance(record, dict) and 'id' in record]
+        conn.executemany(UPSERT, [self._row(record, seq) for seq, record in enumerate(records, 1)])
+        print(f"📦 Imported {len(records)} leads from {legacy_path}")
+
+    @contextmanager
+    def _transaction(self, conn: sqlite3.Connection):
+        """Write transaction, taking SQLite's write lock up front."""
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+
+    @contextmanager
+    def _reader(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a read connection from the pool."""
+        with self._lock:
+            if self._closed:
+                raise ValueError('Lead store is closed')
+            conn = self._idle.pop() if self._idle else None
+        if conn is None:
+            conn = self._connect()
+        try:
+            yield conn
+        finally:
+            with self._lock:
+                if not self._closed and len(self._idle) < READ_POOL_SIZE:
+                    self._idle.append(conn)
+                    conn = None
+            if conn is not None:
+                conn.close()
+
+    def _reset_after_fork(self):
+        """Give a forked child its own lock, writer and connections."""
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._writer = None
+        # SQLite connections must not be used across fork; the parent still owns them
+        self._idle = []
+
+    def _row(self, record: Dict, seq: int) -> Tuple:
+        pending = (record.get('sync') or {}).get('status') == PENDING
+        return (record['id'], record.get('created_at'), _email(record), int(pending), seq,
+                json.dumps(record, separators=(',', ':'), ensure_ascii=False))
+
+    def _key_rows(self, record: Dict) -> List[Tuple]:
+        record_id = record['id']
+        return [(name, key, record_id) for name, key in
+                ((name, _index_key(index, record)) for name, index in self.indexes.items()) if key is not None]
+
+    def _append(self, records: List[Dict], new: bool = False,
+                unique: Optional[Tuple[Collection[str], Optional[str]]] = None) -> List[Optional[str]]:
+        """Queue record versions for the writer and wait until they are committed."""
+        writes = [(record, new, unique, Future()) for record in records]
+        with self._lock:
+            if self._closed:
+                raise ValueError('Lead store is closed')
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name='lead-store-writer', daemon=True)
+                self._writer.start()
+            for write in writes:
+                self._queue.put(write)
+        return [future.result() for _, _, _, future in writes]
+
+    def _write_loop(self):
+        """Writer thread: apply queued records in batches until closed."""
+        write_queue = self._queue
+        conn = self._connect()
+        try:
+            while True:
+                batch = [write_queue.get()]
+                while len(batch) < MAX_BATCH_RECORDS:
+                    try:
+                        batch.append(write_queue.get_nowait())
+                    except queue.Empty:
+                        break
+                writes = [item for item in batch if item is not None]
+                if writes:
+                    try:
+                        self._write_batch(conn, writes)
+                    except BaseException as exc:
+                        for _, _, _, future in writes:
+                            if not future.done():
+                                future.set_exception(exc)
+                if len(writes) < len(batch):
+                    return
+        finally:
+            conn.close()
+
+    def _write_batch(self, conn: sqlite3.Connection, batch):
+        """Apply a burst of queued records in one transaction, with batched statements."""
+        accepted, duplicates = [], []
+        with self._transaction(conn):
+            seq = conn.execute('SELECT COALESCE(MAX(seq), 0) FROM leads').fetchone()[0]
+            latest: Dict[str, Optional[Tuple]] = {}   # record ID -> row to store, None to delete
+            claimed = {}   # (index name, key) -> ID of a record accepted earlier in this batch
+            for record, new, unique, future in batch:
+                record_id = record['id']
+                if record.get(DELETED):
+                    latest.pop(record_id, None)
+                    latest[record_id] = None
+                    accepted.append(future)
+                    continue
+                if new and (latest.get(record_id) is not None or
+                            (record_id not in latest and self._exists(conn, record_id))):
+                    future.set_exception(KeyError(f"Record {record_id} already exists"))
+                    continue
+                if unique:
+                    names, after = unique
+                    keys = [(name, _index_key(self.indexes[name], record)) for name in names]
+                    keys = [name_key for name_key in keys if name_key[1] is not None]
+                    existing = self._existing(conn, keys, after, claimed)
+                    if existing is not None:
+                        duplicates.append((existing, future))
+                        continue
+                    claimed.update((name_key, record_id) for name_key in keys)
+                seq += 1
+                # Keep the last version of each record, in the order written
+                latest.pop(record_id, None)
+                latest[record_id] = (self._row(record, seq), self._key_rows(record))
+                accepted.append(future)
+
+            conn.executemany('DELETE FROM lead_keys WHERE id = ?', [(record_id,) for record_id in latest])
+            conn.executemany('DELETE FROM leads WHERE id = ?',
+                             [(record_id,) for record_id, write in latest.items() if write is None])
+            writes = [write for write in latest.values() if write is not None]
+            conn.executemany(UPSERT, [row for row, _ in writes])
+            conn.executemany('INSERT INTO lead_keys VALUES (?, ?, ?)',
+                             [key_row for _, key_rows in writes for key_row in key_rows])
+        for future in accepted:
+            future.set_result(None)
+        for existing, future in duplicates:
+            future.set_result(existing)
+
+    def _exists(self, conn: sqlite3.Connection, record_id: str) -> bool:
+        return conn.execute('SELECT 1 FROM leads WHERE id = ?', (record_id,)).fetchone() is not None
+
+    def _existing(self, conn: sqlite3.Connection, keys: List[Tuple[str, Hashable]], after: Optional[str],
+                  claimed: Dict[Tuple[str, Hashable], str]) -> Optional[str]:
+        """Newest record ID above `after` holding any of these index keys (in the write transaction)."""
+        for name_key in keys:
+            if name_key in claimed:
+                return claimed[name_key]
+            name, key = name_key
+            # Backwards along the (name, key, id) primary key: one index seek
+            row = conn.execute('SELECT id FROM lead_keys WHERE name = ? AND key = ? AND id > ? '
+                               'ORDER BY id DESC LIMIT 1', (name, key, after or '')).fetchone()
+            if row is not None:
+                return row[0]
+        return None
+
+    def append(self, record: Dict, unique: Collection[str] = (), after: Optional[str] = None) -> Optional[str]:
+        """
+        Store a new record, unless it duplicates an existing one.
+
+        The duplicate check and the insert share one write transaction, so
+        of several concurrent duplicates exactly one is stored.
+
+        Args:
+            record: Record with a unique 'id'
+            unique: Secondary indexes whose keys identify a duplicate
+            after: Only records with IDs greater than this count as duplicates
+
+        Returns:
+            None if the record was stored, otherwise the ID of the newest
+            record it duplicates
+
+        Raises:
+            KeyError: If a record with the same ID already exists
+            ValueError: If `unique` names an unknown index
+        """
+        for name in unique:
+            if name not in self.indexes:
+                raise ValueError(f"Unknown index: {name}")
+        return self._append([record], new=True, unique=(tuple(unique), after) if unique else None)[0]
+
+    def put(self, record: Dict):
+        """Store a new version of a record, replacing any existing one."""
+        self._append([record])
+
+    def put_many(self, records: List[Dict]):
+        """Store new versions of several records, written together."""
+        if records:
+            self._append(records)
+
+    def delete(self, record_id: str) -> bool:
+        """
+        Delete a record.
+
+        Returns:
+            True if the record existed
+        """
+        if record_id not in self:
+            return False
+        self._append([{'id': record_id, DELETED: True}])
+        return True
+
+    def get(self, record_id: str) -> Optional[Dict]:
+        """Read the latest version of a record by ID, or None."""
+        with self._reader() as conn:
+            row = conn.execute('SELECT record FROM leads WHERE id = ?', (record_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def __contains__(self, record_id: str) -> bool:
+        with self._reader() as conn:
+            return self._exists(conn, record_id)
+
+    def __len__(self) -> int:
+        with self._reader() as conn:
+            return conn.execute('SELECT COUNT(*) FROM leads').fetchone()[0]
+
+    def outbox(self, limit: Optional[int] = None) -> List[str]:
+        """IDs of records whose latest version is pending sync, oldest first."""
+        with self._reader() as conn:
+            rows = conn.execute('SELECT id FROM leads WHERE pending = 1 ORDER BY seq LIMIT ?',
+                                (-1 if limit is None else limit,))
+            return [record_id for record_id, in rows]
+
+    def _where(self, filters: Mapping[str, Collection[Hashable]], after: Optional[str],
+               before: Optional[str], conn: sqlite3.Connection) -> Tuple[str, str, List]:
+        """
+        Table, WHERE clause and parameters selecting records by index keys and ID range.
+
+        Filtered selections walk the lead_keys rows of the most selective
+        filter (in ID order when it has one key) and check the other filters
+        with primary key lookups, like the journal's sorted ID lists.
+        """
+        for name in filters:
+            if name not in self.indexes:
+                raise ValueError(f"Unknown index: {name}")
+        filters = {name: list(set(keys)) for name, keys in filters.items()}
+        if not filters:
+            table, column, clauses, params = 'leads', 'id', [], []
+        else:
+            def in_keys(keys):
+                return f"IN ({', '.join('?' * len(keys))})"
+
+            driver = next(iter(filters))
+            if len(filters) > 1:
+                driver = min(filters, key=lambda name: self._matches(conn, name, filters[name]))
+            table, column = 'lead_keys k', 'k.id'
+            clauses, params = ['k.name = ?', f'k.key {in_keys(filters[driver])}'], [driver] + filters[driver]
+            for name, keys in filters.items():
+                if name != driver:
+                    clauses.append(f'EXISTS (SELECT 1 FROM lead_keys o WHERE o.name = ? AND o.key {in_keys(keys)} '
+                                   f'AND o.id = k.id)')
+                    params += [name] + keys
+        if after is not None:
+            clauses.append(f'{column} > ?')
+            params.append(after)
+        if before is not None:
+            clauses.append(f'{column} < ?')
+            params.append(before)
+        return table, (' WHERE ' + ' AND '.join(clauses)) if clauses else '', params
+
+    def _matches(self, conn: sqlite3.Connection, name: str, keys: List[Hashable]) -> int:
+        """Roughly how many records have one of these keys (cached: only used to plan queries)."""
+        cache_key = (name, tuple(sorted(keys, key=repr)))
+        now = time.monotonic()
+        cached = self._match_counts.get(cache_key)
+        if cached is None or now - cached[0] > MATCH_COUNT_TTL_SECONDS:
+            matches = conn.execute(f"SELECT COUNT(*) FROM lead_keys WHERE name = ? AND key IN "
+                                   f"({', '.join('?' * len(keys))})", [name] + keys).fetchone()[0]
+            if len(self._match_counts) >= MATCH_COUNT_CACHE_SIZE:
+                self._match_counts.clear()
+            cached = self._match_counts[cache_key] = (now, matches)
+        return cached[1]
+
+    def count(self, filters: Optional[Mapping[str, Collection[Hashable]]] = None, after: Optional[str] = None,
+              before: Optional[str] = None) -> int:
+        """
+        Count live records, optionally only those matching secondary index keys.
+
+        Args:
+            filters: Index name -> accepted keys; a record must match every index
+            after: Count only records with IDs greater than this
+            before: Count only records with IDs less than this
+
+        Raises:
+            ValueError: If a filter names an unknown index
+        """
+        with self._reader() as conn:
+            table, where, params = self._where(filters or {}, after, before, conn)
+            return conn.execute(f'SELECT COUNT(*) FROM {table}{where}', params).fetchone()[0]
+
+    def query(self, filters: Optional[Mapping[str, Collection[Hashable]]] = None, after: Optional[str] = None,
+              limit: int = 50, before: Optional[str] = None) -> List[Dict]:
+        """
+        Read one page of live records in record ID order (keyset pagination).
+
+        Args:
+            filters: Index name -> accepted keys; a record must match every index
+            after: Return only records with IDs greater than this (the last ID of the previous page)
+            limit: Most records to return
+            before: Return only records with IDs less than this
+
+        Returns:
+            Latest versions of the matching records
+
+        Raises:
+            ValueError: If a filter names an unknown index
+        """
+        with self._reader() as conn:
+            table, where, params = self._where(filters or {}, after, before, conn)
+            if table == 'leads':
+                sql = f'SELECT record FROM leads{where} ORDER BY id LIMIT ?'
+            else:
+                sql = f'SELECT l.record FROM {table} JOIN leads l ON l.id = k.id{where} ORDER BY k.id LIMIT ?'
+            rows = conn.execute(sql, params + [max(0, limit)])
+            return [json.loads(record) for record, in rows]
+
+    def keys(self, name: str) -> Dict[Hashable, int]:
+        """Record count per key of a secondary index."""
+        if name not in self.indexes:
+            raise ValueError(f"Unknown index: {name}")
+        with self._reader() as conn:
+            return dict(conn.execute('SELECT key, COUNT(*) FROM lead_keys WHERE name = ? GROUP BY key', (name,)))
+
+    def iter_records(self) -> Iterator[Dict]:
+        """
+        Stream the latest version of every live record, in the order those
+        versions were written.
+
+        Reads one snapshot on a connection of its own, so neither concurrent
+        writes nor the thread consuming the iterator affect it.
+        """
+        conn = self._connect()
+        try:
+            for record, in conn.execute('SELECT record FROM leads ORDER BY seq'):
+                yield json.loads(record)
+        finally:
+            conn.close()
+
+    def stats(self) -> Dict:
+        """Record count and database/free page sizes in bytes."""
+        with self._reader() as conn:
+            page_size = conn.execute('PRAGMA page_size').fetchone()[0]
+            pages = conn.execute('PRAGMA page_count').fetchone()[0]
+            free = conn.execute('PRAGMA freelist_count').fetchone()[0]
+            records = conn.execute('SELECT COUNT(*) FROM leads').fetchone()[0]
+        wal = self.path + '-wal'
+        wal_bytes = os.path.getsize(wal) if os.path.exists(wal) else 0
+        return {'records': records, 'bytes': pages * page_size + wal_bytes, 'garbage_bytes': free * page_size}
+
+    def close(self):
+        """Finish queued writes, then close every connection."""
+        with self._lock:
+            self._closed = True
+            writer, self._writer = self._writer, None
+            if writer is not None:
+                self._queue.put(None)
+            idle, self._idle = self._idle, []
+        if writer is not None:
+            writer.join()
+        for conn in idle:
+            conn.close()
+        _stores.discard(self)
@@ -0,0 +1,9 @@
+import os
+import sys
+import tempfile
+
+# Make the integrations package importable from the tests
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+# Keep the rate limit state shared between processes out of the real temp directory
+os.environ.setdefault('AIRTABLE_RATE_LIMIT_DIR', tempfile.mkdtemp(prefix='renovai-tests-'))
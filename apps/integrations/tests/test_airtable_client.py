@@ -0,0 +1,81 @@
+import os
+import time
+
+import pytest
+
+from integrations import airtable_client
+from integrations.airtable_client import AirtableClient
+from integrations.airtable_standin import AirtableStandIn
+from integrations.benchmarks.airtable_bench import run_bench
+from integrations.rate_limit import TokenBucket
+
+@pytest.fixture(autouse=True)
+def quiet(monkeypatch):
+    monkeypatch.setattr(airtable_client, 'print', lambda *args, **kwargs: None, raising=False)
+
+def _client(standin, tmp_path, **kwargs):
+    return AirtableClient(api_key='test-key', base_id='appTest', api_url=standin.url,
+                          mock_file=str(tmp_path / 'outbox.jsonl'), **kwargs)
+
+def test_bulk_create_and_update_use_pooled_batches(tmp_path):
+    with AirtableStandIn(api_key='test-key') as standin:
+        client = _client(standin, tmp_path, rate_limit=50)
+        created = client.create_records([{'Name': f'Lead {i}', 'Status': 'New'} for i in range(25)])
+        updated = client.update_records([{'id': record['id'], 'fields': {'Status': 'Contacted'}}
+                                         for record in created[:15]])
+        session = client._http()
+        client.close()
+
+        assert [record['fields']['Name'] for record in created] == [f'Lead {i}' for i in range(25)]
+        assert [request['records'] for request in standin.requests] == [10, 10, 5, 10, 5]
+        assert [record['fields'] for record in updated][0] == {'Name': 'Lead 0', 'Status': 'Contacted'}
+        statuses = [record['fields']['Status'] for record in standin.records('appTest', 'Leads')]
+        assert statuses == ['Contacted'] * 15 + ['New'] * 10
+        assert session.is_closed
+
+def test_rate_limited_requests_wait_for_retry_after(tmp_path):
+    with AirtableStandIn(api_key='test-key', rate_limit=2, rate_limit_penalty=0.3) as standin:
+        client = _client(standin, tmp_path)
+        client.rate_limiter = TokenBucket(1e9)   # No pacing: let the server push back
+        for i in range(6):
+            client.create_records([{'Name': f'Lead {i}'}])
+        client.close()
+
+    assert standin.rate_limited > 0
+    assert len(standin.records('appTest', 'Leads')) == 6
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='needs fork()')
+def test_processes_share_one_rate_limit_per_base(tmp_path):
+    # Two workers at the full rate each would double it and draw 429s
+    for worker in range(2):
+        (tmp_path / f'worker{worker}').mkdir()
+    with AirtableStandIn(api_key='test-key', rate_limit=10, rate_limit_penalty=0.5) as standin:
+        started = time.monotonic()
+        pids = []
+        for worker in range(2):
+            pid = os.fork()
+            if pid == 0:
+                exit_code = 1
+                try:
+                    client = _client(standin, tmp_path / f'worker{worker}', rate_limit=10)
+                    for i in range(8):
+                        client.create_records([{'Name': f'Lead {worker}-{i}'}])
+                    client.close()
+                    exit_code = 0
+                finally:
+                    os._exit(exit_code)
+            pids.append(pid)
+        statuses = [os.waitpid(pid, 0)[1] for pid in pids]
+        elapsed = time.monotonic() - started
+
+    assert statuses == [0, 0]
+    assert len(standin.records('appTest', 'Leads')) == 16
+    assert standin.rate_limited == 0
+    # 16 requests at 9/s (the limit less headroom), not 18/s
+    assert elapsed >= 15 / 9
+
+def test_bench_sustains_the_rate_limit_without_429s():
+    result = run_bench(requests=15, threads=6, rate_limit=20, penalty=1.0, latency=0.0)
+    assert result['rate_limited'] == 0
+    assert result['failed'] == 0
+    assert 0.7 * 20 <= result['requests_per_s'] <= 20
@@ -0,0 +1,191 @@
+import threading
+import time
+from datetime import datetime
+
+import pytest
+
+from integrations import airtable_client, airtable_replica, record_ids
+from integrations.airtable_client import AirtableAPIError, AirtableClient
+from integrations.airtable_standin import AirtableStandIn
+from integrations.lead_sync import pending_sync
+
+BASE_ID = 'appReplica'
+
+@pytest.fixture
+def standin():
+    with AirtableStandIn(api_key='test-key') as server:
+        yield server
+
+@pytest.fixture(autouse=True)
+def quiet(monkeypatch):
+    monkeypatch.setattr(airtable_client, 'print', lambda *args, **kwargs: None, raising=False)
+    monkeypatch.setattr(airtable_replica, 'print', lambda *args, **kwargs: None, raising=False)
+    # Same clock as the stand-in, so no overlap is needed
+    monkeypatch.setattr(airtable_replica, 'SYNC_OVERLAP_SECONDS', 0.0)
+
+def _client(standin, tmp_path, max_staleness=60.0):
+    return AirtableClient(api_key='test-key', base_id=BASE_ID, api_url=standin.url, rate_limit=1000,
+                          mock_file=str(tmp_path / 'outbox.jsonl'), replica_max_staleness=max_staleness)
+
+def _gets(standin):
+    return [request['path'] for request in standin.requests if request['method'] == 'GET']
+
+def _seed(client, count):
+    kinds = ['Kitchen', 'Bathroom', 'Basement']
+    return client.create_records([{'Name': f'Lead {i}', 'Project Type': kinds[i % 3], 'Status': 'New'}
+                                  for i in range(count)])
+
+def test_records_are_listed_a_page_at_a_time(standin, tmp_path):
+    client = _client(standin, tmp_path)
+    created = _seed(client, 250)
+
+    assert [record['id'] for record in client.list_records()] == [record['id'] for record in created]
+    assert len(_gets(standin)) == 3
+    with pytest.raises(AirtableAPIError) as error:
+        list(client.list_records(page_size=101))
+    assert error.value.status_code == 422
+    client.close()
+
+def _wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.02)
+
+def test_reads_come_from_an_incrementally_synced_replica(standin, tmp_path):
+    client = _client(standin, tmp_path, max_staleness=0.5)
+    created = _seed(client, 30)
+    client.replica.sync()
+
+    assert client.count_leads() == 30 and client.count_leads(project_type='kitchen') == 10
+    assert client.lead_breakdown()['by_status'] == {'new': 30}
+    page = client.list_leads(limit=20)
+    assert [lead['airtable_id'] for lead in page['leads']] == [record['id'] for record in created[:20]]
+    # Fresh enough: neither the reads nor the refresh thread they started made a request
+    assert len(_gets(standin)) == 1
+
+    client.update_records([{'id': record['id'], 'fields': {'Status': 'Contacted'}} for record in created[:2]])
+    fetched, fetch = [], client.replica.fetch
+
+    def recording_fetch(formula):
+        for record in fetch(formula):
+            fetched.append(record)
+            yield record
+    client.replica.fetch = recording_fetch
+
+    # The refresh thread syncs only the records modified since the last sync
+    _wait_for(lambda: client.count_leads(status='contacted') == 2)
+    assert sorted(record['id'] for record in fetched) == [record['id'] for record in created[:2]]
+    assert 'filterByFormula' in _gets(standin)[-1]
+    assert client.get_lead(created[0]['id'])['fields']['Status'] == 'Contacted'
+    client.close()
+
+def test_deletions_are_dropped_by_the_full_reload(standin, tmp_path):
+    client = _client(standin, tmp_path)
+    created = _seed(client, 5)
+    # The first read starts the refresh thread, which loads the replica
+    _wait_for(lambda: client.count_leads() == 5)
+
+    client._request('DELETE', params={'records[]': [created[1]['id']]})
+    client.replica.sync()
+    assert client.count_leads() == 5      # incremental syncs cannot see deletions
+    client.replica.sync(full=True)
+    assert client.count_leads() == 4 and client.get_lead(created[1]['id']) is None
+    client.close()
+
+def test_reads_never_wait_for_airtable(standin, tmp_path):
+    client = _client(standin, tmp_path, max_staleness=0.2)
+    _seed(client, 3)
+    client.replica.sync()
+    time.sleep(0.3)
+
+    airtable_down = threading.Event()
+
+    def hanging_fetch(formula):
+        airtable_down.wait(5)
+        raise AirtableAPIError('Airtable is unreachable', status_code=503)
+        yield
+    client.replica.fetch = hanging_fetch
+
+    # Past the staleness bound with the sync hanging: reads serve the last sync
+    started = time.monotonic()
+    assert client.count_leads() == 3 and len(client.list_leads()['leads']) == 3
+    assert time.monotonic() - started < 0.1
+    airtable_down.set()
+    client.close()
+
+def test_leads_in_the_outbox_are_read_until_delivered(standin, tmp_path):
+    client = _client(standin, tmp_path)
+    _seed(client, 2)
+    client.replica.sync()
+    client.sync.notify = lambda: None    # deliver only when the test says so
+    leads = [client.create_lead({'Name': f'New {i}', 'Email': f'new{i}@example.com', 'Phone': f'60455501{i:02d}',
+                                 'Project Type': 'Kitchen', 'Status': 'New'})
+             for i in range(3)]
+
+    assert client.count_leads() == 5 and client.count_leads(project_type='kitchen') == 4
+    today = leads[0]['created_at'][:10]
+    assert client.count_leads(date_from=today, date_to=today) == 5
+    assert client.lead_breakdown()['by_project_type'] == {'kitchen': 4, 'bathroom': 1}
+    page = client.list_leads(limit=4)
+    assert [lead.get('airtable_id') for lead in page['leads'][:2]] == [record['airtable_id'] for record in
+                                                                    client.replica.store.iter_records()]
+    assert [lead['id'] for lead in page['leads'][2:]] == [lead['record_id'] for lead in leads[:2]]
+    rest = client.list_leads(cursor=page['next_cursor'], limit=4)
+    assert [lead['id'] for lead in rest['leads']] == [leads[2]['record_id']] and rest['next_cursor'] is None
+    assert len(list(client.get_all_leads())) == 5
+
+    # Delivered leads move to the replica at once, and a sync does not double them
+    assert client.sync.sync_once() == 3
+    assert client.count_leads() == 5 and client.count_leads(project_type='kitchen') == 4
+    assert [lead['fields']['Name'] for lead in client.list_leads()['leads']][2:] == ['New 0', 'New 1', 'New 2']
+    client.replica.sync(full=True)
+    assert client.count_leads() == 5
+    client.close()
+
+def test_outbox_leads_are_counted_from_the_indexes(standin, tmp_path):
+    client = _client(standin, tmp_path)
+    client.replica.sync()
+    client.sync.notify = lambda: None
+    # Airtable has been down for a while: a large outbox has built up
+    kinds = ['Kitchen', 'Bathroom', 'Basement']
+    leads = []
+    for i in range(3000):
+        record_id, created_ms = record_ids.generator.new()
+        leads.append({'id': record_id, 'created_at': datetime.fromtimestamp(created_ms / 1000).isoformat(
+                          timespec='milliseconds'),
+                      'fields': {'Name': f'Lead {i}', 'Project Type': kinds[i % 3], 'Status': 'New'},
+                      'sync': pending_sync()})
+    client.store.put_many(leads)
+    client.store.put_many([dict(lead, sync={'status': 'synced'}) for lead in leads[:300]])
+
+    read = []
+    get = client.store.get
+    client.store.get = lambda record_id: read.append(record_id) or get(record_id)
+    client.store.outbox = None    # counting must not walk the outbox
+
+    assert client.count_leads() == 2700 and client.count_leads(project_type='kitchen') == 900
+    assert client.lead_breakdown() == {'by_project_type': {'kitchen': 900, 'bathroom': 900, 'basement': 900},
+                                       'by_status': {'new': 2700}}
+    page = client.list_leads(limit=10)
+    assert [lead['id'] for lead in page['leads']] == [lead['id'] for lead in leads[300:310]]
+    assert read == []
+    client.close()
+
+def test_status_reports_the_outbox_and_replica_freshness(standin, tmp_path):
+    client = _client(standin, tmp_path)
+    client.replica.sync()
+    client.sync.notify = lambda: None
+    client.create_lead({'Name': 'New', 'Email': 'new@example.com', 'Phone': '6045550100',
+                        'Project Type': 'Kitchen', 'Status': 'New'})
+
+    status = client.status()
+    assert (status['mode'], status['base_id']) == ('live', BASE_ID)
+    assert status['outbox']['pending'] == 1 and status['outbox']['consecutive_failures'] == 0
+    assert status['replica']['records'] == 0 and 0 <= status['replica']['age_seconds'] < 5
+    assert status['replica']['synced_as_of'] == status['replica']['full_load_at']
+
+    client.sync.sync_once()
+    status = client.status()
+    assert status['outbox']['pending'] == 0 and status['replica']['records'] == 1
+    client.close()
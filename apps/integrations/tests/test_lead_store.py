@@ -0,0 +1,133 @@
+import json
+import os
+import threading
+
+from integrations import lead_store
+from integrations.lead_store import LeadJournal
+
+def _lead(i):
+    return {'id': f'rec{i:06d}', 'created_at': '2025-01-01T00:00:00', 'fields': {'Name': f'Lead {i}'}}
+
+def test_records_survive_reopen_and_torn_writes(tmp_path):
+    path = str(tmp_path / 'leads.jsonl')
+    journal = LeadJournal(path)
+    for i in range(5):
+        journal.append(_lead(i))
+    journal.put(dict(_lead(2), fields={'Name': 'Updated'}))
+    journal.delete('rec000003')
+    journal.close()
+
+    # Simulate a crash in the middle of writing a line
+    with open(path, 'ab') as f:
+        f.write(b'{"id":"rec999999","fie')
+
+    journal = LeadJournal(path)
+    assert len(journal) == 4
+    assert journal.get('rec000002')['fields'] == {'Name': 'Updated'}
+    assert journal.get('rec000003') is None
+    assert [r['id'] for r in journal.iter_records()] == ['rec000000', 'rec000001', 'rec000004', 'rec000002']
+    journal.append(_lead(5))
+    assert LeadJournal(path).get('rec000005') == _lead(5)
+
+def test_concurrent_appends_share_fsyncs(tmp_path, monkeypatch):
+    fsyncs = []
+    real_fsync = os.fsync
+    monkeypatch.setattr(lead_store.os, 'fsync', lambda fd: (fsyncs.append(fd), real_fsync(fd)))
+    journal = LeadJournal(str(tmp_path / 'leads.jsonl'))
+
+    threads = [threading.Thread(target=lambda n=n: [journal.append(_lead(n * 100 + i)) for i in range(50)])
+               for n in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(journal) == 800
+    assert len(fsyncs) < 800
+
+def test_compaction_keeps_latest_versions_and_concurrent_appends(tmp_path):
+    journal = LeadJournal(str(tmp_path / 'leads.jsonl'), fsync=False, auto_compact=False)
+    for i in range(100):
+        journal.append(_lead(i))
+    for version in range(5):
+        for i in range(0, 100, 2):
+            journal.put(dict(_lead(i), fields={'Name': f'v{version}'}))
+    before = journal.stats()
+
+    # Appends racing the copy phase must not be lost
+    writer = threading.Thread(target=lambda: [journal.append(_lead(1000 + i)) for i in range(200)])
+    writer.start()
+    journal.compact()
+    writer.join()
+
+    after = journal.stats()
+    assert after['records'] == 300
+    assert after['bytes'] < before['bytes']
+    assert journal.get('rec000004')['fields'] == {'Name': 'v4'}
+    assert journal.get('rec001199') == _lead(1199)
+    assert sum(1 for _ in journal.iter_records()) == 300
+
+def test_legacy_json_file_is_imported_once(tmp_path):
+    legacy = tmp_path / 'mock_leads.json'
+    legacy.write_text(json.dumps([_lead(1), _lead(2)], indent=2))
+
+    journal = LeadJournal(str(tmp_path / 'mock_leads.jsonl'), legacy_json_path=str(legacy))
+    assert [r['id'] for r in journal] == ['rec000001', 'rec000002']
+    journal.append(_lead(3))
+    journal.close()
+
+    assert len(LeadJournal(str(tmp_path / 'mock_leads.jsonl'), legacy_json_path=str(legacy))) == 3
+
+def test_secondary_indexes_count_and_page_without_scanning(tmp_path):
+    indexes = {'type': lambda r: r['fields'].get('Type'), 'day': lambda r: r['created_at'][:10]}
+    path = str(tmp_path / 'leads.jsonl')
+    journal = LeadJournal(path, fsync=False, indexes=indexes)
+    for i in range(30):
+        journal.append({'id': f'rec{i:06d}', 'created_at': f'2025-01-{1 + i % 3:02d}T00:00:00',
+                        'fields': {'Type': 'kitchen' if i % 2 else 'bathroom'}})
+    journal.put({'id': 'rec000001', 'created_at': '2025-01-02T00:00:00', 'fields': {'Type': 'basement'}})
+    journal.delete('rec000003')
+
+    assert journal.keys('type') == {'bathroom': 15, 'kitchen': 13, 'basement': 1}
+    assert journal.count({'type': ['kitchen', 'basement']}) == 14
+    assert journal.count({'type': ['kitchen'], 'day': ['2025-01-02']}) == 4
+
+    # Keyset pages over the merged ID lists of several keys
+    pages, after = [], None
+    while True:
+        page = journal.query({'type': ['kitchen', 'basement']}, after=after, limit=4)
+        if not page:
+            break
+        pages.append([r['id'] for r in page])
+        after = page[-1]['id']
+    ids = [record_id for page in pages for record_id in page]
+    assert ids == sorted(ids) and len(ids) == 14 and 'rec000003' not in ids
+    assert journal.query({'type': ['kitchen']}, after='rec000025', limit=10)[0]['id'] == 'rec000027'
+    journal.close()
+
+    # Indexes are rebuilt when the journal is reopened
+    assert LeadJournal(path, indexes=indexes).keys('type') == {'bathroom': 15, 'kitchen': 13, 'basement': 1}
+
+def test_conditional_appends_store_one_of_concurrent_duplicates(tmp_path):
+    indexes = {'email': lambda r: r['fields'].get('Email')}
+    journal = LeadJournal(str(tmp_path / 'leads.jsonl'), fsync=False, indexes=indexes)
+    results = {}
+
+    def submit(i):
+        record = {'id': f'rec{i:06d}', 'fields': {'Email': 'same@example.com'}}
+        results[i] = journal.append(record, unique=['email'])
+
+    threads = [threading.Thread(target=submit, args=(i,)) for i in range(16)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    [stored] = [r['id'] for r in journal]
+    assert sorted(result for result in results.values() if result is not None) == [stored] * 15
+    # Only records with IDs above `after` count: older matches are outside the window
+    assert journal.append({'id': 'rec999999', 'fields': {'Email': 'same@example.com'}},
+                          unique=['email'], after=stored) is None
+    assert journal.append({'id': 'rec999998', 'fields': {'Email': 'other@example.com'}}, unique=['email']) is None
+    assert len(journal) == 3
+    journal.close()
@@ -0,0 +1,69 @@
+import multiprocessing
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from integrations import airtable_client, lead_store
+from integrations.airtable_client import AirtableClient
+from integrations.lead_store import LeadJournal
+
+SUBMISSIONS = 4000
+PROCESSES = 4
+PER_PROCESS = 500
+
+def _lead_data(i):
+    return {'name': f'Lead {i}', 'email': f'lead{i}@example.com', 'project_type': 'kitchen'}
+
+def _submit_from_worker(client, first):
+    for i in range(first, first + PER_PROCESS):
+        client.create_lead(_lead_data(i))
+
+def test_parallel_submissions_are_never_lost(tmp_path, monkeypatch):
+    fsyncs = []
+    real_fsync = os.fsync
+    monkeypatch.setattr(lead_store.os, 'fsync', lambda fd: (fsyncs.append(fd), real_fsync(fd)))
+    monkeypatch.setattr(airtable_client, 'print', lambda *args, **kwargs: None, raising=False)
+    client = AirtableClient(mock_file=str(tmp_path / 'leads.jsonl'), store_backend='journal')
+
+    with ThreadPoolExecutor(max_workers=64) as pool:
+        results = list(pool.map(lambda i: client.create_lead(_lead_data(i)), range(SUBMISSIONS)))
+    client.close()
+
+    assert all(result['success'] for result in results)
+    assert len({result['record_id'] for result in results}) == SUBMISSIONS
+    # Bursts are coalesced into shared writes and fsyncs
+    assert len(fsyncs) < SUBMISSIONS / 4
+
+    reopened = LeadJournal(str(tmp_path / 'leads.jsonl'))
+    emails = {record['fields']['email'] for record in reopened}
+    assert emails == {_lead_data(i)['email'] for i in range(SUBMISSIONS)}
+
+def test_forked_workers_share_one_journal(tmp_path, monkeypatch):
+    monkeypatch.setattr(airtable_client, 'print', lambda *args, **kwargs: None, raising=False)
+    path = str(tmp_path / 'leads.jsonl')
+    # Opened before forking, as the pre-fork server does
+    client = AirtableClient(mock_file=path, store_backend='journal')
+    client.create_lead(_lead_data(-1))
+
+    context = multiprocessing.get_context('fork')
+    workers = [context.Process(target=_submit_from_worker, args=(client, n * PER_PROCESS))
+               for n in range(PROCESSES)]
+    for worker in workers:
+        worker.start()
+    # The parent keeps writing while the workers do
+    _submit_from_worker(client, PROCESSES * PER_PROCESS)
+    for worker in workers:
+        worker.join()
+    assert [worker.exitcode for worker in workers] == [0] * PROCESSES
+
+    total = (PROCESSES + 1) * PER_PROCESS + 1
+    # The parent's index catches up with lines the workers appended
+    assert client.count_leads() == total
+    assert len(LeadJournal(path)) == total
+
+    # Compaction by another process is picked up too
+    other = LeadJournal(path)
+    other.compact()
+    client.create_lead(_lead_data(10_000))
+    assert client.count_leads() == total + 1
+    assert {record['fields']['email'] for record in client.get_all_leads()} == \
+        {_lead_data(i)['email'] for i in [-1, 10_000, *range(total - 1)]}
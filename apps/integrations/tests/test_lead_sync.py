@@ -0,0 +1,151 @@
+import time
+
+import pytest
+
+from integrations import airtable_client, lead_sync
+from integrations.airtable_client import AirtableClient
+from integrations.airtable_standin import AirtableStandIn
+
+BASE_ID = 'appTest'
+
+@pytest.fixture
+def standin():
+    with AirtableStandIn(api_key='test-key') as server:
+        yield server
+
+@pytest.fixture(autouse=True)
+def fast_retries(monkeypatch):
+    monkeypatch.setattr(lead_sync, 'BACKOFF_BASE_SECONDS', 0.01)
+    monkeypatch.setattr(lead_sync, 'POLL_INTERVAL_SECONDS', 0.05)
+    monkeypatch.setattr(airtable_client, 'print', lambda *args, **kwargs: None, raising=False)
+    monkeypatch.setattr(lead_sync, 'print', lambda *args, **kwargs: None, raising=False)
+
+def _client(standin, path):
+    return AirtableClient(api_key='test-key', base_id=BASE_ID, api_url=standin.url, mock_file=str(path))
+
+def _wait_until_settled(client, record_ids, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        statuses = [client.get_lead_status(record_id) for record_id in record_ids]
+        if all(status['status'] != 'pending' for status in statuses):
+            return statuses
+        time.sleep(0.02)
+    raise AssertionError('Leads still pending')
+
+def test_leads_are_acknowledged_then_delivered_in_batches(standin, tmp_path):
+    standin.latency = 0.05
+    client = _client(standin, tmp_path / 'outbox.jsonl')
+
+    start = time.perf_counter()
+    results = [client.create_lead({'Name': f'Lead {i}', 'Email': f'lead{i}@example.com'}) for i in range(25)]
+    acknowledged = time.perf_counter() - start
+    assert all(result['sync_status'] == 'pending' for result in results)
+    # Acknowledging does not wait on the (slow) Airtable API
+    assert acknowledged < 25 * standin.latency
+
+    statuses = _wait_until_settled(client, [result['record_id'] for result in results])
+    client.close()
+
+    remote = {record['id']: record['fields'] for record in standin.records(BASE_ID, 'Leads')}
+    assert all(status['status'] == 'synced' for status in statuses)
+    assert sorted(fields['Email'] for fields in remote.values()) == sorted(f'lead{i}@example.com' for i in range(25))
+    assert {status['airtable_id'] for status in statuses} == set(remote)
+    assert all(request['records'] <= 10 for request in standin.requests)
+    assert len(standin.requests) < 25
+
+def test_transient_failures_are_retried_and_rejections_isolated(standin, tmp_path):
+    standin.fail_next(3, status=503)
+    client = _client(standin, tmp_path / 'outbox.jsonl')
+    good = client.create_lead({'Name': 'Good lead'})
+    statuses = _wait_until_settled(client, [good['record_id']])
+    assert statuses[0]['status'] == 'synced'
+    assert statuses[0]['attempts'] == 4
+
+    client.close()
+
+    # A record Airtable rejects fails alone; the rest of its batch is delivered
+    client = _client(standin, tmp_path / 'outbox.jsonl')
+    client.sync.stop()
+    results = [client.create_lead({'Name': f'Lead {i}'}) for i in range(3)]
+    bad = results[1]['record_id']
+    client.store.put(dict(client.store.get(bad), fields='not an object'))
+    client.close()
+
+    client = _client(standin, tmp_path / 'outbox.jsonl')
+    client.start_sync()
+    statuses = {status['record_id']: status for status in
+                _wait_until_settled(client, [result['record_id'] for result in results])}
+    client.close()
+
+    assert statuses[bad]['status'] == 'failed'
+    assert '422' in statuses[bad]['last_error']
+    assert [statuses[r['record_id']]['status'] for r in results if r['record_id'] != bad] == ['synced', 'synced']
+
+def test_unexpected_errors_back_off_and_count_attempts(standin, tmp_path, monkeypatch):
+    monkeypatch.setattr(lead_sync, 'MAX_SYNC_ATTEMPTS', 3)
+    client = _client(standin, tmp_path / 'outbox.jsonl')
+    client.sync.stop()
+    lead = client.create_lead({'Name': 'Lead'})
+    calls = []
+
+    def broken_send(records):
+        calls.append(time.monotonic())
+        raise ValueError('unexpected response')
+    client.sync.send = broken_send
+
+    assert client.sync.sync_once() == 0
+    status = client.get_lead_status(lead['record_id'])
+    assert (status['status'], status['attempts']) == ('pending', 1)
+    assert 'unexpected response' in status['last_error']
+    assert client.sync._failures == 1 and client.sync._retry_at > calls[0]
+
+    client.sync.sync_once()
+    client.sync.sync_once()
+    assert client.get_lead_status(lead['record_id'])['status'] == 'failed'
+    assert len(calls) == 3 and client.sync._failures == 3
+    client.close()
+
+    # Errors outside delivery (e.g. reading the journal) back off too
+    client = _client(standin, tmp_path / 'outbox.jsonl')
+    client.sync.stop()
+    errors = []
+
+    def broken_sync_once():
+        errors.append(time.monotonic())
+        raise OSError('journal unreadable')
+    worker = lead_sync.LeadSyncWorker(client.store, client._deliver_leads)
+    worker.sync_once = broken_sync_once
+    worker.start()
+    deadline = time.monotonic() + 5
+    while len(errors) < 5 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    worker.stop()
+    client.close()
+
+    gaps = [later - earlier for earlier, later in zip(errors, errors[1:])]
+    assert len(gaps) >= 4 and gaps[3] > 2 * gaps[0]
+
+def test_one_process_delivers_each_lead_once(standin, tmp_path):
+    path = tmp_path / 'outbox.jsonl'
+    first, second = _client(standin, path), _client(standin, path)
+    results = [client.create_lead({'Name': f'Lead {i}'}) for i in range(20) for client in (first, second)]
+    _wait_until_settled(first, [result['record_id'] for result in results])
+
+    # Only one of the two sharing the journal holds the sync lock
+    assert (first.sync._lock_fd is None) != (second.sync._lock_fd is None)
+    assert len(standin.records(BASE_ID, 'Leads')) == 40
+    first.close()
+    second.close()
+
+def test_pending_leads_survive_restart(standin, tmp_path):
+    path = tmp_path / 'outbox.jsonl'
+    client = _client(standin, path)
+    client.sync.stop()                  # Simulate a process exiting before delivery
+    record_id = client.create_lead({'Name': 'Queued before restart'})['record_id']
+    client.store.close()
+    assert standin.records(BASE_ID, 'Leads') == []
+
+    client = _client(standin, path)
+    client.start_sync()
+    assert _wait_until_settled(client, [record_id])[0]['status'] == 'synced'
+    client.close()
@@ -0,0 +1,83 @@
+import json
+import re
+import threading
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from integrations import airtable_client, record_ids
+from integrations.airtable_client import AirtableClient
+from integrations.record_ids import RecordIdGenerator, id_bound, id_time
+
+def test_ids_are_unique_and_sorted_across_threads():
+    generator = RecordIdGenerator()
+    per_thread = [[] for _ in range(8)]
+
+    def work(ids):
+        for _ in range(2000):
+            ids.append(generator.new()[0])
+
+    threads = [threading.Thread(target=work, args=(ids,)) for ids in per_thread]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    all_ids = [record_id for ids in per_thread for record_id in ids]
+    assert len(set(all_ids)) == len(all_ids)
+    assert all(re.fullmatch(r'rec[0-9A-HJKMNP-TV-Z]{26}', record_id) for record_id in all_ids)
+    # Every thread saw strictly increasing IDs
+    assert all(ids == sorted(ids) and len(set(ids)) == len(ids) for ids in per_thread)
+
+def test_id_time_and_bounds_follow_creation_time():
+    record_id, ms = record_ids.generator.new()
+    created = id_time(record_id)
+    assert created == datetime.fromtimestamp(ms / 1000)
+    assert id_bound(created) < record_id < id_bound(created + timedelta(milliseconds=1))
+    assert id_time('rec20250101120000123456') is None
+
+def test_time_range_is_served_without_scanning(tmp_path, monkeypatch):
+    monkeypatch.setattr(airtable_client, 'print', lambda *args, **kwargs: None, raising=False)
+    client = AirtableClient(mock_file=str(tmp_path / 'leads.jsonl'))
+    clock = [datetime(2025, 6, 1, 12, 0).timestamp()]
+    monkeypatch.setattr(record_ids, 'time', SimpleNamespace(time_ns=lambda: int(clock[0] * 1e9)))
+    monkeypatch.setattr(record_ids, 'generator', RecordIdGenerator())
+    for i in range(30):
+        client.create_lead({'Name': f'Lead {i}', 'Project Type': 'Kitchen' if i % 2 else 'Bathroom'})
+        clock[0] += 60
+    monkeypatch.setattr(client.store, 'iter_records', None)
+
+    since, until = datetime(2025, 6, 1, 12, 10), datetime(2025, 6, 1, 12, 20)
+    page = client.list_leads(since=since, until=until, limit=4)
+    assert [lead['fields']['Name'] for lead in page['leads']] == [f'Lead {i}' for i in range(10, 14)]
+    assert page['leads'][0]['created_at'] == '2025-06-01T12:10:00.000'
+    rest = client.list_leads(since=since, until=until, cursor=page['next_cursor'], limit=50)
+    assert [lead['fields']['Name'] for lead in rest['leads']] == [f'Lead {i}' for i in range(14, 20)]
+    assert rest['next_cursor'] is None
+    assert client.count_leads(since=since) == 20
+    assert client.count_leads(until=since, project_type='kitchen') == 5
+    client.close()
+
+def test_migrated_legacy_leads_get_time_sortable_ids(tmp_path, monkeypatch):
+    monkeypatch.setattr(airtable_client, 'print', lambda *args, **kwargs: None, raising=False)
+    legacy = {'id': 'rec20251013044353', 'created_at': '2025-10-13T04:43:53.250000',
+              'fields': {'Name': 'Old Lead', 'Email': 'old@example.com', 'Phone': '604-555-0100'}}
+    (tmp_path / 'leads.json').write_text(json.dumps([legacy]))
+    client = AirtableClient(mock_file=str(tmp_path / 'leads.jsonl'))
+
+    [lead] = client.list_leads()['leads']
+    assert lead['legacy_id'] == 'rec20251013044353' and lead['fields'] == legacy['fields']
+    assert id_time(lead['id']) == datetime(2025, 10, 13, 4, 43, 53, 250000)
+    assert client.get_lead_status('rec20251013044353')['created_at'] == legacy['created_at']
+
+    # Outside since-only ranges and the dedup window, like any lead of its age
+    new = client.create_lead({'Name': 'Old Lead', 'Email': 'old@example.com', 'Phone': '604-555-0100'})
+    assert not new['duplicate']
+    assert client.count_leads(since=datetime(2025, 10, 14)) == 1
+    assert [lead['id'] for lead in client.list_leads(since=datetime(2025, 10, 14))['leads']] == [new['record_id']]
+    client.close()
+
+    # Re-keying happens once, to the same ID
+    reopened = AirtableClient(mock_file=str(tmp_path / 'leads.jsonl'))
+    assert reopened.get_lead('rec20251013044353')['id'] == lead['id']
+    assert reopened.count_leads() == 2
+    reopened.close()
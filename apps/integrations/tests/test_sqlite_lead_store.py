@@ -0,0 +1,101 @@
+import os
+import sqlite3
+import threading
+
+import pytest
+
+from integrations import sqlite_lead_store
+from integrations.airtable_client import AirtableClient
+from integrations.lead_store import LeadJournal, open_lead_store
+from integrations.lead_sync import pending_sync
+from integrations.sqlite_lead_store import SQLiteLeadStore
+
+INDEXES = {'type': lambda r: r['fields'].get('Type'), 'email': lambda r: r['fields'].get('Email')}
+
+@pytest.fixture(autouse=True)
+def quiet(monkeypatch):
+    monkeypatch.setattr(sqlite_lead_store, 'print', lambda *args, **kwargs: None, raising=False)
+
+@pytest.fixture(params=['journal', 'sqlite'])
+def store(request, tmp_path):
+    store = open_lead_store(str(tmp_path / 'leads.jsonl'), backend=request.param, indexes=INDEXES)
+    yield store
+    store.close()
+
+def _lead(i, **fields):
+    return {'id': f'rec{i:06d}', 'fields': dict({'Type': 'kitchen' if i % 2 else 'bathroom'}, **fields)}
+
+def test_backends_share_the_store_contract(store):
+    for i in range(20):
+        assert store.append(_lead(i, Email=f'lead{i}@example.com')) is None
+    with pytest.raises(KeyError):
+        store.append(_lead(3))
+    store.put(dict(_lead(1), fields={'Type': 'basement'}, sync=pending_sync()))
+    store.put_many([dict(_lead(i), sync=pending_sync()) for i in (4, 2)])
+    assert store.delete('rec000005') and not store.delete('rec999999')
+
+    assert len(store) == 19 and 'rec000005' not in store and store.get('rec000005') is None
+    assert store.get('rec000001')['fields'] == {'Type': 'basement'}
+    assert store.outbox() == ['rec000001', 'rec000004', 'rec000002'] and store.outbox(1) == ['rec000001']
+    assert store.keys('type') == {'bathroom': 10, 'kitchen': 8, 'basement': 1}
+    assert store.count({'type': ['kitchen', 'basement']}) == 9
+    assert store.count({'type': ['kitchen']}, after='rec000010', before='rec000016') == 3
+    assert store.count(after='rec000015') == 4
+    page = store.query({'type': ['kitchen', 'basement']}, after='rec000001', limit=3)
+    assert [r['id'] for r in page] == ['rec000003', 'rec000007', 'rec000009']
+    assert [r['id'] for r in store.query(before='rec000003')] == ['rec000000', 'rec000001', 'rec000002']
+    with pytest.raises(ValueError):
+        store.count({'missing': ['x']})
+
+    # Conditional appends: one of several concurrent duplicates is stored
+    results = []
+    threads = [threading.Thread(target=lambda i=i: results.append(
+        store.append(_lead(100 + i, Email='same@example.com'), unique=['email']))) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    [stored] = [r['id'] for r in store.query({'email': ['same@example.com']})]
+    assert sorted(results, key=str) == [None] + [stored] * 7
+    assert store.append(_lead(200, Email='lead7@example.com'), unique=['email'], after='rec000007') is None
+
+    ids = [r['id'] for r in store.iter_records()]
+    assert len(ids) == len(store) and ids[-1] == 'rec000200'
+    assert store.stats()['records'] == len(store)
+
+def test_sqlite_store_imports_the_journal_and_persists(tmp_path):
+    journal_path = str(tmp_path / 'leads.jsonl')
+    journal = LeadJournal(journal_path, indexes=INDEXES)
+    for i in range(5):
+        journal.append(_lead(i))
+    journal.delete('rec000002')
+    journal.close()
+
+    store = open_lead_store(journal_path, backend='sqlite', indexes=INDEXES)
+    assert [r['id'] for r in store] == ['rec000000', 'rec000001', 'rec000003', 'rec000004']
+    store.append(_lead(5))
+    store.close()
+
+    db_path = str(tmp_path / 'leads.sqlite3')
+    conn = sqlite3.connect(db_path)
+    assert conn.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+    plan = ' '.join(str(row) for row in conn.execute("EXPLAIN QUERY PLAN SELECT id FROM leads WHERE email = 'x'"))
+    assert 'leads_email' in plan
+    conn.close()
+
+    # Imported once; a new index set rebuilds the keys
+    store = SQLiteLeadStore(db_path, legacy_path=journal_path, indexes=dict(INDEXES, odd=lambda r: r['id'][-1] in '13579'))
+    assert len(store) == 5
+    assert store.keys('odd') == {0: 2, 1: 3}
+    store.close()
+
+def test_client_selects_the_backend_by_configuration(tmp_path, monkeypatch):
+    monkeypatch.setattr('integrations.airtable_client.print', lambda *args, **kwargs: None, raising=False)
+    monkeypatch.setattr('integrations.lead_store.LEAD_STORE_BACKEND', 'sqlite')
+    client = AirtableClient(mock_file=str(tmp_path / 'leads.jsonl'))
+    assert isinstance(client.store, SQLiteLeadStore)
+    first = client.create_lead({'Name': 'Jane', 'Email': 'jane@example.com', 'Phone': '604-555-0199'})
+    again = client.create_lead({'Name': 'Jane', 'Email': 'JANE@example.com', 'Phone': '6045550199'})
+    assert again['duplicate'] and again['record_id'] == first['record_id']
+    assert client.count_leads() == 1 and os.path.exists(str(tmp_path / 'leads.sqlite3'))
+    client.close()